@@ -5,7 +5,8 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from services.password_hasher import HasherOverloaded, password_hasher, pwd_context
+from services import server_timing
 
 # Configuration - SECURITY FIX: No fallback secret allowed
 SECRET_KEY = os.getenv("JWT_SECRET")
@@ -15,19 +16,12 @@ if not SECRET_KEY:
         "Generate one with: python -c 'import secrets; print(secrets.token_urlsafe(32))'"
     )
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 300 # 5 hours for campus shifts
+# Short-lived: clients renew via POST /token/refresh (the mobile app does so on a 401).
+# Deployments still serving app builds without refresh can set 300 until they update.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 
 # Auth Tools
-# Bcrypt configuration optimized for performance while maintaining security
-# rounds=10: 2^10 = 1024 iterations (~70-100ms on modern CPU)
-# OWASP minimum is 10 rounds, so this is still secure
-# Each round increase doubles hashing time (12 rounds ≈ 280-400ms)
-# Trade-off: Slightly faster brute-force attacks, but still computationally infeasible
-pwd_context = CryptContext(
-    schemes=["bcrypt"], 
-    deprecated="auto",
-    bcrypt__rounds=10  # Explicit: was default 12, now 10 for performance
-)
+# bcrypt context + dedicated hashing process pool live in services.password_hasher
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 logger = logging.getLogger("main")
@@ -38,6 +32,27 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def _overloaded_exception(exc: HasherOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service busy. Please try again shortly.",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+async def verify_password_async(plain_password, hashed_password):
+    """Verify on the hashing pool (never blocks the event loop). 503 when the queue is full."""
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HasherOverloaded as e:
+        raise _overloaded_exception(e)
+
+def hash_password_pooled(password):
+    """Hash on the hashing pool from sync (threadpool) handlers. 503 when the queue is full."""
+    try:
+        return password_hasher.hash_blocking(password)
+    except HasherOverloaded as e:
+        raise _overloaded_exception(e)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -66,7 +81,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with server_timing.timed("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role", "student")
         
@@ -0,0 +1,152 @@
+"""
+Non-blocking structured logging.
+Every handler call in the request path is a queue put: records go through a
+QueueHandler to a listener thread that formats them (JSON by default) and does
+the actual stderr write. When the queue is full records are dropped and
+counted instead of blocking the event loop.
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text" (local development)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Request log: a sample of successful requests, every error and every slow request
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", 0.1))
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", 1000))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # Already rendered by AsyncQueueHandler.prepare
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full at shutdown: wait (bounded) for room instead of raising
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that owns its listener thread.
+    The listener is (re)started lazily in each process, so gunicorn workers forked
+    from a preloaded master each get their own queue and thread.
+    """
+
+    def __init__(self, target: logging.Handler, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Fresh queue after fork: the parent's one may hold records and locks
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = _Listener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only resolve what can't cross threads
+        record = copy.copy(record)  # Other handlers still see the original
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "dropped": self.dropped}
+
+    def stop(self) -> None:
+        """Flush queued records (shutdown)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+def request_sample_rate(status_code: int, duration_ms: float) -> float:
+    """Probability that a finished request is logged"""
+    if status_code >= 400 or duration_ms >= ACCESS_LOG_SLOW_MS:
+        return 1.0
+    return ACCESS_LOG_SAMPLE_RATE
+
+
+_handler = None
+
+
+def setup_logging() -> AsyncQueueHandler:
+    """Route the root logger through the async queue (idempotent)"""
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    _handler = AsyncQueueHandler(target)
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(LOG_LEVEL)
+
+    # Requests are logged once, by main.log_requests (sampled); not again by uvicorn
+    logging.getLogger("uvicorn.access").disabled = True
+    return _handler
+
+
+def logging_stats() -> dict:
+    """Queue depth and dropped records (this worker) for health endpoints"""
+    return _handler.stats() if _handler is not None else {}
+
+
+def shutdown_logging() -> None:
+    if _handler is not None:
+        _handler.stop()
@@ -95,3 +95,18 @@ class Setting(Base):
     description = Column(String, nullable=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+
+class RefreshToken(Base):
+    """
+    Rotating refresh tokens - DB fallback store (Redis is primary).
+    Only the SHA-256 of the token is stored. Presenting a token that was already
+    rotated (used=True) revokes its whole family (token reuse detection).
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_hash = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    family_id = Column(String, index=True)  # All tokens rotated from one login
+    expires_at = Column(DateTime(timezone=True))
+    used = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
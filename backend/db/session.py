@@ -1,14 +1,41 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from services import metrics, server_timing
+from services.rolling_window import RollingWindow
+
 # Use local postgres as default if env is missing
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+pg8000://shiva@localhost:5432/campuseats")
 
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    # Checkout waits in this worker over the last minute (for health checks)
+    checkout_wait = RollingWindow()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.DB_POOL_CHECKOUT_SECONDS.observe(waited)
+            server_timing.record("db-pool", waited)
+            self.checkout_wait.observe(waited)
+
+    def max_connections(self) -> int:
+        return self.size() + self._max_overflow
+
 # Connection pool configuration for production stability
 # Optimized for load testing: supports up to 50 concurrent connections
 # pool_size=20: Base connections always open (conservative)
@@ -18,12 +45,22 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+pg8000://shiva@l
 # pool_recycle=3600: Recycle connections after 1 hour (prevents stale connections)
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_size=20,
     max_overflow=30,
     pool_timeout=10,
     pool_recycle=3600,
     pool_pre_ping=True
 )
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.DB_POOL_CHECKED_OUT.inc()
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    metrics.DB_POOL_CHECKED_OUT.dec()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -33,4 +70,5 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
+        with server_timing.timed("db-close"):
+            db.close()
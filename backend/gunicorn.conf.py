@@ -1,9 +1,19 @@
 # Gunicorn Configuration for Production Deployment
 # Campus Eats Backend
 
+import glob
 import multiprocessing
 import os
 
+# Prometheus: workers write samples here and /metrics aggregates them.
+# Must be set before the app (and prometheus_client) is imported - preload_app imports it in the master.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/campuseats-metrics")
+# Prepared here, not in on_starting: preload_app imports the app before any server hook runs.
+# Samples from a previous run would be summed into the new one.
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+for stale in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+    os.remove(stale)
+
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048  # Number of pending connections
@@ -16,17 +26,17 @@ max_requests = 1000  # Restart worker after this many requests
 max_requests_jitter = 50  # Add randomness to prevent simultaneous restarts
 
 # Timeouts
-timeout = 120  # Worker timeout (important for slow bcrypt)
+timeout = 30  # Worker timeout (bcrypt runs in a dedicated process pool, off the event loop)
 keepalive = 5  # Keep-alive connections
 
 # Process naming
 proc_name = "campuseats"
 
 # Logging
-accesslog = "logs/access.log"
+# No gunicorn access log: the app writes one sampled, structured line per request (main.log_requests)
+accesslog = None
 errorlog = "logs/error.log"
 loglevel = "info"
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
 # Server mechanics
 daemon = False  # Run in foreground (use systemd/supervisor for background)
@@ -75,6 +85,11 @@ def worker_exit(server, worker):
     """Called just after a worker has been exited."""
     print(f"⚠️ Worker {worker.pid} exited")
 
+def child_exit(server, worker):
+    """Called in the master after a worker exits: drop its live gauges from /metrics."""
+    from services.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
 # Performance tuning
 preload_app = True  # Load app before forking workers (saves memory)
 
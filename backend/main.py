@@ -1,4 +1,5 @@
 import os
+import random
 import time
 from collections import defaultdict, deque
 from datetime import datetime
@@ -13,12 +14,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 import logging
+from core.logging_config import setup_logging, shutdown_logging, request_sample_rate
 from db import session as database
 from db import models
 from core import auth
-from routers import menu, orders, admin, health, payments, auth as auth_router, upload, events, branding, config
-from fastapi.staticfiles import StaticFiles
+from routers import menu, orders, admin, health, payments, auth as auth_router, upload, events, branding, config, metrics as metrics_router
 from middleware.rate_limit import RateLimitMiddleware
+from middleware.observability import ObservabilityMiddleware
+from services.static_assets import STATIC_DIR, CachedStaticFiles, precompress_directory, warm_hash_cache
+from services import tracing
 
 # Initialize Sentry for error monitoring
 import sentry_sdk
@@ -39,12 +43,10 @@ if sentry_dsn:
     )
 
 
-# Day 11: Configure Logging (Safe & Minimal)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Day 11: Configure Logging - structured JSON, written off the request path by a listener thread
+setup_logging()
 logger = logging.getLogger("main")
+access_logger = logging.getLogger("access")
 
 # Create tables
 models.Base.metadata.create_all(bind=database.engine)
@@ -74,7 +76,7 @@ app.add_middleware(
 # Redis-based Rate Limiting Middleware
 app.add_middleware(RateLimitMiddleware)
 
-# Day 11: Request Logging Middleware (Safe)
+# Day 11: Request Logging Middleware (Safe) - one structured line per request, sampled for successes
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     # Exclude /health from noise logs
@@ -82,23 +84,35 @@ async def log_requests(request: Request, call_next):
     if request.url.path.startswith("/health"): 
         return await call_next(request)
         
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000 # ms
-    
-    # Log: Method Path Status Duration IP
-    # NO HEADERS, NO BODY (Sensitive data safety)
+    status_code = 500
+    start_time = time.perf_counter()
     try:
-        status_emoji = "✅" if response.status_code < 400 else "⚠️" if response.status_code < 500 else "❌"
-        logger.info(
-            f"{status_emoji} {request.method} {request.url.path} "
-            f"- {response.status_code} "
-            f"- {process_time:.2f}ms - IP: {request.client.host}"
-        )
-    except Exception:
-        pass # Logging should never break request flow
-
-    return response
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        process_time = (time.perf_counter() - start_time) * 1000  # ms
+        # Errors and slow requests always, successes at ACCESS_LOG_SAMPLE_RATE
+        # NO HEADERS, NO BODY (Sensitive data safety)
+        sample_rate = request_sample_rate(status_code, process_time)
+        if sample_rate >= 1 or random.random() < sample_rate:
+            route = request.scope.get("route")
+            access_logger.info(
+                f"{request.method} {request.url.path} {status_code}",
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "route": getattr(route, "path", None),
+                    "status": status_code,
+                    "duration_ms": round(process_time, 2),
+                    "client_ip": request.client.host if request.client else None,
+                    "sample_rate": sample_rate,
+                },
+            )
+
+# Server-Timing, tracing, Prometheus request metrics and SQL profiling in one pure ASGI layer
+# (outermost, so Server-Timing total covers every middleware and rate-limited requests are counted)
+app.add_middleware(ObservabilityMiddleware)
 
 # Global Exception Handlers (Day 8 - Production Hardening)
 
@@ -155,12 +169,34 @@ async def startup_event():
     else:
         logger.warning("⚠️ Cloudinary: Not configured (Payment proof uploads disabled)")
     
+    # Watch this worker's event loop for blocking calls
+    from services.loop_watchdog import loop_watchdog, LOOP_WATCHDOG_ENABLED
+    if LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+        logger.info(f"✅ Loop watchdog: Reporting stalls over {loop_watchdog.threshold * 1000:.0f}ms")
+    
+    # Static assets: .gz siblings and content hashes, built off the event loop
+    from fastapi.concurrency import run_in_threadpool
+    await run_in_threadpool(precompress_directory, STATIC_DIR)
+    hashed = await run_in_threadpool(warm_hash_cache, STATIC_DIR)
+    logger.info(f"✅ Static assets: {hashed} files hashed for versioned URLs/ETags")
+    
     logger.info("=" * 60)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Campus Eats Backend Shutting Down")
+    from services.password_hasher import password_hasher
+    from services.event_hub import event_hub
+    from services.pubsub import publisher
+    from services.loop_watchdog import loop_watchdog
+    await loop_watchdog.stop()
+    password_hasher.shutdown()
+    publisher.flush()  # Batched events still waiting for the background flusher
+    await event_hub.stop()
+    tracing.shutdown_tracing()  # Flush queued spans
+    shutdown_logging()  # Flush queued log records
 
 # Routers
 app.include_router(menu.router)
@@ -172,11 +208,13 @@ app.include_router(upload.router) # Day 11: Image Uploads
 app.include_router(auth_router.router) # Day 12: JWT Auth
 app.include_router(events.router) # Redis: SSE Real-time Events
 app.include_router(branding.router) # Branding: Campus Logo & Name
+app.include_router(metrics_router.router) # Prometheus /metrics
 
 # Day 11: Mount Static Files (Safe Local Storage)
-import os
-os.makedirs("static/uploads", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+os.makedirs(os.path.join(STATIC_DIR, "uploads"), exist_ok=True)
+# Content-hash versioned assets: immutable caching, content ETags, precompressed .gz/.br variants
+# (.gz siblings and hashes are prepared in startup_event)
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 
 
 
@@ -0,0 +1,90 @@
+"""
+Request observability as one pure ASGI middleware.
+Server-Timing, tracing, Prometheus request metrics and SQL profiling all wrap
+every request; as four BaseHTTPMiddleware layers each request paid for four
+extra tasks and Response round trips. Here they share one scope and finish
+when the response starts (the point call_next used to return), so streaming
+responses (SSE) are measured to their first byte, as before.
+"""
+
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from services import metrics, server_timing, tracing
+from services.query_profiler import query_profiler
+
+
+def _route_path(scope) -> str:
+    # Route template, not the raw path (bounded label cardinality)
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class ObservabilityMiddleware:
+    """
+    Per request, outermost first:
+    - Server-Timing: per-phase latency breakdown, slow requests logged
+    - Tracing: sampled requests open a trace that SQL, pub/sub and realtime delivery extend
+    - Prometheus: per-route latency and in-flight requests (outside rate limiting, so rejections count too)
+    - SQL profiling: statements/DB time per request, slow statements and probable N+1 patterns
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        responded = False
+
+        metrics.HTTP_IN_PROGRESS.inc()
+        with server_timing.request_timing() as timing, \
+             tracing.request_span(method, path, Headers(scope=scope).get("traceparent")) as span, \
+             query_profiler.profile_request(scope) as queries:
+
+            def record_request(status_code: int) -> None:
+                nonlocal responded
+                responded = True
+                metrics.HTTP_IN_PROGRESS.dec()
+                metrics.HTTP_REQUEST_SECONDS.labels(method, _route_path(scope), str(status_code)).observe(
+                    time.perf_counter() - start_time
+                )
+
+            def response_started(status_code: int, headers: MutableHeaders) -> None:
+                record_request(status_code)
+                route = _route_path(scope)
+
+                query_profiler.record(queries)
+                if query_profiler.response_header:
+                    headers["X-DB-Queries"] = queries.header()
+
+                if span is not None:
+                    span.name = f"HTTP {method} {route}"
+                    span.attributes.update({"route": route, "status": status_code})
+                    span.finish()
+
+                timing.add("total", time.perf_counter() - start_time)
+                if server_timing.SERVER_TIMING_ENABLED:
+                    headers["Server-Timing"] = timing.header()
+                if server_timing.SERVER_TIMING_LOG_MS and timing.phases["total"] * 1000 >= server_timing.SERVER_TIMING_LOG_MS:
+                    server_timing.logger.warning(
+                        f"Slow request {method} {path}: {timing.header()}",
+                        extra={"route": getattr(scope.get("route"), "path", None), "timing_ms": timing.breakdown_ms()},
+                    )
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and not responded:
+                    response_started(message["status"], MutableHeaders(scope=message))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if not responded:
+                    # Raised before responding: ServerErrorMiddleware turns it into a 500
+                    record_request(500)
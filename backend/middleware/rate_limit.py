@@ -6,6 +6,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from jose import jwt, JWTError
 from typing import Optional
 from services.rate_limiter import check_rate_limit, check_global_rate_limit
+from services import metrics, server_timing
 from core import auth
 
 logger = logging.getLogger("middleware")
@@ -18,8 +19,13 @@ ENDPOINT_GROUPS = {
     ("GET", "/orders/"): "order_read",
     ("POST", "/menu/"): "menu_write",
     ("GET", "/menu/"): "menu_read",
+    # Admin payment review: must precede /payments/ (prefix match), not the student 3/min budget
+    ("POST", "/payments/verify"): "admin_write",
+    ("POST", "/payments/reject"): "admin_write",
+    ("POST", "/payments/reconcile"): "admin_write",
     ("POST", "/payments/"): "payment_submit",
     # Auth endpoints
+    ("POST", "/token/refresh"): "token_refresh",  # Must precede /token (prefix match)
     ("POST", "/token"): "auth",      # OAuth2PasswordRequestForm login
     ("POST", "/register"): "auth",   # User registration
 }
@@ -40,7 +46,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
         
         # Check global safety valve first
-        if not check_global_rate_limit():
+        with server_timing.timed("ratelimit"):
+            allowed = check_global_rate_limit()
+        if not allowed:
+            metrics.RATE_LIMIT_REJECTIONS.labels("global").inc()
             return JSONResponse(
                 status_code=503,
                 content={"detail": "Service temporarily unavailable. Please try again later."}
@@ -57,16 +66,19 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             auth_header = request.headers.get("Authorization", "")
             if auth_header.startswith("Bearer "):
                 token = auth_header.replace("Bearer ", "")
-                payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+                with server_timing.timed("jwt"):
+                    payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
                 user_id = payload.get("id")
         except JWTError:
             pass  # Unauthenticated request
         
         # Check per-user rate limit
         client_ip = request.client.host
-        allowed = check_rate_limit(user_id, client_ip, endpoint_group)
+        with server_timing.timed("ratelimit"):
+            allowed = check_rate_limit(user_id, client_ip, endpoint_group)
         
         if not allowed:
+            metrics.RATE_LIMIT_REJECTIONS.labels(endpoint_group).inc()
             return JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded. Please try again later."}
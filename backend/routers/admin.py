@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
+import asyncio
 from pydantic import BaseModel
 from db import models, schemas, session as database
 from core import dependencies
 from services.pubsub import publish_order_update
 from services.cache import get_cached, invalidate_cache
+from services.profiler import MAX_SECONDS, ProfilerBusy, sampling_profiler
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"],
+    route_class=TimedRoute,
 )
 
 class OrderStatusUpdate(BaseModel):
@@ -196,3 +201,31 @@ def verify_collection_otp(
         )
         
     return order
+
+
+# --- Live worker profiling ---
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    top: int = Query(30, ge=1, le=200),
+    include_idle: bool = False,
+    format: Literal["json", "collapsed"] = "json",
+    current_user: dict = Depends(dependencies.require_admin)
+):
+    """
+    Sample every thread of the worker that receives this request (event loop and
+    threadpool) for `seconds`. Returns collapsed stacks for a flame graph plus a
+    top-N summary; format=collapsed returns just the stacks as text
+    (pipe into flamegraph.pl / speedscope). The `pid` tells which worker answered.
+    """
+    try:
+        # Sampler runs in its own thread; the event loop keeps serving (and being sampled)
+        result = await asyncio.to_thread(sampling_profiler.profile, seconds, interval_ms, top, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"], headers={"X-Profile-Pid": str(result["pid"])})
+    return result
@@ -1,20 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
 from db import session as database
 from db import models
 from db import schemas
 from core import auth
+from services.refresh_tokens import (
+    RefreshTokenReused, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+)
 from datetime import timedelta
 import logging
+from services.server_timing import TimedRoute
 
 logger = logging.getLogger("auth")
 
 
 router = APIRouter(
-    tags=["Authentication"]
+    tags=["Authentication"],
+    route_class=TimedRoute,
 )
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+def _token_response(user_id: int, username: str, role: str, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": username, "role": role, "id": user_id},
+        expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "refresh_token": refresh_token,
+    }
+
 @router.post("/token")
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -32,21 +55,43 @@ async def login_for_access_token(
         )
         
     # 2. Verify password
-    if not auth.verify_password(form_data.password, user.hashed_password):
+    if not await auth.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 3. Create JWT
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.username, "role": user.role, "id": user.id},
-        expires_delta=access_token_expires
+    # 3. Create JWT + refresh token (new token family per login; Redis/DB write off the event loop)
+    refresh_token = await run_in_threadpool(issue_refresh_token, db, user.id, user.username, user.role)
+    return _token_response(user.id, user.username, user.role, refresh_token)
+
+@router.post("/token/refresh")
+def refresh_access_token(request: RefreshRequest, db: Session = Depends(database.get_db)):
+    """
+    Exchange a refresh token for a new access token + rotated refresh token.
+    One Redis lookup, no password hashing. Reusing a rotated token revokes the session.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    try:
+        session = rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenReused:
+        logger.warning("Refresh token reuse detected - session revoked")
+        raise invalid
+    if not session:
+        raise invalid
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(session["user_id"], session["username"], session["role"], session["refresh_token"])
+
+@router.post("/token/revoke")
+def revoke_token(request: RefreshRequest, db: Session = Depends(database.get_db)):
+    """Logout: revoke the refresh token's session (idempotent)"""
+    revoke_refresh_token(db, request.refresh_token)
+    return {"success": True}
 
 @router.post("/register", response_model=schemas.User)
 def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
@@ -55,8 +100,8 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_d
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    # Hash password
-    hashed_password = auth.get_password_hash(user.password)
+    # Hash password (on the dedicated hashing pool)
+    hashed_password = auth.hash_password_pooled(user.password)
     # SECURITY: Always set role to 'student' - never accept from user input
     db_user = models.User(
         username=user.username,
@@ -1,25 +1,63 @@
-from fastapi import APIRouter
+import hashlib
+import logging
+import os
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
+from services.static_assets import STATIC_DIR, asset_version
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/campus",
     tags=["branding"],
+    route_class=TimedRoute,
 )
 
+logger = logging.getLogger("branding")
+
+# Static configuration for Release (override per deployment via env)
+BRANDING = {
+    "name": os.getenv("CAMPUS_NAME", "Campus Eats University"),
+    "logo": os.getenv("CAMPUS_LOGO", "logo.png"),  # Relative to STATIC_DIR
+}
+
 class BrandingResponse(BaseModel):
     name: str
     logoUrl: str
+    version: str
 
-@router.get("/branding", response_model=BrandingResponse)
-async def get_branding():
+def get_branding_config() -> dict:
     """
-    Returns campus-specific branding information.
-    Static configuration for Release.
+    Versioned branding config.
+    The version is derived from the logo's content hash, so logoUrl (and the ETag)
+    only change when the logo file actually changes.
     """
-    import time
-    timestamp = int(time.time())
+    # Relative path to allow client to construct full URL based on its connection (LAN/Emulator)
+    logo_url = f"/static/{BRANDING['logo']}"
+    try:
+        logo_version = asset_version(os.path.join(STATIC_DIR, BRANDING["logo"]))
+        logo_url += f"?v={logo_version}"
+    except OSError as e:
+        # Missing/misnamed CAMPUS_LOGO must not take branding down: serve the unversioned URL
+        logger.warning(f"Branding logo not versioned: {e}")
+        logo_version = "unversioned"
+    version = hashlib.sha256(f"{BRANDING['name']}:{logo_version}".encode()).hexdigest()[:12]
     return {
-        "name": "Campus Eats University",
-        # Relative path to allow client to construct full URL based on its connection (LAN/Emulator)
-        "logoUrl": f"/static/logo.png?v={timestamp}" 
+        "name": BRANDING["name"],
+        "logoUrl": logo_url,
+        "version": version,
     }
+
+@router.get("/branding", response_model=BrandingResponse)
+def get_branding(request: Request, response: Response):
+    """
+    Returns campus-specific branding information.
+    Supports If-None-Match so clients can revalidate without re-downloading.
+    """
+    branding = get_branding_config()
+    etag = f'"{branding["version"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return branding
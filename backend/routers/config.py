@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 import subprocess
 import json
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/config",
     tags=["config"],
+    route_class=TimedRoute,
 )
 
 @router.get("/api-url")
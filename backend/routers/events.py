@@ -1,146 +1,387 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from services.redis import redis_client
-from core import dependencies
+from services import event_log, metrics, tracing
+from services.event_hub import HEARTBEAT, HEARTBEAT_INTERVAL, SlowConsumer, event_hub
+from services.user_sockets import TooManySockets, user_sockets
+from core import auth, dependencies
+import asyncio
+import json
 import logging
+import re
+import time
+from typing import Optional
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/events",
     tags=["events"],
+    route_class=TimedRoute,
 )
 
 logger = logging.getLogger("events")
 
+# All endpoints subscribe through the per-worker event hub:
+# one Redis connection per worker, regardless of how many clients are connected.
+
+# SSE: clients reconnect after this many ms; proxies must not buffer the stream
+SSE_RETRY_MS = 3000
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx: flush each event immediately
+}
+
+# Stream ID appended to live pub/sub payloads by the publisher (see pubsub.APPEND_AND_PUBLISH)
+_PAYLOAD_EVENT_ID = re.compile(r'"event_id":"(\d+-\d+)"}$')
+
+# Last-Event-ID replay reads at most this many pages from the event log before giving up
+MAX_REPLAY_PAGES = 4
+
+
+def _stream_key(event_id: str) -> tuple:
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq)
+
+
+def _read_missed(topic: str, last_event_id: str, user_id: Optional[int]) -> Optional[list]:
+    """
+    Events after a stream-ID cursor from the durable log, as (id, data) pairs.
+    None when they cannot all be replayed (log trimmed past the cursor, too many,
+    Redis down, bad cursor) - the client must resync.
+    """
+    missed = []
+    cursor = last_event_id
+    for _ in range(MAX_REPLAY_PAGES):
+        try:
+            result = event_log.read_events(topic, cursor, event_log.MAX_READ_COUNT, user_id=user_id)
+        except ValueError:
+            return None
+        if result is None or result["truncated"]:
+            return None
+        missed.extend(
+            (event["id"], json.dumps({**event["data"], "event_id": event["id"]}))
+            for event in result["events"]
+        )
+        if not result["has_more"]:
+            return missed
+        cursor = result["cursor"]
+    return None
+
+
+async def _sse_events(
+    channels: set,
+    last_event_id: Optional[str],
+    label: str,
+    topic: str,
+    user_id: Optional[int] = None,
+):
+    """
+    Async SSE stream from the hub: every event carries an id, idle streams get
+    comment heartbeats, and a Last-Event-ID reconnect replays what was missed.
+
+    Event ids are Redis Stream IDs, so a reconnect to any worker replays from the
+    durable event log. Payloads published without a stream ID (no Lua) fall back
+    to the hub's per-worker ids and its in-memory replay buffer.
+    """
+    from_log = event_log.is_stream_id(last_event_id)
+    hub_last_event_id = None if from_log else last_event_id
+    async with event_hub.subscription(channels, heartbeat=True, last_event_id=hub_last_event_id) as sub:
+        logger.info(f"{label} subscribed")
+        metrics.REALTIME_CONNECTIONS.labels("sse").inc()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            # Subscribed first, so nothing published during the log read is lost
+            replayed_up_to = None
+            if from_log:
+                missed = await run_in_threadpool(_read_missed, topic, last_event_id, user_id)
+                if missed is None:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    replayed_up_to = _stream_key(last_event_id)
+                    for event_id, data in missed:
+                        yield f"id: {event_id}\ndata: {data}\n\n"
+                        replayed_up_to = _stream_key(event_id)
+            elif last_event_id and not sub.replay_complete:
+                # Missed events are no longer buffered here - client must refetch
+                yield "event: resync\ndata: {}\n\n"
+            while True:
+                channel, data, event_id = await sub.get_event()
+                if channel == HEARTBEAT:
+                    yield f": keepalive {data}\n\n"
+                    continue
+                match = _PAYLOAD_EVENT_ID.search(data)
+                if match:
+                    event_id = match.group(1)
+                    if replayed_up_to and _stream_key(event_id) <= replayed_up_to:
+                        continue  # Already sent from the log
+                start = time.time()
+                yield f"id: {event_id}\ndata: {data}\n\n"
+                # Resumed once StreamingResponse has sent the frame
+                tracing.finish_delivery(data, "sse", start)
+        except SlowConsumer:
+            # End the stream: the client reconnects with Last-Event-ID (replay or resync)
+            logger.info(f"{label} evicted as a slow consumer")
+        finally:
+            metrics.REALTIME_CONNECTIONS.labels("sse").dec()
+            logger.info(f"{label} disconnected")
+
 @router.get("/orders/{user_id}")
 async def stream_order_updates(
     user_id: int,
-    current_user: dict = Depends(dependencies.get_current_active_user)
+    current_user: dict = Depends(dependencies.get_current_active_user),
+    last_event_id: Optional[str] = Header(None),
 ):
     """
     SSE endpoint for real-time order updates.
     Clients subscribe to receive order status changes in real-time.
     """
-    
+
     # Authorization: user can only subscribe to their own updates
     if current_user["id"] != user_id and current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Forbidden")
-    
+
     if not redis_client.is_available():
         raise HTTPException(
             status_code=503,
             detail="Real-time updates unavailable. Please use polling."
         )
-    
-    async def event_generator():
-        pubsub = redis_client.client.pubsub()
-        try:
-            pubsub.subscribe(f"order_updates:user:{user_id}")
-            logger.info(f"User {user_id} subscribed to order updates")
-            
-            for message in pubsub.listen():
-                if message['type'] == 'message':
-                    yield f"data: {message['data']}\n\n"
-        except GeneratorExit:
-            logger.info(f"User {user_id} disconnected from order updates")
-        finally:
-            pubsub.close()  # CRITICAL: Prevent resource leak
-    
+
     return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
+        _sse_events(
+            {f"order_updates:user:{user_id}"}, last_event_id, f"User {user_id} order updates",
+            topic="orders", user_id=user_id,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
     )
 
 @router.get("/menu")
-async def stream_menu_updates():
+async def stream_menu_updates(last_event_id: Optional[str] = Header(None)):
     """
     SSE endpoint for real-time menu updates.
     All clients can subscribe to menu availability changes.
     """
-    
+
     if not redis_client.is_available():
         raise HTTPException(
             status_code=503,
             detail="Real-time updates unavailable."
         )
-    
-    async def event_generator():
-        pubsub = redis_client.client.pubsub()
-        try:
-            pubsub.subscribe("menu_updates")
-            logger.info("Client subscribed to menu updates")
-            
-            for message in pubsub.listen():
-                if message['type'] == 'message':
-                    yield f"data: {message['data']}\n\n"
-        except GeneratorExit:
-            logger.info("Client disconnected from menu updates")
-        finally:
-            pubsub.close()
-    
+
     return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
+        _sse_events({"menu_updates"}, last_event_id, "Menu updates client", topic="menu"),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
     )
 
-from fastapi import WebSocket, WebSocketDisconnect
-import asyncio
-import json
+@router.get("/log/{topic}")
+async def read_event_log(
+    topic: str,
+    after: str = Query("0", description="Last stream ID the client has seen"),
+    limit: int = Query(100, ge=1, le=event_log.MAX_READ_COUNT),
+    current_user: dict = Depends(dependencies.get_current_active_user),
+):
+    """
+    Resync from the durable event log: events after a cursor, in one range read.
+    Students only see their own order events.
+    """
+    if topic not in event_log.TOPICS:
+        raise HTTPException(status_code=404, detail="Unknown topic")
+
+    user_id = current_user["id"] if topic == "orders" and current_user["role"] != "admin" else None
+    try:
+        result = event_log.read_events(topic, after, limit, user_id=user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if result is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Event log unavailable. Please refetch."
+        )
+    return result
+
+WS_EVENT_TYPES = {
+    "shop_status": "SHOP_STATUS",
+    "menu_updates": "MENU_UPDATE",
+}
+
+def _ws_payload(channel: str, data: str) -> dict:
+    """Wrap a pub/sub message with a type field for the client to distinguish"""
+    try:
+        json_data = json.loads(data)
+    except json.JSONDecodeError:
+        return {"type": "RAW", "channel": channel, "data": data}
+    if channel.startswith("order_updates:"):
+        return {"type": "ORDER_UPDATE", "payload": json_data}
+    return {"type": WS_EVENT_TYPES.get(channel, "UNKNOWN"), "payload": json_data}
+
+# Clients that answer PINGs with PONGs must keep doing so (older clients never answer
+# and rely on protocol-level pings instead)
+KEEPALIVE_TIMEOUT = HEARTBEAT_INTERVAL * 2 + 5
+# A client that stops reading blocks its send once the socket buffers are full
+SEND_TIMEOUT = 10
+
+async def _serve_socket(websocket: WebSocket, sub, on_message=None, transport: str = "websocket"):
+    """
+    Event-driven socket loop: one task awaits the hub subscription, one awaits client frames.
+    No polling and no per-connection timers - keepalive PINGs come from the hub's shared tick.
+    Returns (or raises WebSocketDisconnect) as soon as either side ends.
+    """
+    last_pong = None
+
+    async def send(message: dict):
+        await asyncio.wait_for(websocket.send_json(message), SEND_TIMEOUT)
+
+    async def sender():
+        while True:
+            try:
+                channel, data = await sub.get()
+            except SlowConsumer:
+                logger.info("WebSocket evicted as a slow consumer")
+                await websocket.close(code=1013, reason="Too slow, reconnect")
+                return
+            if channel == HEARTBEAT:
+                if last_pong is not None and time.monotonic() - last_pong > KEEPALIVE_TIMEOUT:
+                    logger.info("WebSocket keepalive timeout")
+                    await websocket.close(code=1001, reason="Keepalive timeout")
+                    return
+                await send({"type": "PING", "ts": int(data)})
+            else:
+                start = time.time()
+                await send(_ws_payload(channel, data))
+                tracing.finish_delivery(data, transport, start)
+
+    async def receiver():
+        nonlocal last_pong
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except json.JSONDecodeError:
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            if kind == "PONG":
+                last_pong = time.monotonic()
+            elif kind == "PING":
+                await send({"type": "PONG", "ts": int(time.time())})
+            elif on_message is not None:
+                await on_message(message)
+
+    tasks = [asyncio.create_task(sender()), asyncio.create_task(receiver())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        task.result()  # Propagate WebSocketDisconnect / send errors
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    
+
     if not redis_client.is_available():
         await websocket.close(code=1011, reason="Redis unavailable")
         return
 
-    pubsub = redis_client.client.pubsub()
     try:
         # Subscribe to relevant global channels
-        pubsub.subscribe("shop_status", "menu_updates")
-        logger.info("WebSocket connected and subscribed to global updates")
-        
-        while True:
-            # Non-blocking check for messages
-            message = pubsub.get_message(ignore_subscribe_messages=True)
-            
-            if message:
-                try:
-                    # Check if websocket is still connected before sending
-                    if websocket.client_state.name != "CONNECTED":
-                        logger.info("WebSocket client disconnected, breaking loop")
-                        break
-                        
-                    # Redis returns bytes or string, ensure we send JSON string
-                    data = message['data']
-                    if isinstance(data, bytes):
-                        data = data.decode('utf-8')
-                        
-                    # Construct valid JSON payload
-                    # Check if data is already JSON, otherwise wrap it
-                    try:
-                        json_data = json.loads(data)
-                        # Ensure it has a type field for the client to distinguish
-                        if message['channel'] == "shop_status":
-                            payload = {"type": "SHOP_STATUS", "payload": json_data}
-                        elif message['channel'] == "menu_updates":
-                            payload = {"type": "MENU_UPDATE", "payload": json_data}
-                        else:
-                            payload = {"type": "UNKNOWN", "payload": json_data}
-                    except json.JSONDecodeError:
-                        payload = {"type": "RAW", "channel": message['channel'], "data": data}
-
-                    await websocket.send_json(payload)
-                except Exception as e:
-                    logger.warning(f"Error sending WebSocket message: {e}")
-                    break  # Exit loop on send error
-            
-            # Prevent busy loop
-            await asyncio.sleep(0.1)
-            
+        async with event_hub.subscription({"shop_status", "menu_updates"}, heartbeat=True) as sub:
+            logger.info("WebSocket connected and subscribed to global updates")
+            with metrics.REALTIME_CONNECTIONS.labels("websocket").track_inprogress():
+                await _serve_socket(websocket, sub)
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
+    except asyncio.TimeoutError:
+        logger.info("WebSocket send timed out (client stopped reading)")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-    finally:
-        pubsub.close()
+
+# Multiplexed per-user socket: topic -> hub channel for the authenticated user
+USER_TOPICS = {
+    "menu": lambda user: "menu_updates",
+    "shop": lambda user: "shop_status",
+    "orders": lambda user: f"order_updates:user:{user['id']}",
+}
+AUTH_TIMEOUT = 5
+
+async def _authenticate_socket(websocket: WebSocket) -> Optional[dict]:
+    """Bearer header, or an {"type": "AUTH", "token": ...} first frame (browsers can't set headers)"""
+    token = None
+    header = websocket.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    else:
+        try:
+            message = json.loads(await asyncio.wait_for(websocket.receive_text(), AUTH_TIMEOUT))
+            if isinstance(message, dict) and message.get("type") == "AUTH":
+                token = message.get("token")
+        except (asyncio.TimeoutError, json.JSONDecodeError):
+            pass
+    if not token:
+        return None
+    try:
+        return await auth.get_current_user(token)
+    except HTTPException:
+        return None
+
+@router.websocket("/ws/user")
+async def user_websocket_endpoint(websocket: WebSocket):
+    """
+    One authenticated socket per device carrying every topic the user is entitled to
+    (menu, shop, own orders). Starts subscribed to all; the client can narrow it with
+    {"type": "SUBSCRIBE" | "UNSUBSCRIBE", "topics": [...]}.
+    """
+    await websocket.accept()
+
+    try:
+        user = await _authenticate_socket(websocket)
+        if user is None:
+            await websocket.close(code=1008, reason="Authentication required")
+            return
+
+        if not redis_client.is_available():
+            await websocket.close(code=1011, reason="Redis unavailable")
+            return
+
+        topics = set(USER_TOPICS)
+
+        def channels():
+            return {USER_TOPICS[topic](user) for topic in topics}
+
+        async with event_hub.subscription(channels(), heartbeat=True) as sub:
+            with user_sockets.registered(user["id"], sub):
+                logger.info(f"User {user['id']} WebSocket connected")
+                await websocket.send_json({"type": "SUBSCRIBED", "topics": sorted(topics)})
+
+                async def on_message(message: dict):
+                    kind = message.get("type")
+                    if kind not in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                        return
+                    requested = message.get("topics")
+                    if not isinstance(requested, list) or not all(t in USER_TOPICS for t in requested):
+                        await websocket.send_json({
+                            "type": "ERROR",
+                            "detail": f"topics must be a list of: {', '.join(USER_TOPICS)}",
+                        })
+                        return
+                    if kind == "SUBSCRIBE":
+                        topics.update(requested)
+                    else:
+                        topics.difference_update(requested)
+                    event_hub.set_channels(sub, channels())
+                    await websocket.send_json({"type": "SUBSCRIBED", "topics": sorted(topics)})
+
+                with metrics.REALTIME_CONNECTIONS.labels("user_websocket").track_inprogress():
+                    await _serve_socket(websocket, sub, on_message, "user_websocket")
+    except TooManySockets:
+        await websocket.close(code=1008, reason="Too many connections for this user")
+    except WebSocketDisconnect:
+        logger.info("User WebSocket disconnected")
+    except asyncio.TimeoutError:
+        logger.info("User WebSocket send timed out (client stopped reading)")
+    except Exception as e:
+        logger.error(f"User WebSocket error: {e}")
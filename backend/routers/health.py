@@ -1,15 +1,32 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from db import session as database
+from services.password_hasher import password_hasher
+from services.event_hub import event_hub
+from services.user_sockets import user_sockets
+from services.query_profiler import query_profiler
+from services.loop_watchdog import loop_watchdog
+from services.redis import redis_client
+from core.logging_config import logging_stats
+import anyio.to_thread
+import asyncio
 import os
 import time
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/health",
-    tags=["Health"]
+    tags=["Health"],
+    route_class=TimedRoute,
 )
 
+# /health/ready reports 503 past any of these (per worker, last minute)
+HEALTH_MAX_POOL_WAIT_MS = float(os.getenv("HEALTH_MAX_POOL_WAIT_MS", 500))
+HEALTH_MAX_THREADPOOL_UTILIZATION = float(os.getenv("HEALTH_MAX_THREADPOOL_UTILIZATION", 0.95))
+HEALTH_MAX_LOOP_LAG_MS = float(os.getenv("HEALTH_MAX_LOOP_LAG_MS", 250))
+
 @router.get("/", status_code=status.HTTP_200_OK)
 def health_check(db: Session = Depends(database.get_db)):
     """
@@ -42,24 +59,83 @@ def health_check(db: Session = Depends(database.get_db)):
     
     return health_status
 
+def _threadpool_stats() -> dict:
+    """AnyIO worker threads (sync routes + dependencies); call from the event loop"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    busy = limiter.borrowed_tokens
+    return {
+        "size": limiter.total_tokens,
+        "busy": busy,
+        "waiting": limiter.statistics().tasks_waiting,
+        "utilization": round(busy / limiter.total_tokens, 3),
+    }
+
+
+def _saturation(pool, pool_wait: dict, threadpool: dict, loop_lag: dict) -> list:
+    """Reasons this worker should be taken out of rotation (empty = healthy)"""
+    reasons = []
+    if pool.checkedout() >= pool.max_connections() or (
+        pool_wait["p99"] is not None and pool_wait["p99"] > HEALTH_MAX_POOL_WAIT_MS
+    ):
+        reasons.append("db_pool")
+    if threadpool["utilization"] >= HEALTH_MAX_THREADPOOL_UTILIZATION:
+        reasons.append("threadpool")
+    if loop_lag["p99"] is not None and loop_lag["p99"] > HEALTH_MAX_LOOP_LAG_MS:
+        reasons.append("event_loop")
+    return reasons
+
+
+@router.api_route("/ready", methods=["GET", "HEAD"])
+async def readiness():
+    """
+    Load balancer check for this worker: 200 when it can take traffic, 503 when
+    saturated. Runs on the event loop from in-memory counters only (no DB, no
+    Redis, no worker thread), so it still answers while the pools are exhausted.
+    """
+    pool = database.engine.pool
+    reasons = _saturation(
+        pool, pool.checkout_wait.percentiles(), _threadpool_stats(), loop_watchdog.lag.percentiles()
+    )
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE if reasons else status.HTTP_200_OK,
+        content={"status": "saturated" if reasons else "ok", "reasons": reasons, "pid": os.getpid()},
+    )
+
+
 @router.get("/detailed")
-def detailed_health(db: Session = Depends(database.get_db)):
+async def detailed_health():
     """
     Detailed system health - use for monitoring dashboards
-    Shows database connection pool statistics for load test monitoring
+    Shows database connection pool statistics for load test monitoring.
+    Everything is per worker (the one that answered); rolling figures cover the last minute.
     """
-    engine = db.get_bind()
-    pool = engine.pool
+    pool = database.engine.pool
+    max_connections = pool.max_connections()
+    pool_wait = pool.checkout_wait.percentiles()
+    threadpool = _threadpool_stats()
+    event_loop = loop_watchdog.stats()
+    reasons = _saturation(pool, pool_wait, threadpool, event_loop["lag_ms"])
     
     return {
-        "status": "healthy",
+        "status": "saturated" if reasons else "healthy",
+        "saturation_reasons": reasons,
+        "pid": os.getpid(),
         "database": {
             "pool_size": pool.size(),
             "checked_in": pool.checkedin(),
             "checked_out": pool.checkedout(),
             "overflow": pool.overflow(),
             "total_connections": pool.size() + pool.overflow(),
-            "max_connections": pool.size() + 30  # pool_size + max_overflow
+            "max_connections": max_connections,
+            "utilization": round(pool.checkedout() / max_connections, 3),
+            "checkout_wait_ms": pool_wait,
         },
+        "threadpool": threadpool,
+        "event_loop": event_loop,
+        "redis": await asyncio.to_thread(redis_client.stats, True),  # Live PING off the loop
+        "queries": query_profiler.stats(),
+        "password_hashing": password_hasher.stats(),
+        "logging": logging_stats(),
+        "realtime": {**event_hub.stats(), "user_sockets": user_sockets.stats()},
         "timestamp": time.time()
     }
@@ -5,10 +5,12 @@ from db import models, schemas, session as database
 from core import auth, dependencies
 from services.cache import get_cached, invalidate_cache, menu_cache
 from services.pubsub import publish_menu_update
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/menu",
     tags=["menu"],
+    route_class=TimedRoute,
 )
 
 @router.get("/", response_model=List[schemas.MenuItem])
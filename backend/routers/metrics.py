@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, Response
+from services import metrics
+from services.server_timing import TimedRoute
+
+router = APIRouter(
+    tags=["metrics"],
+    route_class=TimedRoute,
+)
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint.
+    Aggregates every gunicorn worker (PROMETHEUS_MULTIPROC_DIR), unlike
+    /health/detailed which only reports the worker that answered.
+    """
+    body, content_type = metrics.render()
+    if body is None:
+        raise HTTPException(status_code=503, detail="Metrics unavailable (prometheus_client not installed)")
+    return Response(content=body, media_type=content_type)
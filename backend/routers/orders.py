@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from db import models, schemas, session as database
 from core import auth, dependencies
+from services.event_hub import event_hub
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/orders",
     tags=["orders"],
+    route_class=TimedRoute,
 )
 
 @router.post("/", response_model=schemas.Order)
@@ -115,12 +121,15 @@ def get_my_orders(
     return db.query(models.Order).filter(models.Order.user_id == current_user["id"]).order_by(models.Order.created_at.desc()).all()
 
 
-@router.get("/{order_id}", response_model=schemas.Order)
-def get_order(
-    order_id: int, 
-    db: Session = Depends(database.get_db),
-    current_user: dict = Depends(dependencies.get_current_active_user)
-):
+# Long-poll mode: clients that can't hold a socket park the request until the status changes
+LONG_POLL_MAX_WAIT = 60
+# While the event hub is disconnected, parked requests re-check the DB at the old poll rate
+LONG_POLL_RECHECK_SECONDS = 5
+
+def _load_order(db: Session, order_id: int, current_user: dict, fresh: bool = False) -> schemas.Order:
+    """Fetch + authorize + serialize (runs in the threadpool: no lazy loads on the event loop)"""
+    if fresh:
+        db.expire_all()
     order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -129,5 +138,49 @@ def get_order(
     if current_user["role"] != "admin" and order.user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to view this order")
     
+    result = schemas.Order.model_validate(order, from_attributes=True)
+    # End the read transaction so a parked long-poll doesn't pin a pooled connection for the whole wait
+    db.commit()
+    return result
+
+def _event_status(data: str) -> Optional[str]:
+    try:
+        return json.loads(data).get("status")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+@router.get("/{order_id}", response_model=schemas.Order)
+async def get_order(
+    order_id: int, 
+    wait: int = Query(0, ge=0, le=LONG_POLL_MAX_WAIT, description="Seconds to wait for a status change"),
+    known_status: Optional[str] = Query(None, description="Status the client already has"),
+    db: Session = Depends(database.get_db),
+    current_user: dict = Depends(dependencies.get_current_active_user)
+):
+    """
+    Get one order. With ?wait=30&known_status=Preparing the response is held until the
+    status differs from known_status or the wait expires (then the current order is returned).
+    """
+    if not wait or not known_status:
+        return await run_in_threadpool(_load_order, db, order_id, current_user)
+
+    # Subscribe before reading so a change between the read and the wait is not missed
+    async with event_hub.subscription({f"order_updates:{order_id}"}) as sub:
+        order = await run_in_threadpool(_load_order, db, order_id, current_user)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while order.status == known_status:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            timeout = remaining if event_hub.connected else min(remaining, LONG_POLL_RECHECK_SECONDS)
+            try:
+                _, data = await asyncio.wait_for(sub.get(), timeout)
+                if _event_status(data) == known_status:
+                    continue
+            except asyncio.TimeoutError:
+                if event_hub.connected:
+                    break  # No event for the whole wait: status is unchanged
+            order = await run_in_threadpool(_load_order, db, order_id, current_user, True)
     return order
 
@@ -1,14 +1,20 @@
+import io
 import secrets
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from db import models, session as database
 from core import dependencies
 from core.config import upload_payment_proof, generate_signed_url
+from services.pubsub import publish_order_update, publisher
+from services.reconciliation import StatementFormatError, iter_statement_rows, reconcile
+from services.server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/payments",
     tags=["payments"],
+    route_class=TimedRoute,
 )
 
 class PaymentSubmit(BaseModel):
@@ -62,6 +68,17 @@ def submit_payment(
     db.commit()
     return {"message": "Payment submitted for verification", "status": order.status}
 
+def _mark_verified(order: models.Order, verified_by: str) -> str:
+    """Apply the Pending_Verification -> Paid transition. Caller commits."""
+    # Generate cryptographically secure 6-digit OTP
+    otp = ''.join(secrets.choice('0123456789') for _ in range(6))
+    
+    order.status = "Paid"
+    order.otp = otp
+    order.verified_by = verified_by
+    order.payment_submitted = True # Confirm flag
+    return otp
+
 @router.post("/verify")
 def verify_payment(
     verification: PaymentVerify, 
@@ -77,16 +94,11 @@ def verify_payment(
         # Allow re-verification if needed? No, strict flow.
         raise HTTPException(status_code=400, detail=f"Order is not pending verification (Current: {order.status})")
 
-    # Generate cryptographically secure 6-digit OTP
-    otp = ''.join(secrets.choice('0123456789') for _ in range(6))
-    
-    order.status = "Paid"
-    order.otp = otp
-    order.verified_by = verification.verified_by
-    order.payment_submitted = True # Confirm flag
+    otp = _mark_verified(order, verification.verified_by)
     
     db.commit()
     db.refresh(order)
+    publish_order_update(order.id, order.user_id, order.status)
     return {
         "success": True, 
         "message": "Payment verified", 
@@ -114,9 +126,72 @@ def reject_payment(
     # Actually ui check status.
     
     db.commit()
+    publish_order_update(order.id, order.user_id, order.status)
     return {"success": True, "message": "Payment rejected", "status": order.status}
 
 
+@router.post("/reconcile")
+def reconcile_bank_statement(
+    file: UploadFile = File(...),
+    utr_column: Optional[str] = None,
+    amount_column: Optional[str] = None,
+    dry_run: bool = False,
+    db: Session = Depends(database.get_db),
+    current_user: dict = Depends(dependencies.require_admin)
+):
+    """
+    Admin uploads a bank statement CSV -> exact UTR + amount matches are verified in bulk.
+    Mismatches are reported for manual review (same rules as /payments/verify).
+    """
+    pending_orders = db.query(models.Order).filter(
+        models.Order.status == "Pending_Verification"
+    ).all()
+
+    # Stream the spooled upload instead of reading it into memory
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        report = reconcile(
+            iter_statement_rows(stream, utr_column=utr_column, amount_column=amount_column),
+            pending_orders
+        )
+    except StatementFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        stream.detach()  # Leave closing the upload to FastAPI
+
+    matches = report.pop("matches")
+    verified = []
+    if not dry_run:
+        # Re-read the matches under a row lock: an order verified or rejected since the
+        # statement was parsed keeps that decision instead of being overwritten
+        matched_ids = [order.id for order in matches]
+        locked = db.query(models.Order).filter(
+            models.Order.id.in_(matched_ids),
+            models.Order.status == "Pending_Verification"
+        ).with_for_update().populate_existing().all() if matched_ids else []
+        still_pending = {order.id for order in locked}
+        report["changed_during_reconciliation"] = [i for i in matched_ids if i not in still_pending]
+        matches = [order for order in matches if order.id in still_pending]
+        for order in matches:
+            otp = _mark_verified(order, current_user["username"])
+            verified.append({"order_id": order.id, "amount": order.total_amount, "otp": otp})
+        db.commit()
+        # One Redis round trip for the whole statement, not two per order
+        with publisher.batch():
+            for order in matches:
+                publish_order_update(order.id, order.user_id, "Paid")
+    else:
+        verified = [{"order_id": order.id, "amount": order.total_amount} for order in matches]
+
+    return {
+        "success": True,
+        "dry_run": dry_run,
+        "verified_count": len(verified),
+        "verified": verified,
+        **report
+    }
+
+
 # NEW: Cloudinary Payment Proof Endpoints
 
 @router.post("/upload-proof")
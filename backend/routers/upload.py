@@ -1,16 +1,20 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-import shutil
+from fastapi.concurrency import run_in_threadpool
 import os
-import uuid
-from typing import List
+import logging
+from services.media import FileTooLarge, store_stream, generate_variants
+from services.server_timing import TimedRoute
+from services.static_assets import STATIC_DIR
 
 router = APIRouter(
     prefix="/upload",
-    tags=["upload"]
+    tags=["upload"],
+    route_class=TimedRoute,
 )
 
-UPLOAD_DIR = "static/uploads"
+logger = logging.getLogger("upload")
+
+UPLOAD_DIR = os.path.join(STATIC_DIR, "uploads")
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
@@ -21,38 +25,39 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 async def upload_image(file: UploadFile = File(...)):
     """
     Upload an image file (Day 11: Phase 3 Foundation).
-    Saves to local storage (production-safe for this scale).
+    Streams to local storage under the content's SHA-256 (identical uploads share one file)
+    and generates WebP display/thumbnail variants off the event loop.
     """
     # 1. Validate File Extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(file.filename or "")[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Invalid file type. Only JPG, PNG, WEBP allowed.")
+    if file_ext == ".jpeg":
+        file_ext = ".jpg"  # One canonical name per content hash
 
-    # 2. Validate File Size (enforce MAX_FILE_SIZE limit)
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024 // 1024}MB.")
-    await file.seek(0)  # Reset file pointer for saving
-
-    # 3. Generate Secure Filename
-    secure_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, secure_filename)
-
-    # 4. Save File
+    # 2. Stream to disk in chunks, enforcing MAX_FILE_SIZE mid-stream and hashing as we go
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        filename, size, deduplicated = await run_in_threadpool(
+            store_stream, file.file, UPLOAD_DIR, file_ext, MAX_FILE_SIZE
+        )
+    except FileTooLarge:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024 // 1024}MB.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
-    # 5. Return Public URL
-    # Assuming app is running at root, static mounted at /static
-    # In production, this domain should be configured via env vars.
-    # For now, we return a relative path or full path based on request not available easily here without Request object.
+    # 3. Generate resized WebP variants (CPU bound - keep it off the event loop)
+    variants = await run_in_threadpool(generate_variants, UPLOAD_DIR, filename)
+    logger.info(f"Stored upload {filename} ({size} bytes, deduplicated={deduplicated})")
+
+    # 4. Return Public URL
     # Returning clean relative path is safest for Client to prepend base URL.
-    
+    # Content-addressed names are served with immutable cache headers.
     return {
-        "url": f"/static/uploads/{secure_filename}",
-        "filename": secure_filename,
+        "url": f"/static/uploads/{filename}",
+        "filename": filename,
+        "sha256": os.path.splitext(filename)[0],
+        "size": size,
+        "deduplicated": deduplicated,
+        "variants": {name: f"/static/uploads/{variant}" for name, variant in variants.items()},
         "success": True
     }
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Bulk Student Provisioning for Campus Eats
+Reads a roster CSV, bcrypt-hashes passwords on a process pool across all cores
+and bulk-loads users (Postgres COPY, or batched multi-row INSERT ... ON CONFLICT DO NOTHING).
+
+Roster columns: username (required), email, full_name, password (optional)
+
+Usage:
+    python3 scripts/provision_students.py roster.csv --default-password 'Welcome@123'
+    python3 scripts/provision_students.py roster.csv --generate-passwords --credentials-out creds.csv
+"""
+import argparse
+import csv
+import io
+import os
+import secrets
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, IO, Iterable, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from db import models
+from services.password_hasher import pwd_context
+
+USER_COLUMNS = ("username", "email", "full_name", "hashed_password", "role", "is_active")
+
+
+def _hash_password(password: str) -> str:
+    """Executed in worker processes (must be top-level / picklable)"""
+    return pwd_context.hash(password)
+
+
+def read_roster(
+    path: str,
+    default_password: Optional[str] = None,
+    generate_passwords: bool = False,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Parse and validate the roster.
+
+    Returns:
+        (students, skipped) - rows repeating an earlier username or email are not
+        provisioned but listed in skipped as {"line", "username", "reason"}
+    """
+    students, skipped = [], []
+    seen_usernames, seen_emails = set(), set()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or "username" not in [c.strip().lower() for c in reader.fieldnames]:
+            raise ValueError("Roster must have a 'username' column")
+
+        for row in reader:
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            username = row.get("username")
+            email = row.get("email") or None
+            if not username:
+                continue
+            if username in seen_usernames or (email and email in seen_emails):
+                reason = "duplicate username" if username in seen_usernames else f"duplicate email {email}"
+                skipped.append({"line": reader.line_num, "username": username, "reason": reason})
+                continue
+
+            password = row.get("password") or default_password
+            if not password and generate_passwords:
+                password = secrets.token_urlsafe(9)
+            if not password:
+                raise ValueError(f"No password for '{username}' (use --default-password or --generate-passwords)")
+            if len(password) < 8:
+                raise ValueError(f"Password for '{username}' is shorter than 8 characters")
+
+            seen_usernames.add(username)
+            if email:
+                seen_emails.add(email)
+            students.append({
+                "username": username,
+                "email": email,
+                "full_name": row.get("full_name") or None,
+                "password": password,
+            })
+    return students, skipped
+
+
+def hash_passwords(passwords: List[str], workers: int) -> List[str]:
+    """bcrypt is CPU bound - fan out across processes, chunked to amortize IPC"""
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_password, passwords, chunksize=chunksize))
+
+
+def _copy_rows(rows: Iterable[dict]) -> io.StringIO:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in USER_COLUMNS])
+    buf.seek(0)
+    return buf
+
+
+def copy_users(engine: Engine, rows: List[dict]) -> List[str]:
+    """
+    Postgres fast path: COPY into a temp table, then one INSERT ... SELECT with conflict handling.
+    Returns the usernames actually inserted (rows hitting a username/email conflict are not).
+    """
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(
+            "CREATE TEMP TABLE provision_users "
+            "(username text, email text, full_name text, hashed_password text, role text, is_active boolean) "
+            "ON COMMIT DROP"
+        )
+        copy_sql = f"COPY provision_users ({', '.join(USER_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        data = _copy_rows(rows)
+        if engine.dialect.driver == "psycopg2":
+            cursor.copy_expert(copy_sql, data)
+        else:  # pg8000
+            cursor.execute(copy_sql, stream=data)
+
+        cursor.execute(
+            f"INSERT INTO users ({', '.join(USER_COLUMNS)}) "
+            f"SELECT username, NULLIF(email, ''), NULLIF(full_name, ''), hashed_password, role, is_active "
+            f"FROM provision_users ON CONFLICT DO NOTHING RETURNING username"
+        )
+        inserted = [row[0] for row in cursor.fetchall()]
+        raw.commit()
+        return inserted
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def insert_users(engine: Engine, rows: List[dict], batch_size: int) -> List[str]:
+    """
+    Portable path: batched multi-row INSERT, skipping usernames/emails that already exist.
+    Returns the usernames actually inserted.
+    """
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    inserted = []
+    with engine.begin() as conn:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if dialect_insert is not None:
+                stmt = dialect_insert(models.User).values(batch).on_conflict_do_nothing()
+                inserted.extend(conn.execute(stmt.returning(models.User.username)).scalars())
+            else:
+                usernames = [r["username"] for r in batch]
+                existing = set(conn.execute(
+                    select(models.User.username).where(models.User.username.in_(usernames))
+                ).scalars())
+                batch = [r for r in batch if r["username"] not in existing]
+                if not batch:
+                    continue
+                conn.execute(insert(models.User).values(batch))  # No ON CONFLICT: a taken email raises
+                inserted.extend(r["username"] for r in batch)
+    return inserted
+
+
+def existing_usernames(engine: Engine, usernames: List[str], batch_size: int = 1000) -> set:
+    """Usernames already in the database - skipped before hashing (re-runs cost no bcrypt)"""
+    existing = set()
+    with engine.connect() as conn:
+        for start in range(0, len(usernames), batch_size):
+            batch = usernames[start:start + batch_size]
+            existing.update(conn.execute(
+                select(models.User.username).where(models.User.username.in_(batch))
+            ).scalars())
+    return existing
+
+
+def provision(
+    engine: Engine,
+    students: List[Dict[str, str]],
+    workers: int,
+    method: str = "auto",
+    batch_size: int = 1000,
+) -> dict:
+    """Hash + load a parsed roster. Returns a throughput report."""
+    started = time.perf_counter()
+    total = len(students)
+    already = existing_usernames(engine, [s["username"] for s in students])
+    students = [s for s in students if s["username"] not in already]
+    hashes = hash_passwords([s["password"] for s in students], workers) if students else []
+    hashed_at = time.perf_counter()
+
+    rows = [
+        {
+            "username": s["username"],
+            "email": s["email"],
+            "full_name": s["full_name"],
+            "hashed_password": h,
+            "role": "student",  # SECURITY: roster can never create admins
+            "is_active": True,
+        }
+        for s, h in zip(students, hashes)
+    ]
+
+    use_copy = method == "copy" or (
+        method == "auto" and engine.dialect.name == "postgresql" and engine.dialect.driver in ("psycopg2", "pg8000")
+    )
+    if not rows:
+        inserted = []
+    else:
+        inserted = copy_users(engine, rows) if use_copy else insert_users(engine, rows, batch_size)
+    finished = time.perf_counter()
+    inserted_set = set(inserted)
+
+    hash_seconds = hashed_at - started
+    load_seconds = finished - hashed_at
+    return {
+        "students": total,
+        "inserted": len(inserted),
+        "skipped_existing": len(already),
+        # Hashed but not inserted: email already taken (or the username appeared meanwhile)
+        "conflicts": [s["username"] for s in students if s["username"] not in inserted_set],
+        "method": "copy" if use_copy else "batched_insert",
+        "workers": workers,
+        "hash_seconds": round(hash_seconds, 2),
+        "hashes_per_second": round(len(students) / hash_seconds, 1) if students and hash_seconds else None,
+        "load_seconds": round(load_seconds, 2),
+        "rows_per_second": round(len(rows) / load_seconds, 1) if load_seconds else None,
+        "total_seconds": round(finished - started, 2),
+        "provisioned": inserted,
+    }
+
+
+def open_credentials_file(path: str) -> IO[str]:
+    """Create the credentials file owner-only from the start; never overwrite an existing one"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    return os.fdopen(fd, "w", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-provision student accounts from a roster CSV")
+    parser.add_argument("roster", help="CSV with username[,email,full_name,password]")
+    parser.add_argument("--default-password", help="Password for rows without a password column value")
+    parser.add_argument("--generate-passwords", action="store_true", help="Generate random passwords for rows without one")
+    parser.add_argument("--credentials-out", help="Write username,password CSV (required with --generate-passwords)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes (default: all cores)")
+    parser.add_argument("--method", choices=("auto", "copy", "insert"), default="auto")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Validate the roster only")
+    args = parser.parse_args()
+
+    if args.generate_passwords and not args.credentials_out:
+        parser.error("--generate-passwords requires --credentials-out")
+
+    students, skipped = read_roster(args.roster, args.default_password, args.generate_passwords)
+    print(f"📋 Roster: {len(students)} students")
+    for row in skipped:
+        print(f"⚠️  Line {row['line']}: '{row['username']}' skipped ({row['reason']})")
+    if args.dry_run:
+        return
+
+    # Before touching the database: a clash here must not strand freshly created accounts
+    credentials = None
+    if args.credentials_out:
+        try:
+            credentials = open_credentials_file(args.credentials_out)
+        except FileExistsError:
+            parser.error(f"{args.credentials_out} already exists - refusing to overwrite credentials")
+
+    from db.session import engine
+    models.Base.metadata.create_all(bind=engine)
+    try:
+        report = provision(engine, students, args.workers, args.method, args.batch_size)
+        provisioned = set(report.pop("provisioned"))
+        if credentials:
+            writer = csv.writer(credentials)
+            writer.writerow(["username", "password"])
+            writer.writerows((s["username"], s["password"]) for s in students if s["username"] in provisioned)
+    finally:
+        if credentials:
+            credentials.close()
+
+    print(f"✅ Inserted {report['inserted']} students ({report['skipped_existing']} already existed) via {report['method']}")
+    if report["conflicts"]:
+        print(f"⚠️  Not inserted (username/email already taken): {', '.join(report['conflicts'])}")
+    print(f"   Hashing: {report['hash_seconds']}s ({report['hashes_per_second']}/s on {report['workers']} processes)")
+    print(f"   Loading: {report['load_seconds']}s ({report['rows_per_second']} rows/s)")
+    print(f"   Total:   {report['total_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/bin/bash
 # Comprehensive load testing script with phased approach
 # Usage: ./run_load_tests.sh [phase]
-# Phases: phase1 (50 users), phase2 (100 users), spike (200 users)
+# Phases: phase1 (50 users), phase2 (100 users), spike (200 users), lunch (campus-day scenario + SLO gates)
 
 set -e
 
@@ -58,6 +58,16 @@ case $PHASE in
       --csv=tests/reports/load_test_spike
     ;;
     
+  lunch)
+    echo "🍱 Lunch Rush: compressed campus day with per-endpoint SLO gates"
+    echo "Target: every endpoint within its p95/p99 and error-rate SLO"
+    python3 tests/load_tests/lunch_rush.py \
+      --base-url $HOST \
+      --admin-user "${ADMIN_USER:?set ADMIN_USER}" \
+      --admin-password "${ADMIN_PASSWORD:?set ADMIN_PASSWORD}" \
+      --out tests/reports/lunch_rush.json
+    ;;
+    
   full)
     echo "🎯 Full Test Suite (All Phases)"
     echo "Running Phase 1, Phase 2, and Spike tests..."
@@ -82,7 +92,7 @@ case $PHASE in
     
   *)
     echo "❌ Invalid phase: $PHASE"
-    echo "Usage: $0 [phase1|phase2|spike|full] [host]"
+    echo "Usage: $0 [phase1|phase2|spike|lunch|full] [host]"
     exit 1
     ;;
 esac
@@ -9,10 +9,13 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from dotenv import load_dotenv
+load_dotenv()  # JWT_SECRET / DATABASE_URL
+
 from sqlalchemy.orm import Session
-import database
-import models
-from auth import get_password_hash
+from db import session as database
+from db import models
+from core.auth import get_password_hash
 
 def seed_load_test_users():
     """Create 100 test users for load testing"""
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Notification Latency Report for Campus Eats
+Reads spans written by services/tracing.py (TRACE_FILE, JSON lines) and prints
+request-to-device latency percentiles per transport, plus where the time went
+for the slowest traces (request, publish, delivery).
+
+Usage: python scripts/trace_latency.py [traces.jsonl ...] [--slowest N]
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_spans(paths):
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification latency percentiles from trace spans")
+    parser.add_argument("files", nargs="*", default=["traces.jsonl"])
+    parser.add_argument("--slowest", type=int, default=5, help="Break down the N slowest deliveries")
+    args = parser.parse_args()
+
+    traces = defaultdict(list)
+    deliveries = defaultdict(list)  # transport -> [(latency_ms, span)]
+    for span in load_spans(args.files):
+        traces[span["trace_id"]].append(span)
+        if span["name"] == "realtime.deliver":
+            attributes = span["attributes"]
+            deliveries[attributes["transport"]].append((attributes["notification_latency_ms"], span))
+
+    if not deliveries:
+        print("No realtime.deliver spans (is TRACE_SAMPLE_RATE > 0?)")
+        return
+
+    print(f"{'transport':<16}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for transport, items in sorted(deliveries.items()):
+        latencies = sorted(latency for latency, _ in items)
+        print(
+            f"{transport:<16}{len(latencies):>8}{percentile(latencies, 0.5):>10.1f}"
+            f"{percentile(latencies, 0.95):>10.1f}{percentile(latencies, 0.99):>10.1f}{latencies[-1]:>10.1f}"
+        )
+
+    slowest = sorted((item for items in deliveries.values() for item in items), key=lambda i: i[0], reverse=True)
+    for latency, delivered in slowest[:args.slowest]:
+        print(f"\ntrace {delivered['trace_id']}: {latency:.1f}ms end to end")
+        for span in sorted(traces[delivered["trace_id"]], key=lambda s: s["start"]):
+            if span["name"] != "db.query":
+                print(f"  {span['name']:<48}{span['duration_ms']:>10.1f}ms  pid {span['pid']}")
+        queries = [s for s in traces[delivered["trace_id"]] if s["name"] == "db.query"]
+        if queries:
+            label = f"{len(queries)} SQL statements"
+            print(f"  {label:<48}{sum(s['duration_ms'] for s in queries):>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import logging
 from typing import Optional, Callable, Any
 from datetime import datetime, timedelta
 from services.redis import redis_client
+from services import metrics
 
 logger = logging.getLogger("cache")
 
@@ -19,16 +20,20 @@ def get_cached(key: str, ttl: int, fetch_func: Callable[[], Any]) -> Any:
         Cached data or fresh data from fetch_func
     """
     if not redis_client.is_available():
+        metrics.CACHE_REQUESTS.labels("redis", "miss").inc()
         return fetch_func()
     
     cached = redis_client.safe_get(key)
     if cached:
         try:
-            return json.loads(cached)
+            data = json.loads(cached)
+            metrics.CACHE_REQUESTS.labels("redis", "hit").inc()
+            return data
         except json.JSONDecodeError:
             logger.warning(f"Invalid JSON in cache key: {key}")
     
     # Cache miss - fetch fresh data
+    metrics.CACHE_REQUESTS.labels("redis", "miss").inc()
     data = fetch_func()
     # Handle datetime serialization for JSON
     redis_client.safe_setex(key, ttl, json.dumps(data, default=str))  # Fixed: use safe_setex and default=str for dates
@@ -58,8 +63,10 @@ class MenuCache:
         if self.cache and self.cached_at:
             if datetime.now() - self.cached_at < self.ttl:
                 logger.debug("Menu cache HIT (in-memory)")
+                metrics.CACHE_REQUESTS.labels("menu", "hit").inc()
                 return self.cache
         logger.debug("Menu cache MISS (in-memory)")
+        metrics.CACHE_REQUESTS.labels("menu", "miss").inc()
         return None
     
     def set(self, data: Any) -> None:
@@ -0,0 +1,372 @@
+"""
+Per-worker realtime fan-out hub.
+One async Redis subscription per worker process (pattern-subscribed to every
+realtime channel) dispatches each message to bounded, coalescing send queues
+of the local subscribers (SSE streams, WebSockets). Redis connection count no longer
+grows with the number of connected clients.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger("event_hub")
+
+# Channels published by services.pubsub
+CHANNELS = ("menu_updates", "shop_status")
+PATTERNS = ("order_updates:*",)
+
+DEFAULT_QUEUE_SIZE = 100
+# Drops (without the queue ever draining) after which a slow consumer is disconnected
+SLOW_CONSUMER_DROP_LIMIT = int(os.getenv("REALTIME_SLOW_CONSUMER_DROPS", 200))
+RECONNECT_MAX_DELAY = 30
+
+# One hub-wide keepalive tick for all connections (no per-connection timers)
+HEARTBEAT = "__heartbeat__"
+HEARTBEAT_INTERVAL = int(os.getenv("REALTIME_HEARTBEAT_SECONDS", 25))
+
+# Recent messages kept for Last-Event-ID replay (hub-wide ring buffer)
+REPLAY_BUFFER_SIZE = int(os.getenv("REALTIME_REPLAY_BUFFER", 500))
+
+
+class SlowConsumer(Exception):
+    """The subscriber kept overflowing its queue and was evicted"""
+
+
+def coalesce_key(channel: str, data: str) -> Optional[tuple]:
+    """
+    Overflow policy: a queued message with the same key is superseded by a newer one.
+    - shop_status: only the latest value matters
+    - menu_updates: latest update per item_id
+    - order_updates:*: latest status per order_id
+    Other messages (key None) are never coalesced.
+    """
+    if channel == "shop_status":
+        return (channel,)
+    if channel == "menu_updates":
+        field = "item_id"
+    elif channel.startswith("order_updates:"):
+        field = "order_id"
+    else:
+        return None
+    try:
+        value = json.loads(data).get(field)
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    return None if value is None else (channel, value)
+
+
+class Subscription:
+    """
+    A local subscriber: a bounded, coalescing send queue fed by the hub.
+    Overflow handling never blocks the hub: superseded messages are replaced in place,
+    otherwise the oldest message is dropped, and a consumer that keeps overflowing
+    (more than `drop_limit` drops without ever draining its queue) is evicted.
+    """
+
+    def __init__(
+        self,
+        channels: Iterable[str],
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        heartbeat: bool = False,
+        drop_limit: Optional[int] = None,
+    ):
+        self.channels = frozenset(channels)
+        self.maxsize = maxsize
+        self.heartbeat = heartbeat
+        self.drop_limit = drop_limit if drop_limit is not None else SLOW_CONSUMER_DROP_LIMIT
+        # key -> (channel, data, event_id); uncoalescable messages get a unique key
+        self._items: "OrderedDict[object, Tuple[str, str, Optional[str]]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._counter = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._dropped_since_drain = 0
+        self.evicted = False
+        # False when a requested replay could not cover every missed message
+        self.replay_complete = True
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    async def get(self) -> Tuple[str, str]:
+        """Wait for the next (channel, data) message"""
+        channel, data, _ = await self.get_event()
+        return channel, data
+
+    async def get_event(self) -> Tuple[str, str, Optional[str]]:
+        """
+        Wait for the next (channel, data, event_id) message (event_id is None for heartbeats).
+        Raises SlowConsumer once the subscriber has been evicted.
+        """
+        while not self._items and not self.evicted:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        if self.evicted:
+            raise SlowConsumer()
+        _, item = self._items.popitem(last=False)
+        if not self._items:
+            self._dropped_since_drain = 0
+        return item
+
+    def _put(self, key, item) -> None:
+        if key is None:
+            self._counter += 1
+            key = self._counter
+        self._items[key] = item
+        self._wakeup.set()
+
+    def deliver(self, channel: str, data: str, event_id: Optional[str] = None, key: Optional[tuple] = None) -> str:
+        """Queue a message. Returns the outcome: queued, coalesced, dropped or evicted."""
+        if self.evicted:
+            return "evicted"
+        if key is not None and key in self._items:
+            # Superseded: the newer message takes the old one's place at the back
+            del self._items[key]
+            self._put(key, (channel, data, event_id))
+            self.coalesced += 1
+            return "coalesced"
+        outcome = "queued"
+        if len(self._items) >= self.maxsize:
+            self._items.popitem(last=False)
+            self.dropped += 1
+            self._dropped_since_drain += 1
+            outcome = "dropped"
+            if self._dropped_since_drain > self.drop_limit:
+                self.evicted = True
+                self._items.clear()
+                self._wakeup.set()
+                return "evicted"
+        self._put(key, (channel, data, event_id))
+        return outcome
+
+    def discard_channels(self, channels: Iterable[str]) -> None:
+        """Drop queued messages of channels the subscriber just left"""
+        channels = set(channels)
+        for key in [k for k, item in self._items.items() if item[0] in channels]:
+            del self._items[key]
+
+    def deliver_heartbeat(self, timestamp: str) -> None:
+        # A pending message already keeps the connection busy - never displace it
+        if not self._items and not self.evicted:
+            self._put(None, (HEARTBEAT, timestamp, None))
+
+
+class EventHub:
+    """
+    Owns the worker's single Redis pub/sub connection.
+    The reader task starts lazily on the first subscription (inside the running loop).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._heartbeat_subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Event IDs are "{epoch}-{seq}"; the epoch tells IDs issued by another worker/process apart.
+        # Never all digits, so hub IDs cannot be mistaken for Redis Stream IDs.
+        self.epoch = f"w{secrets.token_hex(4)}"
+        self._seq = 0
+        self._history: deque = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self.connected = False
+        self.messages_received = 0
+        # Cumulative overflow counters (subscriptions come and go)
+        self.coalesced = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        loop_changed = self._loop is not loop
+        self._loop = loop
+        if loop_changed or self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="event-hub-reader")
+        if loop_changed or self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = loop.create_task(self._heartbeat(), name="event-hub-heartbeat")
+
+    def subscribe(
+        self,
+        channels: Iterable[str],
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        heartbeat: bool = False,
+        last_event_id: Optional[str] = None,
+    ) -> Subscription:
+        """
+        Register a local subscriber. With heartbeat=True the queue also receives
+        (HEARTBEAT, unix_timestamp) ticks every HEARTBEAT_INTERVAL seconds while idle.
+        With last_event_id, buffered messages published after that ID are queued first.
+        """
+        self._ensure_started()
+        sub = Subscription(channels, maxsize, heartbeat)
+        if last_event_id:
+            self._replay(sub, last_event_id)
+        for channel in sub.channels:
+            self._subscribers[channel].add(sub)
+        if heartbeat:
+            self._heartbeat_subscribers.add(sub)
+        return sub
+
+    def _replay(self, sub: Subscription, last_event_id: str) -> None:
+        # Runs before the subscriber is registered, in the same loop step - no gap, no duplicates
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            sub.replay_complete = False
+            return
+        last_seq = int(seq)
+        if self._history and self._history[0][0] > last_seq + 1:
+            sub.replay_complete = False  # Older messages already left the buffer
+        missed = [e for e in self._history if e[0] > last_seq and e[1] in sub.channels]
+        if len(missed) > sub.maxsize:
+            sub.replay_complete = False
+            missed = missed[-sub.maxsize:]
+        for seq, channel, data in missed:
+            sub.deliver(channel, data, f"{self.epoch}-{seq}", coalesce_key(channel, data))
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._heartbeat_subscribers.discard(sub)
+        for channel in sub.channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def set_channels(self, sub: Subscription, channels: Iterable[str]) -> None:
+        """Change a live subscription's channels (multiplexed sockets subscribe/unsubscribe)"""
+        channels = frozenset(channels)
+        removed, added = sub.channels - channels, channels - sub.channels
+        for channel in removed:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._subscribers[channel]
+        for channel in added:
+            self._subscribers[channel].add(sub)
+        sub.channels = channels
+        sub.discard_channels(removed)
+
+    @asynccontextmanager
+    async def subscription(
+        self,
+        channels: Iterable[str],
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        heartbeat: bool = False,
+        last_event_id: Optional[str] = None,
+    ):
+        sub = self.subscribe(channels, maxsize, heartbeat, last_event_id)
+        try:
+            yield sub
+        finally:
+            self.unsubscribe(sub)
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """Fan a message out to local subscribers. Returns the number of recipients."""
+        self._seq += 1
+        self._history.append((self._seq, channel, data))
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return 0
+        event_id = f"{self.epoch}-{self._seq}"
+        key = coalesce_key(channel, data)  # Parsed once, not per subscriber
+        recipients = list(subscribers)
+        for sub in recipients:
+            outcome = sub.deliver(channel, data, event_id, key)
+            if outcome == "coalesced":
+                self.coalesced += 1
+            elif outcome == "dropped":
+                self.dropped += 1
+            elif outcome == "evicted":
+                self.dropped += 1
+                self.evicted += 1
+                logger.warning(f"Evicting slow realtime consumer ({sub.dropped} messages dropped)")
+                self.unsubscribe(sub)
+        return len(recipients)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            timestamp = str(int(time.time()))
+            for sub in list(self._heartbeat_subscribers):
+                sub.deliver_heartbeat(timestamp)
+
+    async def _run(self) -> None:
+        delay = 1
+        while True:
+            client = aioredis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                db=0,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                health_check_interval=30,
+            )
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*CHANNELS)
+                await pubsub.psubscribe(*PATTERNS)
+                self.connected = True
+                delay = 1
+                logger.info("Event hub subscribed to realtime channels")
+
+                async for message in pubsub.listen():
+                    if message["type"] in ("message", "pmessage"):
+                        self.messages_received += 1
+                        self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event hub connection lost: {e} (retrying in {delay}s)")
+            finally:
+                self.connected = False
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def stats(self) -> dict:
+        local = set()
+        for subscribers in self._subscribers.values():
+            local.update(subscribers)
+        depths = [sub.qsize() for sub in local]
+        return {
+            "connected": self.connected,
+            "subscribers": len(local),
+            "channels": len(self._subscribers),
+            "messages_received": self.messages_received,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "slow_consumers_evicted": self.evicted,
+        }
+
+    async def stop(self) -> None:
+        for task in (self._task, self._heartbeat_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+        self._heartbeat_task = None
+
+
+# Global per-worker instance
+event_hub = EventHub()
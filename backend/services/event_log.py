@@ -0,0 +1,152 @@
+"""
+Durable realtime event log on Redis Streams.
+Every published event is also appended to one length-capped stream per topic
+(XADD MAXLEN ~). Stream IDs are monotonic, so a client or worker that missed
+pub/sub messages resyncs with one range read from its last cursor instead of a
+full refetch. Server-side consumers read through consumer groups.
+
+Keys:
+- events:{topic}   -> stream of {"data": <event json>[, "user_id": <owner>]}
+"""
+
+import json
+import logging
+import os
+import re
+from typing import List, Optional
+
+from services.redis import redis_client
+
+logger = logging.getLogger("event_log")
+
+# topic -> approximate max stream length
+TOPICS = {
+    "orders": int(os.getenv("EVENT_LOG_ORDERS_MAXLEN", 10000)),
+    "menu": int(os.getenv("EVENT_LOG_MENU_MAXLEN", 1000)),
+    "shop": int(os.getenv("EVENT_LOG_SHOP_MAXLEN", 100)),
+}
+
+MAX_READ_COUNT = 500
+# Must stay below the Redis client's socket_timeout (2s)
+MAX_BLOCK_MS = 1000
+
+_STREAM_ID = re.compile(r"^\d+(-\d+)?$")
+_FULL_STREAM_ID = re.compile(r"^\d+-\d+$")
+
+
+class UnknownTopic(ValueError):
+    """Topic is not one of TOPICS"""
+
+
+def stream_key(topic: str) -> str:
+    if topic not in TOPICS:
+        raise UnknownTopic(f"Unknown event topic '{topic}'")
+    return f"events:{topic}"
+
+
+def is_stream_id(value: Optional[str]) -> bool:
+    """True for a complete "<ms>-<seq>" stream ID (e.g. a Last-Event-ID issued from the log)"""
+    return bool(value) and bool(_FULL_STREAM_ID.match(value))
+
+
+def _parse_id(stream_id: str) -> tuple:
+    ms, _, seq = stream_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def append_event(topic: str, event: dict, user_id: Optional[int] = None) -> Optional[str]:
+    """Append an event; returns its stream ID (None when Redis is unavailable)"""
+    fields = {"data": json.dumps(event)}
+    if user_id is not None:
+        fields["user_id"] = str(user_id)
+    return redis_client.safe_xadd(stream_key(topic), fields, TOPICS[topic])
+
+
+def _entry(entry_id: str, fields: dict) -> dict:
+    return {"id": entry_id, "data": json.loads(fields["data"])}
+
+
+def read_events(topic: str, after: str = "0", limit: int = 100, user_id: Optional[int] = None) -> Optional[dict]:
+    """
+    Events published after the `after` cursor (exclusive), oldest first.
+
+    Returns:
+        {"events", "cursor", "has_more", "truncated"} or None if Redis is unavailable.
+        `cursor` is the last entry scanned (pass it back to continue); `truncated`
+        means entries after the cursor were already trimmed - the client must refetch.
+    Raises:
+        UnknownTopic / ValueError for a bad topic or cursor
+    """
+    key = stream_key(topic)
+    if not _STREAM_ID.match(after):
+        raise ValueError(f"Invalid cursor '{after}'")
+    limit = max(1, min(limit, MAX_READ_COUNT))
+    ms, seq = _parse_id(after)
+    start = f"{ms}-{seq + 1}"  # Exclusive start without relying on Redis 6.2 "(" ranges
+
+    def build(pipe):
+        pipe.xrange(key, "-", "+", count=1)
+        pipe.xrange(key, start, "+", count=limit)
+
+    results = redis_client.safe_pipeline(build)
+    if results is None:
+        return None
+    oldest, entries = results
+
+    truncated = (ms, seq) != (0, 0) and bool(oldest) and _parse_id(oldest[0][0]) > (ms, seq)
+    events = [
+        _entry(entry_id, fields)
+        for entry_id, fields in entries
+        # Per-user filtering still advances the cursor past other users' entries
+        if user_id is None or fields.get("user_id") == str(user_id)
+    ]
+    return {
+        "events": events,
+        "cursor": entries[-1][0] if entries else after,
+        "has_more": len(entries) == limit,
+        "truncated": truncated,
+    }
+
+
+# --- Consumer groups (server-side consumers: notifications, analytics, ...) ---
+
+def ensure_group(topic: str, group: str, start_id: str = "$") -> bool:
+    """Create the group if missing ('$' = only new events, '0' = whole retained log)"""
+    return redis_client.safe_xgroup_create(stream_key(topic), group, start_id)
+
+
+def read_group(
+    topic: str,
+    group: str,
+    consumer: str,
+    count: int = 100,
+    block_ms: Optional[int] = None,
+    pending: bool = False,
+) -> Optional[List[dict]]:
+    """
+    Next undelivered events for this group member. With pending=True, re-read the
+    member's delivered-but-unacknowledged events instead (crash recovery).
+    """
+    if block_ms is not None:
+        block_ms = min(block_ms, MAX_BLOCK_MS)
+    entries = redis_client.safe_xreadgroup(
+        stream_key(topic), group, consumer, "0" if pending else ">", min(count, MAX_READ_COUNT), block_ms
+    )
+    if entries is None:
+        return None
+    # Pending reads return (id, None) for entries trimmed since delivery - nothing left to process
+    trimmed = [entry_id for entry_id, fields in entries if not fields]
+    if trimmed:
+        ack(topic, group, *trimmed)
+    return [
+        {**_entry(entry_id, fields), "user_id": int(fields["user_id"]) if fields.get("user_id") else None}
+        for entry_id, fields in entries
+        if fields
+    ]
+
+
+def ack(topic: str, group: str, *ids: str) -> int:
+    """Mark events as processed for the group"""
+    if not ids:
+        return 0
+    return redis_client.safe_xack(stream_key(topic), group, *ids) or 0
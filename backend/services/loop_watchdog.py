@@ -0,0 +1,149 @@
+"""
+Event-loop lag watchdog.
+A tick task on the loop sleeps LOOP_WATCHDOG_INTERVAL_MS and records how late it
+wakes up (loop lag). A watchdog thread checks the last tick: when the loop has
+not ticked for LOOP_LAG_THRESHOLD_MS it captures the loop thread's current stack
+(the blocking call) and the route being served; the report is logged with the
+full stall duration once the loop recovers.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from services import metrics
+from services.rolling_window import RollingWindow
+
+logger = logging.getLogger("loop_watchdog")
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG", "true").lower() == "true"
+LOOP_WATCHDOG_INTERVAL = int(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", 50)) / 1000
+LOOP_LAG_THRESHOLD = int(os.getenv("LOOP_LAG_THRESHOLD_MS", 100)) / 1000
+
+STACK_LIMIT = 30
+RECENT_STALLS = 20
+
+
+def _request_of(frame) -> tuple:
+    """(route template, path) of the request whose code is on this stack, if any"""
+    while frame is not None:
+        try:
+            scope = frame.f_locals.get("scope")
+            if scope is None:
+                scope = getattr(frame.f_locals.get("request"), "scope", None)
+        except Exception:  # Frame finished while we looked at it
+            scope = None
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            return getattr(scope.get("route"), "path", None), scope.get("path")
+        frame = frame.f_back
+    return None, None
+
+
+class LoopWatchdog:
+    """One per worker: a tick task on the event loop and a watchdog thread"""
+
+    def __init__(self, interval: float = LOOP_WATCHDOG_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.lag = RollingWindow()
+        self._recent = deque(maxlen=RECENT_STALLS)
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._pending: Optional[dict] = None  # Stall captured by the thread, reported by the loop
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Call from the running loop (app startup)"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick(), name="loop-watchdog-tick")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._thread = None
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._observe(max(0.0, now - expected), now)
+
+    def _observe(self, lag: float, now: float) -> None:
+        self._last_tick = now
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        metrics.LOOP_LAG_SECONDS.observe(lag)
+        with self._lock:
+            stall, self._pending = self._pending, None
+        if stall is None:
+            return
+        stall["lag_ms"] = round(lag * 1000, 1)
+        self.stalls += 1
+        self._recent.append(stall)
+        metrics.LOOP_STALLS.labels(stall["route"] or "none").inc()
+        logger.warning(
+            f"Event loop blocked for {stall['lag_ms']}ms on {stall['route'] or stall['path'] or 'no request'}",
+            extra=stall,
+        )
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stop.wait(self.interval):
+            last_tick = self._last_tick
+            if time.monotonic() - last_tick < self.threshold + self.interval or last_tick == reported_tick:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            reported_tick = last_tick  # One capture per stall
+            route, path = _request_of(frame)
+            stack = traceback.format_list(traceback.extract_stack(frame, limit=STACK_LIMIT))
+            with self._lock:
+                self._pending = {
+                    "route": route,
+                    "path": path,
+                    "stack": "".join(stack),
+                    "captured_at": time.time(),
+                }
+
+    def stats(self) -> dict:
+        """Rolling loop lag (ms) and recent stalls (this worker) for health endpoints"""
+        return {
+            "running": self._task is not None,
+            "lag_ms": self.lag.percentiles(),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "since_last_tick_ms": round((time.monotonic() - self._last_tick) * 1000, 1),
+            "stalls": self.stalls,
+            "recent_stalls": [
+                {"route": s["route"], "path": s["path"], "lag_ms": s["lag_ms"], "captured_at": s["captured_at"]}
+                for s in self._recent
+            ],
+        }
+
+
+# Global per-worker instance
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,129 @@
+"""
+Content-addressed media storage for menu images.
+Uploads are streamed to disk in chunks, hashed while streaming and stored under
+their SHA-256 so identical uploads share one file. WebP variants are generated
+with Pillow when it is installed (graceful degradation otherwise).
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Dict, Tuple
+
+logger = logging.getLogger("media")
+
+try:
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = 40_000_000  # Reject decompression bombs
+    PILLOW_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PILLOW_AVAILABLE = False
+
+CHUNK_SIZE = 64 * 1024
+
+# name suffix -> (max width/height, square crop)
+VARIANTS = {
+    "display": (1024, False),
+    "thumb": (256, True),
+}
+WEBP_QUALITY = 80
+
+
+class FileTooLarge(Exception):
+    """Raised mid-stream once the upload exceeds the size limit"""
+
+
+def store_stream(src: BinaryIO, upload_dir: str, ext: str, max_size: int) -> Tuple[str, int, bool]:
+    """
+    Copy `src` to `upload_dir` in chunks, enforcing `max_size` while streaming.
+    Blocking - call from a threadpool.
+
+    Returns:
+        (filename, size, deduplicated) where filename is `<sha256><ext>`
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+
+        filename = f"{digest.hexdigest()}{ext}"
+        final_path = os.path.join(upload_dir, filename)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+            return filename, size, True
+
+        os.replace(tmp_path, final_path)  # Atomic: readers never see partial files
+        return filename, size, False
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{variant}.webp"
+
+
+def generate_variants(upload_dir: str, filename: str) -> Dict[str, str]:
+    """
+    Generate fixed-size WebP variants next to the original. Blocking - call from a threadpool.
+    Existing variants are reused (content-addressed names never change).
+
+    Returns:
+        {variant_name: variant_filename} for variants that exist on disk
+    """
+    if not PILLOW_AVAILABLE:
+        return {}
+
+    source_path = os.path.join(upload_dir, filename)
+    variants = {}
+    missing = {}
+    for name, spec in VARIANTS.items():
+        target = variant_filename(filename, name)
+        if os.path.exists(os.path.join(upload_dir, target)):
+            variants[name] = target
+        else:
+            missing[name] = (target, spec)
+
+    if not missing:
+        return variants
+
+    try:
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+            for name, (target, (max_side, square)) in missing.items():
+                if square:
+                    resized = ImageOps.fit(img, (max_side, max_side), Image.Resampling.LANCZOS)
+                else:
+                    resized = img.copy()
+                    resized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+                fd, tmp_path = tempfile.mkstemp(dir=upload_dir, prefix=".variant-")
+                try:
+                    with os.fdopen(fd, "wb") as out:
+                        resized.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+                    os.replace(tmp_path, os.path.join(upload_dir, target))
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+                variants[name] = target
+    except Exception as e:
+        # Variants are an optimization - the original upload is still served
+        logger.warning(f"Variant generation failed for {filename}: {e}")
+
+    return variants
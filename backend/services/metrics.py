@@ -0,0 +1,201 @@
+"""
+Prometheus metrics for the hot paths.
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set in gunicorn.conf.py before the app is imported) and /metrics aggregates
+all workers. Without that variable (single process / tests) the default
+in-process registry is used. Metrics become no-ops when prometheus_client is
+not installed (graceful degradation).
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+
+logger = logging.getLogger("metrics")
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    )
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # prometheus_client opens its .db files in here as soon as the first gauge is created
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Latency buckets (seconds) sized for each path
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+POOL_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # pool_timeout=10
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+NOTIFICATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # bcrypt rounds=10 ~70-100ms
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NoopMetric:
+    """Stand-in when prometheus_client is missing: accepts every call, records nothing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    @contextmanager
+    def time(self):
+        yield
+
+    @contextmanager
+    def track_inprogress(self):
+        yield
+
+
+def _metric(cls_name: str, *args, **kwargs):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    cls = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[cls_name]
+    if cls_name != "gauge":
+        kwargs.pop("multiprocess_mode", None)
+    return cls(*args, **kwargs)
+
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = _metric(
+    "histogram", "campuseats_http_request_duration_seconds",
+    "Request latency by route template (time to response headers)",
+    ["method", "route", "status"],
+)
+HTTP_IN_PROGRESS = _metric(
+    "gauge", "campuseats_http_requests_in_progress",
+    "Requests currently being handled",
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = _metric(
+    "counter", "campuseats_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["group"],  # endpoint group, or "global" for the safety valve
+)
+
+# --- Database ---
+DB_POOL_CHECKOUT_SECONDS = _metric(
+    "histogram", "campuseats_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection (includes pre-ping)",
+    buckets=POOL_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = _metric(
+    "counter", "campuseats_db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+)
+DB_POOL_CHECKED_OUT = _metric(
+    "gauge", "campuseats_db_pool_checked_out",
+    "DB connections currently checked out",
+    multiprocess_mode="livesum",
+)
+DB_STATEMENTS_PER_REQUEST = _metric(
+    "histogram", "campuseats_db_statements_per_request",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=STATEMENT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = _metric(
+    "histogram", "campuseats_db_time_per_request_seconds",
+    "Total SQL execution time per request",
+    ["route"],
+)
+DB_N_PLUS_ONE = _metric(
+    "counter", "campuseats_db_n_plus_one_requests_total",
+    "Requests that repeated one statement shape QUERY_N_PLUS_ONE_THRESHOLD+ times",
+    ["route"],
+)
+DB_SLOW_STATEMENTS = _metric(
+    "counter", "campuseats_db_slow_statements_total",
+    "Statements slower than SLOW_QUERY_MS",
+    ["route"],
+)
+
+# --- Password hashing ---
+PASSWORD_HASH_SECONDS = _metric(
+    "histogram", "campuseats_password_hash_duration_seconds",
+    "bcrypt time in the hashing pool, by operation",
+    ["operation"],  # "verify" or "hash"
+    buckets=HASH_BUCKETS,
+)
+PASSWORD_HASH_QUEUE_WAIT_SECONDS = _metric(
+    "histogram", "campuseats_password_hash_queue_wait_seconds",
+    "Time a hashing job waited for a free pool process (grows when bcrypt is saturated)",
+    ["operation"],
+    buckets=POOL_BUCKETS,
+)
+
+# --- Caches ---
+CACHE_REQUESTS = _metric(
+    "counter", "campuseats_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],  # cache: "menu" (in-memory MenuCache) or "redis" (get_cached)
+)
+
+# --- Redis ---
+REDIS_COMMAND_SECONDS = _metric(
+    "histogram", "campuseats_redis_command_duration_seconds",
+    "Redis round-trip time by command (PIPELINE = one pipelined batch)",
+    ["command"],
+    buckets=REDIS_BUCKETS,
+)
+
+# --- Realtime ---
+REALTIME_CONNECTIONS = _metric(
+    "gauge", "campuseats_realtime_connections",
+    "Open realtime connections by transport",
+    ["transport"],  # "sse", "websocket", "user_websocket"
+    multiprocess_mode="livesum",
+)
+NOTIFICATION_LATENCY_SECONDS = _metric(
+    "histogram", "campuseats_notification_latency_seconds",
+    "Traced events: originating request start to the frame written to the client",
+    ["transport"],
+    buckets=NOTIFICATION_BUCKETS,
+)
+
+# --- Event loop ---
+LOOP_LAG_SECONDS = _metric(
+    "histogram", "campuseats_event_loop_lag_seconds",
+    "How late the loop watchdog tick woke up (time the loop was busy or blocked)",
+    buckets=LOOP_LAG_BUCKETS,
+)
+LOOP_STALLS = _metric(
+    "counter", "campuseats_event_loop_stalls_total",
+    "Loop lag above LOOP_LAG_THRESHOLD_MS, by the route that was running",
+    ["route"],  # "none" when the blocking code was not serving a request
+)
+
+
+def render() -> tuple:
+    """(body, content type) for /metrics - all workers when running multiprocess"""
+    if not PROMETHEUS_AVAILABLE:
+        return None, CONTENT_TYPE_LATEST
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges (called from gunicorn's child_exit hook)"""
+    if PROMETHEUS_AVAILABLE and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,183 @@
+"""
+Dedicated password hashing executor.
+bcrypt is CPU bound (~70-100ms per call), so hashing/verification runs in a
+process pool sized to the cores instead of on the event loop. The number of
+queued jobs is bounded: when it is full, callers fail fast (503 + Retry-After)
+instead of piling up behind a login storm.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger("password_hasher")
+
+# Bcrypt configuration optimized for performance while maintaining security
+# rounds=10: 2^10 = 1024 iterations (~70-100ms on modern CPU)
+# OWASP minimum is 10 rounds, so this is still secure
+# Each round increase doubles hashing time (12 rounds ≈ 280-400ms)
+# Trade-off: Slightly faster brute-force attacks, but still computationally infeasible
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=10  # Explicit: was default 12, now 10 for performance
+)
+
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+MAX_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", HASH_WORKERS * 8))
+
+
+class HasherOverloaded(Exception):
+    """Raised when the hashing queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# --- Functions executed in the worker processes (must be top-level / picklable) ---
+
+def _timed_verify(plain_password: str, hashed_password: str):
+    started = time.time()
+    result = pwd_context.verify(plain_password, hashed_password)
+    return result, started, time.time()
+
+
+def _timed_hash(password: str):
+    started = time.time()
+    result = pwd_context.hash(password)
+    return result, started, time.time()
+
+
+class PasswordHasher:
+    """
+    Process-pool backed bcrypt with a bounded queue and latency metrics.
+    The pool is created lazily so each gunicorn worker owns its own (after fork).
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_queue_depth: int = MAX_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self.max_queue_depth = max(1, max_queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        # Rolling samples (seconds) for percentile reporting
+        self._hash_latency = deque(maxlen=1000)
+        self._queue_wait = deque(maxlen=1000)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: safe to start from a process that already runs threads (event loop, anyio pool)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Password hashing pool started ({self.workers} processes, queue {self.max_queue_depth})")
+        return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (a worker died: OOM kill etc.) so the next call starts a fresh one.
+        Caller holds self._lock. Shutting it down reaps its manager thread and leftover children."""
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _retry_after(self) -> int:
+        avg = (sum(self._hash_latency) / len(self._hash_latency)) if self._hash_latency else 0.1
+        return max(1, math.ceil(self._in_flight * avg / self.workers))
+
+    def _submit(self, fn, *args) -> Future:
+        operation = "verify" if fn is _timed_verify else "hash"
+        with self._lock:
+            if self._in_flight >= self.max_queue_depth:
+                self.rejected += 1
+                raise HasherOverloaded(self._retry_after())
+            self._in_flight += 1
+            submitted = time.time()
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._in_flight -= 1
+                self._discard(executor)
+                raise
+
+        def _done(f: Future):
+            with self._lock:
+                self._in_flight -= 1
+                if f.cancelled():
+                    return
+                if f.exception() is None:
+                    _, started, finished = f.result()
+                    self._queue_wait.append(max(0.0, started - submitted))
+                    self._hash_latency.append(finished - started)
+                    self.completed += 1
+                    # Also exported: stats() only covers this worker, /metrics adds up all of them.
+                    # Imported here, not at module level: the spawned pool processes import this module
+                    from services import metrics
+                    metrics.PASSWORD_HASH_QUEUE_WAIT_SECONDS.labels(operation).observe(max(0.0, started - submitted))
+                    metrics.PASSWORD_HASH_SECONDS.labels(operation).observe(finished - started)
+                elif isinstance(f.exception(), BrokenProcessPool):
+                    self._discard(executor)
+
+        future.add_done_callback(_done)
+        return future
+
+    # Async API (event loop handlers)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        result, _, _ = await asyncio.wrap_future(self._submit(_timed_verify, plain_password, hashed_password))
+        return result
+
+    async def hash(self, password: str) -> str:
+        result, _, _ = await asyncio.wrap_future(self._submit(_timed_hash, password))
+        return result
+
+    # Blocking API (sync handlers already running in the threadpool, scripts)
+
+    def verify_blocking(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(_timed_verify, plain_password, hashed_password).result()[0]
+
+    def hash_blocking(self, password: str) -> str:
+        return self._submit(_timed_hash, password).result()[0]
+
+    def stats(self) -> dict:
+        """Queue depth and latency percentiles (ms) for health/metrics endpoints"""
+        def pct(samples, q):
+            if not samples:
+                return None
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+        with self._lock:
+            latency, wait = list(self._hash_latency), list(self._queue_wait)
+            return {
+                "workers": self.workers,
+                "queue_depth": self._in_flight,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "hash_latency_ms": {"p50": pct(latency, 0.5), "p95": pct(latency, 0.95), "p99": pct(latency, 0.99)},
+                "queue_wait_ms": {"p50": pct(wait, 0.5), "p95": pct(wait, 0.95), "p99": pct(wait, 0.99)},
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global per-worker instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,151 @@
+"""
+On-demand statistical profiler for a live worker.
+A sampling thread reads every thread's Python stack (sys._current_frames) at a
+fixed interval for a bounded duration - the event loop thread and the
+threadpool threads alike - and aggregates:
+- collapsed stacks ("thread;outer;...;inner count"), the flame graph input format
+- a pstats-style top-N of functions by self and cumulative samples
+Nothing runs between profiles: no hooks, no thread, zero overhead when idle.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+MAX_SECONDS = 60
+MIN_INTERVAL_MS = 1
+
+# Innermost frames of threads that are parked, not working (excluded unless include_idle)
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("runners.py", "run"),  # uvloop waits in C below asyncio.run
+    ("thread.py", "_worker"),
+}
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THREAD_NUMBER = re.compile(r"[-_ ]?\d+$")
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this worker"""
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index != -1:
+        return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+def _thread_group(name: str) -> str:
+    # "AnyIO worker thread" / "ThreadPoolExecutor-0_3" -> one group per pool
+    return _THREAD_NUMBER.sub("", name).replace(";", " ") or "thread"
+
+
+class SamplingProfiler:
+    """One profile at a time per worker; sampling runs in its own short-lived thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval_ms: float = 5, top: int = 30, include_idle: bool = False) -> dict:
+        """
+        Sample all threads for `seconds` (blocking - call from a thread, not the event loop).
+        Raises ProfilerBusy if another profile is in progress.
+        """
+        seconds = min(max(seconds, 0.1), MAX_SECONDS)
+        interval = max(interval_ms, MIN_INTERVAL_MS) / 1000
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            stacks, samples, idle = self._sample(seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+        return {
+            "pid": os.getpid(),
+            "seconds": seconds,
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            "idle_samples": idle,
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            "top": self._top(stacks, top),
+        }
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Tuple[Counter, int, int]:
+        me = threading.get_ident()
+        # Label cache: code object -> "func (path:line)"
+        labels: Dict[object, str] = {}
+        stacks: Counter = Counter()
+        samples = idle = 0
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS:
+                    idle += 1
+                    continue
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = (
+                            f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                        ).replace(";", ":")
+                    frames.append(label)
+                    frame = frame.f_back
+                frames.append(_thread_group(names.get(ident, "thread")))
+                stacks[";".join(reversed(frames))] += 1
+                samples += 1
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        return stacks, samples, idle
+
+    @staticmethod
+    def _top(stacks: Counter, top: int) -> List[dict]:
+        """pstats-style summary: samples where a function was running (self) or on the stack (cumulative)"""
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        total = sum(stacks.values()) or 1
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]  # Drop the thread group
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                cumulative[label] += count
+        ranked = sorted(cumulative, key=lambda label: (own[label], cumulative[label]), reverse=True)[:top]
+        return [
+            {
+                "function": label,
+                "self_samples": own[label],
+                "self_pct": round(own[label] * 100 / total, 2),
+                "cumulative_samples": cumulative[label],
+                "cumulative_pct": round(cumulative[label] * 100 / total, 2),
+            }
+            for label in ranked
+        ]
+
+
+# Global per-worker instance
+sampling_profiler = SamplingProfiler()
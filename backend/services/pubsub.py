@@ -1,32 +1,172 @@
+"""
+Realtime event publishing.
+Each event is serialized once; its durable stream append (services.event_log) and
+every channel PUBLISH go out in one pipelined round trip. Bursts of events share a
+single round trip, in publish order (so per-channel ordering holds), either
+explicitly with `publisher.batch()` or always with PUBSUB_BATCH_MS > 0.
+"""
 import json
 import logging
-from typing import Dict, Any
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from services import tracing
 from services.redis import redis_client
+from services.event_log import TOPICS, stream_key
 
 logger = logging.getLogger("pubsub")
 
+# 0 = publish synchronously in the request; >0 = a background thread flushes every N ms
+PUBSUB_BATCH_MS = int(os.getenv("PUBSUB_BATCH_MS", 0))
+
+# XADD + PUBLISH as one server-side step, so live messages carry their stream ID (resync cursor).
+# KEYS[1] = stream, KEYS[2..] = channels; ARGV = maxlen, payload (a JSON object), user_id or ""
+APPEND_AND_PUBLISH = """
+local id
+if ARGV[3] ~= '' then
+    id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2], 'user_id', ARGV[3])
+else
+    id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2])
+end
+local message = string.sub(ARGV[2], 1, -2) .. ',"event_id":"' .. id .. '"}'
+for i = 2, #KEYS do
+    redis.call('PUBLISH', KEYS[i], message)
+end
+return id
+"""
+
+
+class PreparedEvent:
+    """One event, serialized once, with every destination it goes to"""
+
+    __slots__ = ("topic", "channels", "payload", "user_id")
+
+    def __init__(self, topic: str, channels: Sequence[str], event: dict, user_id: Optional[int] = None):
+        self.topic = topic
+        self.channels = tuple(channels)
+        self.payload = json.dumps(event)
+        self.user_id = user_id
+
+
+class Publisher:
+    """Pipelined publisher with optional batching (explicit or background)"""
+
+    def __init__(self, batch_ms: int = PUBSUB_BATCH_MS):
+        self.batch_ms = batch_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: List[PreparedEvent] = []
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.round_trips = 0
+        self.events_sent = 0
+
+    def publish(self, topic: str, channels: Sequence[str], event: dict, user_id: Optional[int] = None) -> None:
+        with tracing.span("pubsub.publish", topic=topic, channels=len(channels)):
+            # A traced event carries its trace to whichever worker delivers it
+            prepared = PreparedEvent(topic, channels, tracing.inject(event), user_id)
+            batch = getattr(self._local, "batch", None)
+            if batch is not None:
+                batch.append(prepared)
+            elif self.batch_ms > 0:
+                self._enqueue([prepared])
+            else:
+                self._send([prepared])
+
+    @contextmanager
+    def batch(self):
+        """Collect this thread's events and send them in one round trip on exit (nestable)"""
+        outer = getattr(self._local, "batch", None)
+        if outer is not None:
+            yield
+            return
+        self._local.batch = []
+        try:
+            yield
+        finally:
+            events, self._local.batch = self._local.batch, None
+            if events:
+                # Same path as single events: keeps ordering with the background flusher
+                if self.batch_ms > 0:
+                    self._enqueue(events)
+                else:
+                    self._send(events)
+
+    def _enqueue(self, events: List[PreparedEvent]) -> None:
+        with self._lock:
+            self._pending.extend(events)
+            if self._flusher is None or not self._flusher.is_alive():
+                # Started lazily: each gunicorn worker gets its own thread (after fork)
+                self._flusher = threading.Thread(target=self._flush_loop, name="pubsub-flusher", daemon=True)
+                self._flusher.start()
+        self._wakeup.set()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait()
+            # Let the rest of the burst arrive, then send it all at once
+            time.sleep(self.batch_ms / 1000)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Send everything queued for the background flusher (also used at shutdown)"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            # Sending under the lock keeps batches in order
+            if events:
+                self._send(events)
+
+    def _send(self, events: List[PreparedEvent]) -> Optional[list]:
+        scripting = redis_client.scripting_available()
+
+        def build(pipe):
+            for e in events:
+                if scripting:
+                    pipe.eval(
+                        APPEND_AND_PUBLISH, 1 + len(e.channels), stream_key(e.topic), *e.channels,
+                        TOPICS[e.topic], e.payload, "" if e.user_id is None else e.user_id
+                    )
+                else:
+                    # No Lua: same single round trip, live messages just lack event_id
+                    fields = {"data": e.payload}
+                    if e.user_id is not None:
+                        fields["user_id"] = str(e.user_id)
+                    pipe.xadd(stream_key(e.topic), fields, maxlen=TOPICS[e.topic], approximate=True)
+                    for channel in e.channels:
+                        pipe.publish(channel, e.payload)
+
+        results = redis_client.safe_pipeline(build)
+        if results is not None:
+            self.round_trips += 1
+            self.events_sent += len(events)
+        return results
+
+
+# Global per-worker instance
+publisher = Publisher()
+
+
 def publish_order_update(order_id: int, user_id: int, status: str):
     """Publish order status update to Redis Pub/Sub"""
-    from datetime import datetime
-    
     event = {
         "order_id": order_id,
         "status": status,
         "timestamp": datetime.utcnow().isoformat()
     }
-    
-    # Publish to order-specific channel
-    redis_client.safe_publish(
-        f"order_updates:{order_id}",
-        json.dumps(event)
-    )
-    
-    # Publish to user-specific channel
-    redis_client.safe_publish(
-        f"order_updates:user:{user_id}",
-        json.dumps(event)
+
+    # Order-specific channel (long-poll waiters) + user-specific channel (SSE/WebSocket)
+    publisher.publish(
+        "orders",
+        (f"order_updates:{order_id}", f"order_updates:user:{user_id}"),
+        event,
+        user_id=user_id
     )
-    
+
     logger.info(f"Published order update: order_id={order_id}, status={status}")
 
 def publish_menu_update(action: str, item_id: int):
@@ -35,8 +175,8 @@ def publish_menu_update(action: str, item_id: int):
         "action": action,  # "created", "updated", "deleted"
         "item_id": item_id
     }
-    
-    redis_client.safe_publish("menu_updates", json.dumps(event))
+
+    publisher.publish("menu", ("menu_updates",), event)
     logger.info(f"Published menu update: action={action}, item_id={item_id}")
 
 def publish_shop_status(is_open: bool):
@@ -44,6 +184,6 @@ def publish_shop_status(is_open: bool):
     event = {
         "status": "open" if is_open else "closed"
     }
-    
-    redis_client.safe_publish("shop_status", json.dumps(event))
+
+    publisher.publish("shop", ("shop_status",), event)
     logger.info(f"Published shop status: {event['status']}")
@@ -0,0 +1,199 @@
+"""
+SQL query profiler.
+SQLAlchemy engine events count every statement and its DB time against the
+request being served (a contextvar, so it follows sync routes into the threadpool).
+Per request:
+- statements slower than SLOW_QUERY_MS are logged with the route
+- a statement shape repeated QUERY_N_PLUS_ONE_THRESHOLD+ times is flagged as a probable N+1
+Totals go to an X-DB-Queries response header (dev) and to per-route aggregates
+(/health/detailed, Prometheus) in production.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services import metrics, server_timing, tracing
+
+logger = logging.getLogger("query_profiler")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", 5))
+# X-DB-Queries header: on by default only in development
+RESPONSE_HEADER = os.getenv(
+    "QUERY_PROFILE_HEADER",
+    "true" if os.getenv("ENVIRONMENT", "production") == "development" else "false",
+).lower() == "true"
+
+STATEMENT_LOG_CHARS = 300
+
+_WHITESPACE = re.compile(r"\s+")
+# "IN (?, ?, ?)" / "VALUES (%s, %s)" -> one placeholder, so list length doesn't change the shape
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+))+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in parameters compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+class RequestQueries:
+    """Statements executed while serving one request"""
+
+    __slots__ = ("scope", "count", "db_time", "shapes")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope or {}
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def route(self) -> str:
+        # Route template, not the raw path (bounded cardinality for aggregates/labels)
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+    def repeated(self) -> Dict[str, int]:
+        """Probable N+1 patterns: shape -> executions"""
+        return {shape: n for shape, n in self.shapes.items() if n >= N_PLUS_ONE_THRESHOLD}
+
+    def header(self) -> str:
+        return f"count={self.count}; time_ms={self.db_time * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+# Start time lives on the execution context: it is discarded with the statement, so a
+# statement that raises (no after_cursor_execute) leaves nothing behind on the connection.
+_START_ATTR = "_query_profiler_start"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _START_ATTR, time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, _START_ATTR, None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    server_timing.record("db", elapsed)
+
+    queries = _current.get()
+    traced = tracing.current_span() is not None
+    if queries is not None or traced:
+        shape = statement_shape(statement)
+        if queries is not None:
+            queries.count += 1
+            queries.db_time += elapsed
+            queries.shapes[shape] += 1
+        if traced:
+            tracing.record_span("db.query", elapsed, statement=shape[:STATEMENT_LOG_CHARS])
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        route = queries.route if queries is not None else "background"
+        metrics.DB_SLOW_STATEMENTS.labels(route).inc()
+        path = queries.scope.get("path", "") if queries is not None else ""
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f}ms) on {route} {path}: "
+            f"{_WHITESPACE.sub(' ', statement)[:STATEMENT_LOG_CHARS]}"
+        )
+
+
+class RouteQueryStats:
+    """Aggregated query counts for one route"""
+
+    __slots__ = ("requests", "statements", "db_time", "max_statements", "n_plus_one", "last_repeated")
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.max_statements = 0
+        self.n_plus_one = 0
+        self.last_repeated: Optional[str] = None
+
+
+class QueryProfiler:
+    """Per-worker aggregation of per-request query stats"""
+
+    def __init__(self, response_header: bool = RESPONSE_HEADER):
+        self.response_header = response_header
+        self._routes: Dict[str, RouteQueryStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile_request(self, scope: Optional[dict] = None):
+        """Count the statements executed inside this block (and the tasks/threads it starts)"""
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+        try:
+            yield queries
+        finally:
+            _current.reset(token)
+
+    def record(self, queries: RequestQueries) -> None:
+        """Fold a finished request into the aggregates; logs probable N+1 patterns"""
+        route = queries.route
+        repeated = queries.repeated()
+        for shape, n in repeated.items():
+            logger.warning(
+                f"Probable N+1 on {route}: {n}x {shape[:STATEMENT_LOG_CHARS]}"
+            )
+
+        metrics.DB_STATEMENTS_PER_REQUEST.labels(route).observe(queries.count)
+        metrics.DB_TIME_PER_REQUEST.labels(route).observe(queries.db_time)
+        if repeated:
+            metrics.DB_N_PLUS_ONE.labels(route).inc()
+
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteQueryStats()
+            stats.requests += 1
+            stats.statements += queries.count
+            stats.db_time += queries.db_time
+            stats.max_statements = max(stats.max_statements, queries.count)
+            if repeated:
+                stats.n_plus_one += 1
+                stats.last_repeated = max(repeated, key=repeated.get)[:STATEMENT_LOG_CHARS]
+
+    def stats(self, top: int = 20) -> dict:
+        """Routes with the most statements (this worker) for health/monitoring endpoints"""
+        with self._lock:
+            routes = sorted(self._routes.items(), key=lambda item: item[1].statements, reverse=True)[:top]
+            return {
+                route: {
+                    "requests": s.requests,
+                    "avg_statements": round(s.statements / s.requests, 2),
+                    "max_statements": s.max_statements,
+                    "avg_db_ms": round(s.db_time / s.requests * 1000, 2),
+                    "n_plus_one_requests": s.n_plus_one,
+                    "last_repeated_statement": s.last_repeated,
+                }
+                for route, s in routes
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+# Global per-worker instance
+query_profiler = QueryProfiler()
@@ -18,6 +18,7 @@ RATE_LIMITS = {
     "admin_write": (20, 60),       # Unchanged: Admin operations
     "admin_read": (100, 60),       # 50→100: Admin dashboard refresh
     "auth": (10, 300),             # 5→10: Allow login retries (5 min window)
+    "token_refresh": (60, 60),     # Cheap (no bcrypt), but shared campus NAT IPs
 }
 
 def check_rate_limit(
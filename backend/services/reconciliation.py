@@ -0,0 +1,188 @@
+"""
+Bank Statement Reconciliation
+Streams a bank statement CSV export and hash-joins it against orders that are
+waiting for payment verification (matched on UTR + amount).
+"""
+
+import csv
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("reconciliation")
+
+# Header aliases seen in common Indian bank / UPI statement exports (lower-cased)
+UTR_COLUMN_ALIASES = (
+    "utr", "utr no", "utr number", "utr_no", "upi ref no", "upi ref", "ref no",
+    "reference", "reference no", "reference number", "ref no./cheque no.",
+    "chq/ref no", "transaction id", "txn id",
+)
+AMOUNT_COLUMN_ALIASES = (
+    "amount", "credit", "credit amount", "cr amount", "deposit", "deposit amount",
+    "deposits", "amount (inr)", "amount(inr)", "txn amount",
+)
+
+# Keep the response small for 50k-row statements (counts are always exact)
+MAX_REPORTED_ROWS = 100
+
+
+class StatementFormatError(ValueError):
+    """Raised when the uploaded statement cannot be parsed"""
+
+
+def normalize_utr(value: Optional[str]) -> str:
+    """UTRs are compared case-insensitively without surrounding whitespace"""
+    return (value or "").strip().upper()
+
+
+def parse_amount(value: Optional[str]) -> Optional[Decimal]:
+    """Parse '₹1,234.00', 'INR 120', '120.00 CR' etc. Returns None if not a number"""
+    if value is None:
+        return None
+    cleaned = value.replace(",", "").replace("₹", "").upper()
+    cleaned = cleaned.replace("INR", "").replace("CR", "").strip()
+    if not cleaned:
+        return None
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return None
+
+
+def _find_column(header: List[str], requested: Optional[str], aliases: Iterable[str]) -> int:
+    normalized = [h.strip().lower() for h in header]
+    candidates = [requested.strip().lower()] if requested else list(aliases)
+    for name in candidates:
+        if name in normalized:
+            return normalized.index(name)
+    raise StatementFormatError(
+        f"Could not find column {requested!r} in statement header" if requested
+        else f"Could not find any of {list(aliases)} in statement header"
+    )
+
+
+def iter_statement_rows(
+    stream: IO[str],
+    utr_column: Optional[str] = None,
+    amount_column: Optional[str] = None,
+) -> Iterator[Tuple[int, str, Optional[Decimal]]]:
+    """
+    Stream (line_number, utr, amount) tuples from a CSV statement.
+    Rows are never materialized as a list, so memory stays flat for large exports.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        raise StatementFormatError("Statement is empty")
+
+    utr_idx = _find_column(header, utr_column, UTR_COLUMN_ALIASES)
+    amount_idx = _find_column(header, amount_column, AMOUNT_COLUMN_ALIASES)
+    width = max(utr_idx, amount_idx)
+
+    for row in reader:
+        if len(row) <= width:
+            continue  # Footer / summary lines
+        utr = normalize_utr(row[utr_idx])
+        if not utr:
+            continue
+        yield reader.line_num, utr, parse_amount(row[amount_idx])
+
+
+def reconcile(rows: Iterable[Tuple[int, str, Optional[Decimal]]], pending_orders: Iterable) -> Dict:
+    """
+    Hash-join statement rows against pending orders.
+
+    Args:
+        rows: Output of iter_statement_rows
+        pending_orders: Orders in Pending_Verification (UTR stored in verification_proof)
+
+    Returns:
+        Dict with exact `matches` (list of orders) and mismatch details. Orders whose
+        UTRs collide after normalization are never matched, only reported as ambiguous.
+    """
+    by_utr = {}
+    ambiguous = {}
+    for order in pending_orders:
+        utr = normalize_utr(order.verification_proof)
+        if not utr:
+            continue
+        if utr in ambiguous:
+            ambiguous[utr].append(order)
+        elif utr in by_utr:
+            ambiguous[utr] = [by_utr.pop(utr), order]
+        else:
+            by_utr[utr] = order
+
+    matches = []
+    amount_mismatches = []
+    ambiguous_rows = []
+    unmatched_rows = []
+    duplicate_rows = []
+    seen = set()
+    rows_processed = 0
+    counts = {"amount_mismatch": 0, "ambiguous": 0, "unmatched": 0, "duplicate": 0}
+
+    def report(kind: str, target: List, entry: Dict) -> None:
+        counts[kind] += 1
+        if len(target) < MAX_REPORTED_ROWS:
+            target.append(entry)
+
+    for line_num, utr, amount in rows:
+        rows_processed += 1
+        if utr in seen:
+            report("duplicate", duplicate_rows, {"line": line_num, "utr": utr})
+            continue
+
+        if utr in ambiguous:
+            seen.add(utr)
+            report("ambiguous", ambiguous_rows, {
+                "line": line_num,
+                "utr": utr,
+                "order_ids": [order.id for order in ambiguous[utr]],
+                "statement_amount": str(amount),
+            })
+            continue
+
+        order = by_utr.get(utr)
+        if order is None:
+            report("unmatched", unmatched_rows, {"line": line_num, "utr": utr, "amount": str(amount)})
+            continue
+
+        seen.add(utr)
+        if amount is not None and amount == order.total_amount:
+            matches.append(order)
+        else:
+            report("amount_mismatch", amount_mismatches, {
+                "line": line_num,
+                "utr": utr,
+                "order_id": order.id,
+                "expected_amount": order.total_amount,
+                "statement_amount": str(amount),
+            })
+
+    unpaid_orders = [
+        {"order_id": order.id, "utr": utr, "amount": order.total_amount}
+        for utr, order in by_utr.items() if utr not in seen
+    ]
+
+    logger.info(
+        f"Reconciled {rows_processed} statement rows against {len(by_utr)} pending orders: "
+        f"{len(matches)} matched, {counts['amount_mismatch']} amount mismatches, "
+        f"{len(ambiguous)} ambiguous UTRs"
+    )
+
+    return {
+        "rows_processed": rows_processed,
+        "matches": matches,
+        "amount_mismatches": amount_mismatches,
+        "amount_mismatch_count": counts["amount_mismatch"],
+        # Pending orders sharing a UTR (after normalization): left for manual review
+        "ambiguous_rows": ambiguous_rows,
+        "ambiguous_row_count": counts["ambiguous"],
+        "duplicate_rows": duplicate_rows,
+        "duplicate_row_count": counts["duplicate"],
+        "unmatched_rows": unmatched_rows,
+        "unmatched_row_count": counts["unmatched"],
+        "orders_not_in_statement": unpaid_orders[:MAX_REPORTED_ROWS],
+        "orders_not_in_statement_count": len(unpaid_orders),
+    }
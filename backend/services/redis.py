@@ -1,24 +1,64 @@
 import redis
 import logging
-from typing import Optional
+import time
+from typing import Callable, List, Optional
 import os
 
+from services import metrics, server_timing
+from services.rolling_window import RollingWindow
+
 logger = logging.getLogger("redis")
 
+# Command round trips in this worker over the last minute (for health checks)
+command_rtt = RollingWindow()
+
+
+class TimedRedis(redis.Redis):
+    """redis.Redis that records each command's round-trip time"""
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(elapsed)
+            server_timing.record("redis", elapsed)
+            command_rtt.observe(elapsed)
+
+
 class RedisClient:
     """
     Redis client with graceful degradation.
     If Redis is unavailable, operations fail safely without breaking the system.
+    The first failed command opens the circuit (client = None): later calls skip
+    Redis instead of waiting on socket timeouts.
     """
     
     def __init__(self):
-        self.client: Optional[redis.Redis] = None
+        self._client: Optional[redis.Redis] = None
+        self.circuit_opened_at: Optional[float] = None
+        self.circuit_trips = 0
+        self._scripting_probe: tuple = (None, False)  # (client probed, EVAL supported)
         self._connect()
+
+    @property
+    def client(self) -> Optional[redis.Redis]:
+        return self._client
+
+    @client.setter
+    def client(self, value: Optional[redis.Redis]) -> None:
+        if value is None and self._client is not None:
+            self.circuit_opened_at = time.time()
+            self.circuit_trips += 1
+        elif value is not None:
+            self.circuit_opened_at = None
+        self._client = value
     
     def _connect(self):
         """Attempt to connect to Redis"""
         try:
-            self.client = redis.Redis(
+            self.client = TimedRedis(
                 host=os.getenv("REDIS_HOST", "localhost"),
                 port=int(os.getenv("REDIS_PORT", 6379)),
                 db=0,
@@ -36,6 +76,25 @@ class RedisClient:
     def is_available(self) -> bool:
         """Check if Redis client is initialized (no per-request PING)"""
         return self.client is not None
+
+    def stats(self, ping: bool = False) -> dict:
+        """Circuit state and recent round-trip times; ping=True adds one live PING"""
+        result = {
+            "circuit": "closed" if self.is_available() else "open",
+            "circuit_opened_at": self.circuit_opened_at,
+            "circuit_trips": self.circuit_trips,
+            "rtt_ms": command_rtt.percentiles(),
+        }
+        if ping and self.is_available():
+            start = time.perf_counter()
+            try:
+                self.client.ping()
+                result["ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            except Exception as e:
+                logger.error(f"Redis PING failed: {e}")
+                self.client = None
+                result["circuit"] = "open"
+        return result
     
     def safe_incr(self, key: str) -> Optional[int]:
         """Increment with graceful degradation"""
@@ -126,5 +185,100 @@ class RedisClient:
             self.client = None
             return None
 
+    def safe_xadd(self, key: str, fields: dict, maxlen: int) -> Optional[str]:
+        """Append to a stream (approximately capped at maxlen) with graceful degradation"""
+        if not self.is_available():
+            return None
+        try:
+            return self.client.xadd(key, fields, maxlen=maxlen, approximate=True)
+        except Exception as e:
+            logger.error(f"Redis XADD failed: {e}")
+            self.client = None
+            return None
+
+    def safe_xgroup_create(self, key: str, group: str, start_id: str = "$") -> bool:
+        """Create a consumer group (and the stream); an existing group counts as success"""
+        if not self.is_available():
+            return False
+        try:
+            self.client.xgroup_create(key, group, id=start_id, mkstream=True)
+            return True
+        except redis.ResponseError as e:
+            if str(e).startswith("BUSYGROUP"):
+                return True
+            logger.error(f"Redis XGROUP CREATE failed: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Redis XGROUP CREATE failed: {e}")
+            self.client = None
+            return False
+
+    def safe_xreadgroup(self, key: str, group: str, consumer: str, start_id: str = ">",
+                        count: int = 100, block_ms: Optional[int] = None) -> Optional[List]:
+        """Read entries for a consumer group member; returns [(id, fields), ...]"""
+        if not self.is_available():
+            return None
+        try:
+            response = self.client.xreadgroup(group, consumer, {key: start_id}, count=count, block=block_ms)
+            return response[0][1] if response else []
+        except redis.ResponseError as e:
+            logger.error(f"Redis XREADGROUP failed: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Redis XREADGROUP failed: {e}")
+            self.client = None
+            return None
+
+    def safe_xack(self, key: str, group: str, *ids: str) -> Optional[int]:
+        """Acknowledge processed group entries with graceful degradation"""
+        if not self.is_available():
+            return None
+        try:
+            return self.client.xack(key, group, *ids)
+        except Exception as e:
+            logger.error(f"Redis XACK failed: {e}")
+            self.client = None
+            return None
+
+    def scripting_available(self) -> bool:
+        """Whether EVAL works (some managed/emulated Redis disable Lua). Probed once per connection."""
+        if not self.is_available():
+            return False
+        if self._scripting_probe[0] is not self.client:
+            try:
+                self.client.eval("return 1", 0)
+                supported = True
+            except redis.ResponseError:
+                supported = False
+            except Exception as e:
+                logger.error(f"Redis EVAL probe failed: {e}")
+                self.client = None
+                return False
+            self._scripting_probe = (self.client, supported)
+        return self._scripting_probe[1]
+
+    def safe_pipeline(self, build: Callable[[redis.client.Pipeline], None], transaction: bool = False) -> Optional[List]:
+        """
+        Run several commands in one round trip with graceful degradation.
+        `build` queues commands on the pipeline; returns their results in order.
+        """
+        if not self.is_available():
+            return None
+        try:
+            pipe = self.client.pipeline(transaction=transaction)
+            build(pipe)
+            start = time.perf_counter()
+            try:
+                return pipe.execute()
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.REDIS_COMMAND_SECONDS.labels("PIPELINE").observe(elapsed)
+                server_timing.record("redis", elapsed)
+                command_rtt.observe(elapsed)
+        except Exception as e:
+            logger.error(f"Redis PIPELINE failed: {e}")
+            self.client = None
+            return None
+
 # Global instance
 redis_client = RedisClient()
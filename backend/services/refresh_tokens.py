@@ -0,0 +1,176 @@
+"""
+Rotating refresh tokens.
+Redis is the primary store (one pipelined round trip per refresh, no bcrypt);
+the refresh_tokens table is used when Redis is unavailable. Either way the user is
+re-read on rotation: deactivated users are refused and the current role is issued.
+
+Keys:
+- refresh:token:{sha256}    -> JSON session (user, role, family), TTL = token lifetime
+- refresh:used:{sha256}     -> family id of an already-rotated token (reuse detection)
+- refresh:family:{family}   -> sha256 of the family's current live token
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from db import models
+from services.redis import redis_client
+
+logger = logging.getLogger("refresh_tokens")
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+REFRESH_TOKEN_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+
+class RefreshTokenReused(Exception):
+    """An already-rotated token was presented - the family has been revoked"""
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_key(token_hash: str) -> str:
+    return f"refresh:token:{token_hash}"
+
+
+def _used_key(token_hash: str) -> str:
+    return f"refresh:used:{token_hash}"
+
+
+def _family_key(family: str) -> str:
+    return f"refresh:family:{family}"
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite drops tzinfo - stored values are always UTC
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def issue_refresh_token(
+    db: Session,
+    user_id: int,
+    username: str,
+    role: str,
+    family: Optional[str] = None,
+    rotated_from: Optional[str] = None,
+) -> str:
+    """Create a refresh token (new family on login, same family on rotation)"""
+    token = secrets.token_urlsafe(32)
+    token_hash = _hash(token)
+    family = family or secrets.token_hex(16)
+    session = {"user_id": user_id, "username": username, "role": role, "family": family}
+
+    def build(pipe):
+        pipe.setex(_token_key(token_hash), REFRESH_TOKEN_TTL, json.dumps(session))
+        pipe.setex(_family_key(family), REFRESH_TOKEN_TTL, token_hash)
+        if rotated_from:
+            pipe.setex(_used_key(rotated_from), REFRESH_TOKEN_TTL, family)
+
+    if redis_client.safe_pipeline(build) is None:
+        # Graceful degradation: persist in the database instead
+        db.add(models.RefreshToken(
+            token_hash=token_hash,
+            user_id=user_id,
+            family_id=family,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=REFRESH_TOKEN_TTL),
+        ))
+        db.commit()
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[dict]:
+    """
+    Consume a refresh token and issue its successor.
+
+    Returns:
+        {"user_id", "username", "role", "refresh_token"} or None if the token is invalid/expired
+    Raises:
+        RefreshTokenReused if the token was already rotated (family is revoked)
+    """
+    token_hash = _hash(token)
+
+    def lookup(pipe):
+        pipe.getdel(_token_key(token_hash))
+        pipe.get(_used_key(token_hash))
+
+    results = redis_client.safe_pipeline(lookup)
+    if results is not None:
+        raw_session, reused_family = results
+        if raw_session:
+            session = json.loads(raw_session)
+            user = db.query(models.User).filter(models.User.id == session["user_id"]).first()
+            if not user or not user.is_active:
+                _revoke_family_redis(session["family"])
+                return None
+            new_token = issue_refresh_token(
+                db, user.id, user.username, user.role,
+                family=session["family"], rotated_from=token_hash
+            )
+            return {"user_id": user.id, "username": user.username, "role": user.role,
+                    "family": session["family"], "refresh_token": new_token}
+        if reused_family:
+            _revoke_family_redis(reused_family)
+            _revoke_family_db(db, reused_family)
+            raise RefreshTokenReused()
+
+    # Redis unavailable, or token was issued while Redis was down
+    return _rotate_db(db, token_hash)
+
+
+def revoke_refresh_token(db: Session, token: str) -> None:
+    """Logout: drop the token (and its family) from both stores"""
+    token_hash = _hash(token)
+    raw_session = redis_client.safe_get(_token_key(token_hash))
+    if raw_session:
+        _revoke_family_redis(json.loads(raw_session)["family"])
+    db_token = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == token_hash).first()
+    if db_token:
+        _revoke_family_db(db, db_token.family_id)
+
+
+def _rotate_db(db: Session, token_hash: str) -> Optional[dict]:
+    db_token = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == token_hash).first()
+    if not db_token:
+        return None
+    if db_token.used:
+        _revoke_family_db(db, db_token.family_id)
+        raise RefreshTokenReused()
+    if _utc(db_token.expires_at) < datetime.now(timezone.utc):
+        return None
+
+    user = db.query(models.User).filter(models.User.id == db_token.user_id).first()
+    if not user or not user.is_active:
+        return None
+
+    # Conditional update: of two concurrent refreshes only one may win
+    claimed = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == token_hash,
+        models.RefreshToken.used == False  # noqa: E712
+    ).update({"used": True})
+    db.commit()
+    if not claimed:
+        _revoke_family_db(db, db_token.family_id)
+        raise RefreshTokenReused()
+    new_token = issue_refresh_token(db, user.id, user.username, user.role, db_token.family_id)
+    return {"user_id": user.id, "username": user.username, "role": user.role, "family": db_token.family_id, "refresh_token": new_token}
+
+
+def _revoke_family_redis(family: str) -> None:
+    current = redis_client.safe_get(_family_key(family))
+    if current:
+        redis_client.safe_delete(_token_key(current))
+    redis_client.safe_delete(_family_key(family))
+    logger.warning(f"Refresh token family revoked: {family}")
+
+
+def _revoke_family_db(db: Session, family: str) -> None:
+    db.query(models.RefreshToken).filter(models.RefreshToken.family_id == family).update({"used": True})
+    db.commit()
@@ -0,0 +1,51 @@
+"""
+Rolling percentiles over recent observations (per worker).
+Prometheus histograms answer "over time, across workers"; health checks need
+"this worker, right now" - e.g. pool checkout wait over the last minute.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+WINDOW_SECONDS = 60
+
+
+class RollingWindow:
+    """Observations from the last `seconds` (at most `maxlen`), safe to share across threads"""
+
+    def __init__(self, seconds: float = WINDOW_SECONDS, maxlen: int = 5000):
+        self.seconds = seconds
+        self._values = deque(maxlen=maxlen)  # (monotonic time, value)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._values.append((now, value))
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.seconds
+        while self._values and self._values[0][0] < cutoff:
+            self._values.popleft()
+
+    def percentiles(self, scale: float = 1000, digits: int = 2) -> Dict[str, Optional[float]]:
+        """count, p50, p95, p99 and max - scaled (seconds -> ms by default); None when empty"""
+        with self._lock:
+            self._prune(time.monotonic())
+            values = sorted(value for _, value in self._values)
+        if not values:
+            return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+
+        def pct(q):
+            return round(values[min(len(values) - 1, int(q * len(values)))] * scale, digits)
+
+        return {
+            "count": len(values),
+            "p50": pct(0.5),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "max": round(values[-1] * scale, digits),
+        }
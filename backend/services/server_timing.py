@@ -0,0 +1,129 @@
+"""
+Per-request latency breakdown, returned as a Server-Timing header.
+The outermost middleware opens a timing context (a contextvar, so it follows sync
+routes into the threadpool); the hot layers add their time to it:
+- jwt        token decode (rate-limit middleware + auth dependency)
+- ratelimit  rate-limit checks, including their Redis round trips
+- redis      every Redis round trip (TimedRedis / pipelines)
+- db-pool    connection checkout (InstrumentedQueuePool)
+- db         SQL execution (query profiler hooks)
+- db-close   session teardown in get_db (rollback + return to pool)
+- endpoint   the route function itself
+- serialize  response model validation + rendering (TimedRoute)
+- total      whole request, as seen by the app
+Phases nest and overlap (ratelimit contains redis, endpoint contains db), so
+they are not meant to add up to total.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger("server_timing")
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "true").lower() == "true"
+# Requests slower than this also log their breakdown (0 = never)
+SERVER_TIMING_LOG_MS = float(os.getenv("SERVER_TIMING_LOG_MS", 1000))
+
+
+class RequestTiming:
+    """Accumulated seconds per phase for one request"""
+
+    __slots__ = ("phases", "endpoint_end")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items())
+
+    def breakdown_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add time to the current request's phase (no-op outside a request)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def request_timing():
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def _endpoint_finished(start: float) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.endpoint_end = time.perf_counter()
+        timing.add("endpoint", timing.endpoint_end - start)
+
+
+def _timed_endpoint(call):
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _endpoint_finished(start)
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _endpoint_finished(start)
+    return endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits handler time into endpoint and serialization
+    (everything FastAPI does after the endpoint returns: response_model
+    validation, JSON rendering, yield-dependency teardown).
+    """
+
+    def get_route_handler(self):
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timing = _current.get()
+            if timing is not None and timing.endpoint_end is not None:
+                timing.add("serialize", time.perf_counter() - timing.endpoint_end)
+            return response
+
+        return timed_handler
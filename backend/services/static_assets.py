@@ -0,0 +1,199 @@
+"""
+Static file serving with cache-friendly headers.
+- Assets are versioned by content hash (`?v=<hash>` or sha256 file names), so
+  clients may cache them forever and URLs only change when the bytes change.
+- ETags are content hashes, so revalidation survives redeploys (mtime changes).
+- Precompressed `.br` / `.gz` siblings are served when the client accepts them.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import stat
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+logger = logging.getLogger("static_assets")
+
+# backend/static - not cwd-relative: the app may be started from outside backend/
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+# <64 hex sha256>[_variant].<ext>
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.[a-z0-9]+$")
+
+# Accept-Encoding token -> precompressed sibling suffix (in preference order)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Only text formats benefit from compression (images are already compressed)
+COMPRESSIBLE_EXTENSIONS = {".svg", ".css", ".js", ".json", ".txt", ".html", ".xml"}
+
+VERSION_LENGTH = 12
+
+# path -> (mtime_ns, size, sha256 hex)
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+
+
+def is_content_addressed(path: str) -> bool:
+    return bool(CONTENT_ADDRESSED_NAME.match(os.path.basename(path)))
+
+
+def file_hash(path: str, stat_result: Optional[os.stat_result] = None) -> str:
+    """SHA-256 of a file, cached until its mtime/size changes"""
+    stat_result = stat_result or os.stat(path)
+    cached = _hash_cache.get(path)
+    if cached and cached[0] == stat_result.st_mtime_ns and cached[1] == stat_result.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    _hash_cache[path] = (stat_result.st_mtime_ns, stat_result.st_size, value)
+    return value
+
+
+def asset_version(path: str) -> str:
+    """Short content version used in `?v=` query strings"""
+    return file_hash(path)[:VERSION_LENGTH]
+
+
+def versioned_url(static_dir: str, relative_path: str, mount_path: str = "/static") -> str:
+    """`/static/<relative_path>?v=<content hash>` - only changes when the file changes"""
+    version = asset_version(os.path.join(static_dir, relative_path))
+    return f"{mount_path}/{relative_path}?v={version}"
+
+
+def precompress_directory(directory: str) -> int:
+    """
+    Write `.gz` siblings for compressible assets that are missing or stale.
+    (`.br` siblings are served too, but must be produced by the deploy tooling.)
+
+    Returns:
+        Number of files compressed
+    """
+    compressed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            target = source + ".gz"
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                continue
+
+            # Write to a temp file first - several workers may start at once
+            fd, tmp_path = tempfile.mkstemp(dir=root, prefix=".gz-")
+            try:
+                with open(source, "rb") as src, os.fdopen(fd, "wb") as raw:
+                    with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as out:
+                        shutil.copyfileobj(src, out)
+                os.replace(tmp_path, target)
+                compressed += 1
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+    if compressed:
+        logger.info(f"Precompressed {compressed} static assets in {directory}")
+    return compressed
+
+
+def warm_hash_cache(directory: str) -> int:
+    """
+    Hash every asset that is not content-addressed (startup, off the event loop), so
+    ETags and `?v=` versions are cache hits from the first request.
+
+    Returns:
+        Number of files hashed
+    """
+    hashed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith((".gz", ".br")) or name.startswith(".") or is_content_addressed(path):
+                continue
+            file_hash(path)
+            hashed += 1
+    return hashed
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for token in headers.get("accept-encoding", "").split(","):
+        name, _, params = token.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name.lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with content-hash versioning:
+    - immutable caching for sha256-named files and `?v=` URLs matching the current content
+    - content-hash ETags (If-None-Match -> 304)
+    - precompressed variants picked by Accept-Encoding
+    """
+
+    def lookup_path(self, path):
+        # Runs in a worker thread: hash a new/changed file here, so file_response
+        # (called on the event loop) only ever reads the hash cache
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode) and not is_content_addressed(full_path):
+            file_hash(full_path, stat_result)
+        return full_path, stat_result
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+
+        served_path, served_stat, encoding = full_path, stat_result, None
+        accepted = _accepted_encodings(request_headers)
+        for token, suffix in PRECOMPRESSED_ENCODINGS:
+            candidate = full_path + suffix
+            if token in accepted and os.path.isfile(candidate):
+                served_path, served_stat, encoding = candidate, os.stat(candidate), token
+                break
+
+        if is_content_addressed(full_path):
+            digest = os.path.basename(full_path)[:64]  # The name is the hash
+        else:
+            digest = file_hash(full_path, stat_result)
+        headers = {
+            # One validator per representation: same content, different encodings
+            "etag": f'"{digest[:32]}{"-" + encoding if encoding else ""}"',
+            "vary": "Accept-Encoding",
+        }
+
+        version = QueryParams(scope.get("query_string", b"")).get("v")
+        if is_content_addressed(full_path) or version == digest[:VERSION_LENGTH]:
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["cache-control"] = DEFAULT_CACHE_CONTROL
+
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        response = FileResponse(
+            served_path,
+            status_code=status_code,
+            stat_result=served_stat,
+            headers=headers,
+            # Media type comes from the original name, not the .gz/.br sibling
+            media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
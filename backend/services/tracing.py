@@ -0,0 +1,200 @@
+"""
+End-to-end tracing: HTTP request -> SQL -> pub/sub -> realtime delivery.
+A sampled request opens a trace (continuing an incoming W3C `traceparent`), held
+in a contextvar so it follows sync routes into the threadpool. SQL statements
+become child spans, published events carry the trace in their payload
+(`traceparent` + `trace_start`), and whichever worker writes the event to a
+client's SSE stream or WebSocket closes it with a `realtime.deliver` span.
+
+The delivery span's notification_latency_ms (request start -> frame written) also
+feeds campuseats_notification_latency_seconds. Spans are JSON lines appended to
+TRACE_FILE by a background thread (same non-blocking queue as the app logs), a
+format a collector's file receiver can tail; the file is size-rotated.
+Timestamps are wall clock: latency across hosts is only as good as their clock sync.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Optional, Tuple
+
+from core.logging_config import AsyncQueueHandler
+from services import metrics
+
+# Fraction of requests traced (0 = off). While on, an incoming sampled traceparent is
+# also traced; at 0 no client header can switch tracing (and span writes) on
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+# TRACE_FILE rotates at this size, keeping TRACE_FILE_BACKUPS old files
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", 50 * 1024 * 1024))
+TRACE_FILE_BACKUPS = int(os.getenv("TRACE_FILE_BACKUPS", 3))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_span_logger = logging.getLogger("tracing.spans")
+_span_logger.propagate = False
+_span_logger.setLevel(logging.INFO)
+_exporter: Optional[AsyncQueueHandler] = None
+_exporter_lock = threading.Lock()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header, or None"""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """One timed operation; exported when finished"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "trace_start", "start", "end", "attributes")
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                 trace_start: Optional[float] = None, start: Optional[float] = None):
+        self.name = name
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        # When the traced user action began (the root request), for end-to-end latency
+        self.trace_start = self.start if trace_start is None else trace_start
+        self.end: Optional[float] = None
+        self.attributes: dict = {}
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def child(self, name: str, start: Optional[float] = None) -> "Span":
+        return Span(name, self.trace_id, self.span_id, self.trace_start, start)
+
+    def finish(self, end: Optional[float] = None) -> None:
+        if self.end is not None:
+            return  # Already exported (request spans end when the response starts)
+        self.end = time.time() if end is None else end
+        _export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "pid": os.getpid(),
+            "attributes": self.attributes,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def _export(span: Span) -> None:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = AsyncQueueHandler(RotatingFileHandler(
+                    TRACE_FILE, maxBytes=TRACE_FILE_MAX_BYTES, backupCount=TRACE_FILE_BACKUPS
+                ))
+                _span_logger.addHandler(_exporter)
+    _span_logger.info(json.dumps(span.to_dict(), default=str))
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def request_span(method: str, path: str, traceparent: Optional[str] = None):
+    """Root span for one HTTP request; yields None when the request is not sampled"""
+    parent = parse_traceparent(traceparent) if TRACE_SAMPLE_RATE > 0 else None
+    if parent is not None and parent[2]:
+        span = Span(f"HTTP {method}", trace_id=parent[0], parent_id=parent[1])
+    elif TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE:
+        span = Span(f"HTTP {method}")
+    else:
+        yield None
+        return
+    span.attributes.update({"method": method, "path": path})
+    token = _current.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        span.finish()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of the current one (no-op outside a sampled trace)"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name)
+    child.attributes.update(attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def record_span(name: str, seconds: float, **attributes) -> None:
+    """Export an already-finished child span that took `seconds` (e.g. from SQL hooks)"""
+    parent = _current.get()
+    if parent is None:
+        return
+    end = time.time()
+    child = parent.child(name, start=end - seconds)
+    child.attributes.update(attributes)
+    child.finish(end)
+
+
+def inject(event: dict) -> dict:
+    """Event payload carrying the current trace (a copy), or the event unchanged"""
+    current = _current.get()
+    if current is None:
+        return event
+    return {**event, "traceparent": current.traceparent, "trace_start": current.trace_start}
+
+
+def finish_delivery(data: str, transport: str, start: float) -> None:
+    """Close the trace a realtime event carried, once its frame was written to a client"""
+    if '"traceparent"' not in data:  # Untraced events skip the JSON parse
+        return
+    try:
+        event = json.loads(data)
+        trace_id, parent_id, _ = parse_traceparent(event["traceparent"])
+        trace_start = float(event["trace_start"])
+    except (ValueError, TypeError, KeyError):
+        return
+    delivered = Span("realtime.deliver", trace_id, parent_id, trace_start, start)
+    end = time.time()
+    latency = end - trace_start
+    delivered.attributes.update({"transport": transport, "notification_latency_ms": round(latency * 1000, 1)})
+    metrics.NOTIFICATION_LATENCY_SECONDS.labels(transport).observe(latency)
+    delivered.finish(end)
+
+
+def shutdown_tracing() -> None:
+    """Flush queued spans (shutdown)"""
+    if _exporter is not None:
+        _exporter.stop()
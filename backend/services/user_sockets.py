@@ -0,0 +1,60 @@
+"""
+Per-user registry of this worker's authenticated realtime sockets.
+Maps user_id -> hub subscriptions of the user's connected devices, so the
+per-user connection cap is enforced without scanning every connection.
+"""
+
+import logging
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Set
+
+from services.event_hub import Subscription
+
+logger = logging.getLogger("user_sockets")
+
+MAX_SOCKETS_PER_USER = int(os.getenv("REALTIME_MAX_SOCKETS_PER_USER", 5))
+
+
+class TooManySockets(Exception):
+    """The user already has MAX_SOCKETS_PER_USER sockets on this worker"""
+
+
+class UserSocketRegistry:
+    def __init__(self, max_per_user: int = MAX_SOCKETS_PER_USER):
+        self.max_per_user = max_per_user
+        self._sockets: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    def register(self, user_id: int, sub: Subscription) -> None:
+        if len(self._sockets[user_id]) >= self.max_per_user:
+            raise TooManySockets()
+        self._sockets[user_id].add(sub)
+
+    def unregister(self, user_id: int, sub: Subscription) -> None:
+        sockets = self._sockets.get(user_id)
+        if sockets is not None:
+            sockets.discard(sub)
+            if not sockets:
+                del self._sockets[user_id]
+
+    @contextmanager
+    def registered(self, user_id: int, sub: Subscription):
+        self.register(user_id, sub)
+        try:
+            yield
+        finally:
+            self.unregister(user_id, sub)
+
+    def sockets(self, user_id: int) -> List[Subscription]:
+        return list(self._sockets.get(user_id, ()))
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._sockets),
+            "sockets": sum(len(s) for s in self._sockets.values()),
+        }
+
+
+# Global per-worker instance
+user_sockets = UserSocketRegistry()
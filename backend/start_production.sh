@@ -46,9 +46,8 @@ gunicorn main:app \
     --workers $WORKERS \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8000 \
-    --timeout 120 \
+    --timeout 30 \
     --keep-alive 5 \
-    --access-logfile logs/access.log \
     --error-logfile logs/error.log \
     --log-level info \
     --preload \
@@ -59,10 +58,9 @@ gunicorn main:app \
 # --workers: Number of worker processes (handles concurrent requests)
 # --worker-class: Use Uvicorn workers (async support)
 # --bind: Listen on all interfaces, port 8000
-# --timeout: Request timeout (2 minutes for slow auth)
+# --timeout: Worker timeout (bcrypt runs in a dedicated process pool)
 # --keep-alive: Keep connections alive for 5 seconds
-# --access-logfile: Log all requests
-# --error-logfile: Log errors
+# --error-logfile: Log errors (requests are logged by the app as sampled JSON lines)
 # --preload: Load app before forking (faster startup)
 # --max-requests: Restart worker after 1000 requests (prevent memory leaks)
 # --max-requests-jitter: Add randomness to prevent all workers restarting at once
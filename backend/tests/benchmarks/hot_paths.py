@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Micro-Benchmarks for Campus Eats
+Runs the backend's hottest code paths in-process on one machine - no server, no
+locust - against SQLite (default, in-memory) or Postgres (--database-url) and an
+in-process Redis stand-in (fakeredis; --redis-url for a real local Redis):
+- get_menu (in-memory cache hit, and miss -> DB + model validation)
+- create_order at 1 / 5 / 20 item carts
+- check_rate_limit (Redis INCR + EXPIRE)
+- get_current_user JWT decode
+- schemas.Order serialization of 100 / 1000 orders (response_model path)
+- publish_order_update (serialize + pipelined XADD/PUBLISH)
+
+Each benchmark runs for --seconds after a warmup; per-call times are reported
+(median, p95, mean, min) and can be saved as a JSON baseline. --compare fails
+(exit 1) when any benchmark's median regresses past --threshold.
+
+Usage:
+    python3 tests/benchmarks/hot_paths.py --save tests/reports/bench_baseline.json
+    python3 tests/benchmarks/hot_paths.py --compare tests/reports/bench_baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # App engine is unused; benchmarks bind their own
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core import auth
+from db import models, schemas
+from db.session import Base
+from routers import menu, orders
+from services import pubsub, rate_limiter
+from services.cache import menu_cache
+from services.redis import TimedRedis, redis_client
+
+MENU_ITEMS = 50
+CART_SIZES = (1, 5, 20)
+SERIALIZED_ORDERS = (100, 1000)
+WARMUP_CALLS = 20
+MIN_CALLS = 30
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(fn: Callable[[], object], seconds: float) -> Dict[str, float]:
+    """Time individual calls of fn for about `seconds` (at least MIN_CALLS)"""
+    for _ in range(WARMUP_CALLS):
+        fn()
+    samples = []
+    clock = time.perf_counter
+    deadline = clock() + seconds
+    while clock() < deadline or len(samples) < MIN_CALLS:
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    us = [s * 1e6 for s in samples]
+    return {
+        "calls": len(us),
+        "median_us": round(percentile(us, 0.5), 2),
+        "p95_us": round(percentile(us, 0.95), 2),
+        "mean_us": round(sum(us) / len(us), 2),
+        "min_us": round(min(us), 2),
+    }
+
+
+def run_sync(coro):
+    """Drive a coroutine that never suspends (get_current_user) without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+@contextmanager
+def bench_environment(database_url: str, redis_url: Optional[str]):
+    """Seeded database session + Redis stand-in behind the global client (restored on exit)"""
+    if database_url.startswith("sqlite"):
+        engine = create_engine(database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        # Tables are dropped afterwards: never point this at a real database
+        if not any(word in database_url.rsplit("/", 1)[-1] for word in ("bench", "test")):
+            sys.exit("❌ Refusing to use a database whose name has no 'bench'/'test' in it (tables are dropped)")
+        engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    if redis_url:
+        client = TimedRedis.from_url(redis_url, decode_responses=True)
+    else:
+        import fakeredis
+        client = TimedRedis(connection_pool=fakeredis.FakeRedis(decode_responses=True).connection_pool)
+    original_client = redis_client.client
+    redis_client.client = client
+
+    try:
+        user = models.User(username="bench_student", hashed_password="x", role="student")
+        db.add(user)
+        db.add_all(
+            models.MenuItem(name=f"Bench item {i}", price=10, category="Bench", is_available=True)
+            for i in range(MENU_ITEMS)
+        )
+        db.commit()
+        yield db, user
+    finally:
+        redis_client.client = original_client
+        menu_cache.invalidate()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def build_benchmarks(db, user) -> Dict[str, Callable[[], object]]:
+    current_user = {"id": user.id, "username": user.username, "role": user.role}
+    item_ids = [item.id for item in db.query(models.MenuItem).all()]
+    token = auth.create_access_token({"sub": user.username, "role": user.role, "id": user.id})
+
+    def menu_hit():
+        return menu.get_menu(db)
+
+    def menu_miss():
+        menu_cache.invalidate()
+        return menu.get_menu(db)
+
+    def create_order(size):
+        cart = schemas.OrderCreate(items=[{"menu_item_id": i, "quantity": 1} for i in item_ids[:size]])
+        return lambda: orders.create_order(cart, db, current_user)
+
+    calls = iter(range(10**9))
+
+    def rate_limit():
+        # A new client per call: every call takes the INCR + EXPIRE path without hitting the limit
+        return rate_limiter.check_rate_limit(None, f"10.0.{next(calls)}", "menu_read")
+
+    def jwt_decode():
+        return run_sync(auth.get_current_user(token))
+
+    order_list = TypeAdapter(List[schemas.Order])
+
+    def serialize(count):
+        created = datetime.now()
+        rows = [
+            models.Order(
+                id=n, user_id=user.id, status="Preparing", total_amount=30, created_at=created, otp="1234",
+                items=[models.OrderItem(id=n * 3 + k, order_id=n, menu_item_id=item_ids[k], quantity=1, price=10)
+                       for k in range(3)],
+            )
+            for n in range(count)
+        ]
+        # What FastAPI does for response_model=List[schemas.Order]: validate from ORM objects, dump to JSON
+        return lambda: order_list.dump_json(order_list.validate_python(rows, from_attributes=True))
+
+    def publish():
+        pubsub.publish_order_update(1, user.id, "Ready")
+
+    benchmarks = {"get_menu_hit": menu_hit, "get_menu_miss": menu_miss}
+    benchmarks.update({f"create_order_{size}_items": create_order(size) for size in CART_SIZES})
+    benchmarks["check_rate_limit"] = rate_limit
+    benchmarks["get_current_user_jwt"] = jwt_decode
+    benchmarks.update({f"serialize_{count}_orders": serialize(count) for count in SERIALIZED_ORDERS})
+    benchmarks["publish_order_update"] = publish
+    return benchmarks
+
+
+def run(database_url: str = "sqlite://", redis_url: Optional[str] = None, seconds: float = 1.0,
+        only: Optional[List[str]] = None) -> dict:
+    results = {}
+    with bench_environment(database_url, redis_url) as (db, user):
+        menu.get_menu(db)  # Fill the in-memory cache for the hit path
+        for name, fn in build_benchmarks(db, user).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = measure(fn, seconds)
+            print(f"   {name:<28} median {results[name]['median_us']:>10.1f}us   p95 {results[name]['p95_us']:>10.1f}us")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "database": database_url.split("://")[0],
+        "redis": "redis" if redis_url else "fakeredis",
+        "seconds_per_benchmark": seconds,
+        "benchmarks": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, cwd=BACKEND_DIR).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Print median deltas; return the benchmarks slower than baseline by more than threshold"""
+    print(f"\n📊 vs baseline {baseline.get('git_commit')} ({baseline.get('timestamp')})")
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if old is None:
+            print(f"   {name:<28} {'new':>10}")
+            continue
+        change = result["median_us"] / old["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌ REGRESSION"
+        print(f"   {name:<28} {old['median_us']:>10.1f} -> {result['median_us']:>10.1f}us  ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark backend hot paths")
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="Default: in-memory SQLite. Postgres: a throwaway *bench*/*test* database (tables are dropped)")
+    parser.add_argument("--redis-url", help="Real Redis (e.g. redis://localhost:6379/15); default: in-process fakeredis")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Measuring time per benchmark")
+    parser.add_argument("--only", nargs="*", help="Run benchmarks whose name contains any of these")
+    parser.add_argument("--save", help="Write results JSON here (a baseline)")
+    parser.add_argument("--compare", help="Baseline results JSON to gate against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    print("🏁 Campus Eats hot-path benchmarks")
+    results = run(args.database_url, args.redis_url, args.seconds, args.only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressed past {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ No regressions past {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Campus Day Scenario Library for Campus Eats
+Building blocks for realistic load runs (used by lunch_rush.py):
+- ArrivalCurve: a 07:30-19:30 campus day compressed into a few minutes, with
+  breakfast, lunch (dominant) and evening-snack peaks; sessions arrive as a
+  non-homogeneous Poisson process, plus "lunch bell" bursts of simultaneous orders
+- personas: browsing student (most traffic), ordering student (order -> pay ->
+  wait for Ready by long-poll, SSE or WebSocket), realtime subscriber (order screen
+  left open) and kitchen admins (poll orders, verify payments, advance statuses)
+- Recorder + SLOs: per-endpoint p50/p95/p99 and error rate (plus publish -> received
+  push latency per transport), checked against SLO targets and written as a JSON report
+
+Think times are exponential (memoryless, like real users), not uniform.
+"""
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+DAY_START_HOUR = 7.5
+DAY_END_HOUR = 19.5
+
+# (hour, relative height, width in hours) - lunch dominates
+PEAKS = ((8.75, 0.35, 0.5), (12.75, 1.0, 0.6), (16.25, 0.3, 0.5))
+BASELINE = 0.08
+
+# Lunch bell: (hour, orders placed at once)
+DEFAULT_BURSTS = ((12.5, 25), (13.0, 15))
+
+PERSONA_MIX = {"browser": 0.55, "orderer": 0.30, "subscriber": 0.15}
+
+# How an orderer waits for "Ready": long-poll, SSE, WebSocket
+WAIT_TRANSPORTS = (0.6, 0.2, 0.2)
+DONE = ("Ready", "Completed")
+
+# Latency in ms; endpoints without an entry are reported but not gated
+DEFAULT_SLOS = {
+    "GET /menu/": {"p95_ms": 300, "p99_ms": 800, "error_rate": 0.01},
+    "GET /menu/status": {"p95_ms": 300, "p99_ms": 800, "error_rate": 0.01},
+    "GET /orders/": {"p95_ms": 500, "p99_ms": 1200, "error_rate": 0.01},
+    "POST /orders/": {"p95_ms": 800, "p99_ms": 2000, "error_rate": 0.01},
+    "POST /payments/submit": {"p95_ms": 800, "p99_ms": 2000, "error_rate": 0.01},
+    "GET /orders/{order_id}?wait": {"error_rate": 0.01},  # Held open by design: no latency target
+    "POST /token": {"p95_ms": 1500, "p99_ms": 3000, "error_rate": 0.01},
+    "GET /admin/orders": {"p95_ms": 1000, "p99_ms": 2500, "error_rate": 0.01},
+    "POST /payments/verify": {"p95_ms": 800, "p99_ms": 2000, "error_rate": 0.01},
+    "PATCH /admin/orders/{order_id}/status": {"p95_ms": 800, "p99_ms": 2000, "error_rate": 0.01},
+    "SSE /events/orders/{user_id}": {"p95_ms": 500, "p99_ms": 1500, "error_rate": 0.01},  # Time to stream open
+    "WS /events/ws/user": {"p95_ms": 500, "p99_ms": 1500, "error_rate": 0.01},  # Time to SUBSCRIBED
+    "PUSH order update (SSE)": {"p95_ms": 500, "p99_ms": 1000},  # Publish -> received
+    "PUSH order update (WS)": {"p95_ms": 500, "p99_ms": 1000},
+}
+
+
+class ArrivalCurve:
+    """Session arrival rate over a compressed campus day"""
+
+    def __init__(self, duration: float, peak_rate: float, bursts=DEFAULT_BURSTS):
+        self.duration = duration
+        self.peak_rate = peak_rate
+        self.bursts = bursts
+
+    def hour(self, t: float) -> float:
+        return DAY_START_HOUR + (DAY_END_HOUR - DAY_START_HOUR) * t / self.duration
+
+    def at(self, t: float) -> float:
+        """Offset (seconds into the run) at which the day reaches `hour`"""
+        return (t - DAY_START_HOUR) / (DAY_END_HOUR - DAY_START_HOUR) * self.duration
+
+    def shape(self, hour: float) -> float:
+        return BASELINE + sum(h * math.exp(-0.5 * ((hour - mu) / w) ** 2) for mu, h, w in PEAKS)
+
+    def rate(self, t: float) -> float:
+        """Sessions per second at t seconds into the run"""
+        return self.peak_rate * self.shape(self.hour(t)) / self.shape(PEAKS[1][0])
+
+    def arrivals(self, rng: random.Random) -> List[float]:
+        """Session start offsets: Poisson thinning against the lunch-peak rate"""
+        ceiling = self.peak_rate * max(self.shape(self.hour(t)) for t in range(int(self.duration) + 1)) \
+            / self.shape(PEAKS[1][0])
+        times, t = [], 0.0
+        while True:
+            t += rng.expovariate(ceiling)
+            if t >= self.duration:
+                return times
+            if rng.random() < self.rate(t) / ceiling:
+                times.append(t)
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+
+class Recorder:
+    """Per-endpoint latency samples and outcomes"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.sessions: Dict[str, int] = {}
+        self.events_received = 0
+        self.orders_placed = 0
+        self.orders_ready = 0
+
+    def record(self, name: str, seconds: float, status: str, ok: bool) -> None:
+        stats = self.endpoints.setdefault(name, EndpointStats())
+        stats.latencies_ms.append(seconds * 1000)
+        stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+        if not ok:
+            stats.errors += 1
+
+    def session(self, persona: str) -> None:
+        self.sessions[persona] = self.sessions.get(persona, 0) + 1
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def evaluate(recorder: Recorder, slos: Dict[str, dict]) -> Tuple[Dict[str, dict], List[str]]:
+    """Per-endpoint summary with SLO verdicts, and the list of violations"""
+    endpoints, violations = {}, []
+    for name, stats in sorted(recorder.endpoints.items()):
+        count = len(stats.latencies_ms)
+        summary = {
+            "count": count,
+            "errors": stats.errors,
+            "error_rate": round(stats.errors / count, 4) if count else 0.0,
+            "status_codes": stats.status_codes,
+            "p50_ms": percentile(stats.latencies_ms, 0.50),
+            "p95_ms": percentile(stats.latencies_ms, 0.95),
+            "p99_ms": percentile(stats.latencies_ms, 0.99),
+            "max_ms": round(max(stats.latencies_ms), 1) if count else None,
+        }
+        slo = slos.get(name)
+        if slo:
+            failed = [
+                f"{name}: {key} {summary[key]} > {target}"
+                for key, target in slo.items()
+                if summary.get(key) is not None and summary[key] > target
+            ]
+            summary["slo"] = slo
+            summary["passed"] = not failed
+            violations.extend(failed)
+        endpoints[name] = summary
+
+    for name in sorted(set(slos) - set(endpoints)):
+        endpoints[name] = {"count": 0, "slo": slos[name], "passed": None}  # Not exercised this run
+    return endpoints, violations
+
+
+def build_report(recorder: Recorder, slos: Dict[str, dict], config: dict) -> dict:
+    """Machine-readable run report; `passed` is False on any SLO violation"""
+    endpoints, violations = evaluate(recorder, slos)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": config,
+        "sessions": recorder.sessions,
+        "orders_placed": recorder.orders_placed,
+        "orders_ready": recorder.orders_ready,
+        "realtime_events_received": recorder.events_received,
+        "endpoints": endpoints,
+        "violations": violations,
+        "passed": not violations,
+    }
+
+
+@dataclass
+class Student:
+    id: int
+    username: str
+    token: str
+    ip: str
+
+    @property
+    def headers(self) -> dict:
+        # X-Forwarded-For: each student is its own device (per-IP limits, as behind the proxy)
+        return {"Authorization": f"Bearer {self.token}", "X-Forwarded-For": self.ip}
+
+
+class CampusDay:
+    """Runs one compressed day of traffic against base_url"""
+
+    def __init__(self, base_url: str, students: List[Student], admins: List[Student], password: str,
+                 duration: float = 300, peak_rate: float = 4.0, think: float = 2.0,
+                 bursts=DEFAULT_BURSTS, admin_writes_per_minute: int = 20, seed: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.students = students
+        self.admins = admins
+        self.password = password
+        self.curve = ArrivalCurve(duration, peak_rate, bursts)
+        self.think_mean = think
+        self.admin_writes_per_minute = admin_writes_per_minute
+        self.rng = random.Random(seed)
+        self.recorder = Recorder()
+        self.menu_ids: List[int] = []
+        self._utr = 0
+        self._busy = set()
+        self._start = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # --- helpers ---
+
+    def remaining(self) -> float:
+        return self.curve.duration - (time.monotonic() - self._start)
+
+    async def think(self, scale: float = 1.0) -> None:
+        await asyncio.sleep(min(self.rng.expovariate(1 / (self.think_mean * scale)), max(self.remaining(), 0)))
+
+    async def request(self, name: str, method: str, path: str, user: Student, ok_codes=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self._client.request(method, path, headers=user.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(name, time.perf_counter() - start, type(e).__name__, False)
+            return None
+        self.recorder.record(name, time.perf_counter() - start, str(response.status_code),
+                             response.status_code in ok_codes)
+        return response
+
+    # --- personas ---
+
+    async def browser(self, student: Student) -> None:
+        for _ in range(self.rng.randint(1, 4)):
+            await self.request("GET /menu/", "GET", "/menu/", student)
+            await self.think()
+        await self.request("GET /menu/status", "GET", "/menu/status", student)
+        if self.rng.random() < 0.4:
+            await self.request("GET /orders/", "GET", "/orders/", student)
+
+    async def orderer(self, student: Student, burst: bool = False) -> None:
+        if self.rng.random() < 0.1:  # Session expired: log in again (bcrypt)
+            await self.request("POST /token", "POST", "/token", student,
+                               data={"username": student.username, "password": self.password})
+        if not burst:
+            await self.request("GET /menu/", "GET", "/menu/", student)
+            await self.think()
+
+        items = [{"menu_item_id": i, "quantity": self.rng.randint(1, 2)}
+                 for i in self.rng.sample(self.menu_ids, self.rng.randint(1, 3))]
+        response = await self.request("POST /orders/", "POST", "/orders/", student, json={"items": items})
+        if response is None or response.status_code != 200:
+            return
+        order = response.json()
+        self.recorder.orders_placed += 1
+
+        await self.think(0.25 if burst else 1.0)  # Paying in the UPI app
+        self._utr += 1
+        response = await self.request("POST /payments/submit", "POST", "/payments/submit", student,
+                                      json={"order_id": order["id"], "utr": f"LUNCH{self._utr:08d}"})
+        if response is None or response.status_code != 200:
+            return
+
+        status = response.json()["status"]
+        transport = self.rng.choices(("long_poll", "sse", "websocket"), WAIT_TRANSPORTS)[0]
+        if transport == "sse":
+            await self._sse(student, self.remaining(), order["id"])
+            return
+        if transport == "websocket":
+            await self._websocket(student, self.remaining(), order["id"])
+            return
+        while status not in DONE and self.remaining() > 1:
+            wait = int(min(20, self.remaining()))
+            response = await self.request(
+                "GET /orders/{order_id}?wait", "GET", f"/orders/{order['id']}", student,
+                params={"wait": wait, "known_status": status}, timeout=wait + 10,
+            )
+            if response is None or response.status_code != 200:
+                return
+            status = response.json()["status"]
+
+    async def subscriber(self, student: Student) -> None:
+        """Order screen left open: holds a stream without an order in flight"""
+        hold = min(self.rng.expovariate(1 / 30), max(self.remaining(), 0))
+        if self.rng.random() < 0.5:
+            await self._sse(student, hold)
+        else:
+            await self._websocket(student, hold)
+
+    def _order_update(self, name: str, payload: dict, order_id: Optional[int]) -> bool:
+        """Record push latency (publish timestamp -> received); True once order_id is done"""
+        self.recorder.events_received += 1
+        published = datetime.fromisoformat(payload["timestamp"])
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # Publisher stamps naive UTC
+        self.recorder.record(name, max((now - published).total_seconds(), 0), "delivered", True)
+        return payload.get("order_id") == order_id and payload.get("status") in DONE
+
+    async def _sse(self, student: Student, hold: float, order_id: Optional[int] = None) -> None:
+        name = "SSE /events/orders/{user_id}"
+        start = time.perf_counter()
+
+        async def stream():
+            async with self._client.stream("GET", f"/events/orders/{student.id}", headers=student.headers,
+                                           timeout=httpx.Timeout(10, read=None)) as response:
+                if response.status_code != 200:
+                    self.recorder.record(name, time.perf_counter() - start, str(response.status_code), False)
+                    return
+                self.recorder.record(name, time.perf_counter() - start, "200", True)
+                async for line in response.aiter_lines():
+                    if line.startswith("data:") and line[5:].strip() != "{}":
+                        if self._order_update("PUSH order update (SSE)", json.loads(line[5:]), order_id):
+                            return
+
+        try:
+            await asyncio.wait_for(stream(), max(hold, 0.1))
+        except asyncio.TimeoutError:
+            pass  # Held for the whole session
+        except httpx.HTTPError as e:
+            self.recorder.record(name, time.perf_counter() - start, type(e).__name__, False)
+
+    async def _websocket(self, student: Student, hold: float, order_id: Optional[int] = None) -> None:
+        name = "WS /events/ws/user"
+        url = "ws" + self.base_url[4:] + "/events/ws/user"
+        start = time.perf_counter()
+        try:
+            async with websockets.connect(url, additional_headers=student.headers, open_timeout=10) as ws:
+                first = json.loads(await asyncio.wait_for(ws.recv(), 10))
+                ok = first.get("type") == "SUBSCRIBED"
+                self.recorder.record(name, time.perf_counter() - start, "SUBSCRIBED" if ok else "unexpected", ok)
+                deadline = time.monotonic() + hold
+                while (left := deadline - time.monotonic()) > 0:
+                    try:
+                        message = json.loads(await asyncio.wait_for(ws.recv(), left))
+                    except asyncio.TimeoutError:
+                        break
+                    if message.get("type") == "PING":
+                        await ws.send(json.dumps({"type": "PONG"}))
+                    elif message.get("type") == "ORDER_UPDATE":
+                        if self._order_update("PUSH order update (WS)", message["payload"], order_id):
+                            return
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+            self.recorder.record(name, time.perf_counter() - start, type(e).__name__, False)
+
+    async def admin(self, admin: Student, index: int) -> None:
+        """Kitchen counter: each admin handles its share of orders (id % admins)"""
+        preparing_since: Dict[int, float] = {}
+        next_write = 0.0
+
+        async def write(name, method, path, **kwargs):
+            # Stay inside the admin_write budget like a real dashboard user would
+            nonlocal next_write
+            await asyncio.sleep(max(0.0, next_write - time.monotonic()))
+            next_write = time.monotonic() + 60 / self.admin_writes_per_minute
+            return await self.request(name, method, path, admin, **kwargs)
+
+        while self.remaining() > 0:
+            response = await self.request("GET /admin/orders", "GET", "/admin/orders", admin)
+            if response is not None and response.status_code == 200:
+                for order in reversed(response.json()):  # Oldest first
+                    if order["id"] % len(self.admins) != index or self.remaining() <= 0:
+                        continue
+                    if order["status"] == "Pending_Verification":
+                        await write("POST /payments/verify", "POST", "/payments/verify",
+                                    json={"order_id": order["id"], "verified_by": admin.username})
+                        continue
+                    next_status = {"Paid": "Preparing", "Ready": "Completed"}.get(order["status"])
+                    if order["status"] == "Preparing":
+                        started = preparing_since.setdefault(order["id"], time.monotonic())
+                        if time.monotonic() - started < self.think_mean * 2:  # Cooking
+                            continue
+                        next_status = "Ready"
+                    if next_status:
+                        response = await write("PATCH /admin/orders/{order_id}/status", "PATCH",
+                                               f"/admin/orders/{order['id']}/status", json={"status": next_status})
+                        if next_status == "Ready" and response is not None and response.status_code == 200:
+                            self.recorder.orders_ready += 1
+            await asyncio.sleep(min(3.0, max(self.remaining(), 0)))
+
+    # --- run ---
+
+    def _idle_student(self) -> Optional[Student]:
+        """One session per student at a time (one phone each)"""
+        idle = [s for s in self.students if s.id not in self._busy]
+        if not idle:
+            return None
+        student = self.rng.choice(idle)
+        self._busy.add(student.id)
+        return student
+
+    async def _session(self, student: Student, session) -> None:
+        try:
+            await session
+        finally:
+            self._busy.discard(student.id)
+
+    async def run(self) -> Recorder:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30) as client:
+            self._client = client
+            menu = (await client.get("/menu/", headers=self.admins[0].headers)).json()
+            self.menu_ids = [item["id"] for item in menu if item.get("is_available", True)]
+
+            self._start = time.monotonic()
+            tasks = [asyncio.create_task(self.admin(a, i)) for i, a in enumerate(self.admins)]
+            schedule = [(t, None) for t in self.curve.arrivals(self.rng)]
+            for hour, count in self.curve.bursts:
+                schedule.extend((self.curve.at(hour), "burst") for _ in range(count))
+            schedule.sort(key=lambda s: s[0])
+
+            personas, weights = zip(*PERSONA_MIX.items())
+            for offset, kind in schedule:
+                delay = offset - (time.monotonic() - self._start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                persona = "burst_orderer" if kind == "burst" else self.rng.choices(personas, weights)[0]
+                student = self._idle_student()
+                if student is None:
+                    self.recorder.session("dropped_no_idle_student")
+                    continue
+                self.recorder.session(persona)
+                session = self.orderer(student, burst=True) if kind == "burst" else getattr(self, persona)(student)
+                tasks.append(asyncio.create_task(self._session(student, session)))
+
+            await asyncio.gather(*tasks)
+        return self.recorder
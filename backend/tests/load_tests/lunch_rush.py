@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Lunch-Rush Load Scenario for Campus Eats
+Runs one compressed campus day (tests/load_tests/campus_day.py) headless and gates
+it on per-endpoint SLOs: p95/p99 latency and error rate. Exit code 1 on any violation;
+the JSON report (--out) has per-endpoint percentiles, status codes and verdicts.
+
+Without --base-url the whole stack runs locally: an in-process Redis stand-in
+(fakeredis TCP server), a throwaway SQLite database (or --database-url), seeded
+students/admins/menu, and uvicorn with rate limits ON and X-Forwarded-For trusted so
+every simulated student gets its own IP.
+
+Needs requirements-dev.txt (fakeredis) for the local stack.
+
+Usage:
+    python3 tests/load_tests/lunch_rush.py                          # ~5 minute day, local stack
+    python3 tests/load_tests/lunch_rush.py --duration 60 --peak-rate 2 --out /tmp/smoke.json
+    python3 tests/load_tests/lunch_rush.py --slo my_slos.json       # override/add endpoint SLOs
+    # Against a deployed server (loadtest users from scripts/seed_load_test_users.py + an admin)
+    python3 tests/load_tests/lunch_rush.py --base-url http://localhost:8000 \\
+        --admin-user admin --admin-password '...'
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from campus_day import DEFAULT_BURSTS, DEFAULT_SLOS, CampusDay, Student, build_report  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STUDENT_PASSWORD = "test123456"  # Matches scripts/seed_load_test_users.py
+LOGIN_CONCURRENCY = 8  # bcrypt: don't let setup logins become their own load test
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed(database_url: str, students: int, admins: int) -> None:
+    """Tables, menu, loadtest students and admins in a fresh database"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("JWT_SECRET", "lunch-rush-secret")
+    sys.path.insert(0, BACKEND_DIR)
+    from core.auth import get_password_hash
+    from db import models
+    from db import session as database
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        hashed = get_password_hash(STUDENT_PASSWORD)  # One bcrypt for everyone
+        db.add_all(models.User(username=f"loadtest{i}", email=f"loadtest{i}@campus.edu",
+                               hashed_password=hashed, role="student") for i in range(1, students + 1))
+        db.add_all(models.User(username=f"loadtest_admin{i}", email=f"loadtest_admin{i}@campus.edu",
+                               hashed_password=hashed, role="admin") for i in range(1, admins + 1))
+        db.add_all(models.MenuItem(name=f"{category} item {i}", price=20 + 5 * i, category=category)
+                   for category in ("Breakfast", "Lunch", "Snacks", "Beverages") for i in range(6))
+        db.add(models.Setting(key="shop_status", value="open", category="shop"))
+        db.commit()
+    finally:
+        db.close()
+        database.engine.dispose()
+
+
+def _redis_stand_in(port: int):
+    """fakeredis over TCP. Its handler drops the connection after an error reply (e.g. EVAL
+    without Lua), which real Redis never does and which would trip the app's Redis circuit.
+    The fix-up hooks the 2.x handler's per-connection client; other versions run unpatched."""
+    import fakeredis
+    import redis
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    if fakeredis.__version__.split(".")[0] == "2":  # Tested with requirements-dev.txt's pin
+
+        class Handler(server.RequestHandlerClass):
+            def setup(self):
+                super().setup()
+                read_response = self.current_client.read_response
+
+                def reply_errors(*args, **kwargs):
+                    try:
+                        return read_response(*args, **kwargs)
+                    except redis.ResponseError as e:
+                        return e  # Written back as an error reply; the connection stays up
+
+                self.current_client.read_response = reply_errors
+
+        server.RequestHandlerClass = Handler
+    else:
+        print(f"⚠️  fakeredis {fakeredis.__version__}: error replies may drop connections (tested with 2.x)")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@contextmanager
+def local_stack(database_url: Optional[str], students: int, admins: int, workers: int, server_log: str):
+    """fakeredis TCP server + seeded database + uvicorn (output -> server_log); yields the base URL"""
+    redis_port = _free_port()
+    redis_server = _redis_stand_in(redis_port)
+
+    tmpdir = tempfile.TemporaryDirectory(prefix="lunch_rush_")
+    database_url = database_url or f"sqlite:///{tmpdir.name}/campuseats.db"
+    print(f"🌱 Seeding {students} students, {admins} admins -> {database_url.split('://')[0]}")
+    seed(database_url, students, admins)
+
+    port = _free_port()
+    log = open(server_log, "w")
+    env = dict(os.environ, DATABASE_URL=database_url, REDIS_HOST="127.0.0.1", REDIS_PORT=str(redis_port),
+               TESTING="false", LOG_LEVEL="WARNING")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--proxy-headers", "--forwarded-allow-ips", "*", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+        redis_server.shutdown()
+        redis_server.server_close()
+        tmpdir.cleanup()
+
+
+def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"❌ {base_url} not ready after {timeout:.0f}s")
+
+
+async def login_all(base_url: str, accounts: List[tuple]) -> List[Student]:
+    """Log every (n, username, password) in, each from its own X-Forwarded-For IP"""
+    gate = asyncio.Semaphore(LOGIN_CONCURRENCY)
+
+    async def login(client, n, username, password):
+        ip = f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"
+        async with gate:
+            response = await client.post("/token", data={"username": username, "password": password},
+                                         headers={"X-Forwarded-For": ip})
+        if response.status_code != 200:
+            sys.exit(f"❌ Login failed for {username}: {response.status_code} {response.text[:200]}")
+        token = response.json()["access_token"]
+        claims = json.loads(base64.urlsafe_b64decode(token.split(".")[1] + "=="))  # Only for the user id
+        return Student(id=claims["id"], username=username, token=token, ip=ip)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        return await asyncio.gather(*(login(client, n, u, p) for n, u, p in accounts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed campus-day load run with SLO gates")
+    parser.add_argument("--base-url", help="Running server; default: start a local stack")
+    parser.add_argument("--database-url", help="Local stack database, must be empty (default: throwaway SQLite)")
+    parser.add_argument("--workers", type=int, default=1, help="Local uvicorn workers (SQLite: keep 1)")
+    parser.add_argument("--duration", type=float, default=300, help="Seconds the 07:30-19:30 day is squeezed into")
+    parser.add_argument("--peak-rate", type=float, default=4.0, help="New sessions/second at the lunch peak")
+    parser.add_argument("--burst-size", type=int, default=DEFAULT_BURSTS[0][1],
+                        help="Orders placed at once when the lunch bell rings (12:30; 13:00 gets 60%%)")
+    parser.add_argument("--students", type=int, default=100, help="loadtest1..N (100 are seeded remotely)")
+    parser.add_argument("--admins", type=int, default=4, help="Kitchen dashboards verifying and advancing orders")
+    parser.add_argument("--admin-user", help="--base-url: admin username (repeat runs share one account)")
+    parser.add_argument("--admin-password", help="--base-url: admin password")
+    parser.add_argument("--think", type=float, default=2.0, help="Mean think time in seconds (exponential)")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible schedule")
+    parser.add_argument("--slo", help="JSON {endpoint: {p95_ms, p99_ms, error_rate}} merged over the defaults")
+    parser.add_argument("--out", default=os.path.join(BACKEND_DIR, "tests", "reports", "lunch_rush.json"))
+    args = parser.parse_args()
+
+    slos = dict(DEFAULT_SLOS)
+    if args.slo:
+        with open(args.slo) as f:
+            slos.update(json.load(f))
+    bursts = ((DEFAULT_BURSTS[0][0], args.burst_size), (DEFAULT_BURSTS[1][0], int(args.burst_size * 0.6)))
+
+    students = [(n, f"loadtest{n}", STUDENT_PASSWORD) for n in range(1, args.students + 1)]
+    if args.base_url:
+        if not (args.admin_user and args.admin_password):
+            sys.exit("❌ --base-url needs --admin-user and --admin-password")
+        admins = [(0, args.admin_user, args.admin_password)] * args.admins
+        stack = None
+    else:
+        admins = [(args.students + n, f"loadtest_admin{n}", STUDENT_PASSWORD) for n in range(1, args.admins + 1)]
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        server_log = os.path.splitext(args.out)[0] + "_server.log"
+        stack = local_stack(args.database_url, args.students, args.admins, args.workers, server_log)
+
+    print("🍱 Campus Eats lunch-rush scenario")
+    with stack or nullcontext(args.base_url) as base_url:
+        wait_ready(base_url)
+        logged_in = asyncio.run(login_all(base_url, students + admins))
+        day = CampusDay(base_url, logged_in[:len(students)], logged_in[len(students):], STUDENT_PASSWORD,
+                        duration=args.duration, peak_rate=args.peak_rate, think=args.think, bursts=bursts,
+                        seed=args.seed)
+        print(f"⏱  Running a {args.duration:.0f}s day (lunch peak {args.peak_rate}/s, bell bursts {bursts})")
+        recorder = asyncio.run(day.run())
+
+    config = {k: v for k, v in vars(args).items() if k not in ("admin_password",)}
+    config["target"] = args.base_url or "local"
+    report = build_report(recorder, slos, config)
+    report["git_commit"] = _git_commit()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)  # --base-url runs
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'endpoint':<40}{'count':>7}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for name, stats in report["endpoints"].items():
+        if not stats["count"]:
+            continue
+        mark = {True: "✅", False: "❌", None: "  "}[stats.get("passed")]
+        print(f"{name:<40}{stats['count']:>7}{stats['error_rate'] * 100:>7.1f}"
+              f"{stats['p50_ms']:>9.0f}{stats['p95_ms']:>9.0f}{stats['p99_ms']:>9.0f}  {mark}")
+    print(f"\nSessions {report['sessions']}, orders placed {report['orders_placed']}, "
+          f"ready {report['orders_ready']}, realtime events {report['realtime_events_received']}")
+    print(f"💾 Report written to {args.out}" + ("" if args.base_url else f" (server log: {server_log})"))
+
+    if report["violations"]:
+        print(f"\n❌ {len(report['violations'])} SLO violation(s):")
+        for violation in report["violations"]:
+            print(f"   {violation}")
+        sys.exit(1)
+    print("\n✅ All SLOs met")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, cwd=BACKEND_DIR).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Realtime Fan-out Benchmark for Campus Eats
+Opens thousands of /events/ws and SSE subscribers against a running server,
+publishes timestamped menu/shop/order events straight to Redis and measures:
+- end-to-end delivery latency (publish -> client receive) p50/p90/p99/max
+- delivery loss
+- server memory per connection (RSS of the server process tree, Linux /proc)
+- Redis connection count before/after connecting the clients
+
+Results are written as JSON so runs can be compared across changes (--compare).
+
+Usage:
+    python3 tests/load_tests/realtime_bench.py --ws-clients 2000 --sse-clients 1000 \\
+        --server-pid $(pgrep -o -f "uvicorn main:app") --out reports/realtime_baseline.json
+    python3 tests/load_tests/realtime_bench.py ... --compare reports/realtime_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import redis.asyncio as aioredis
+import websockets
+
+BENCH_ITEM_ID = 0  # Menu events carry item_id 0 so real clients ignore them
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50_ms": percentile(samples, 0.50),
+        "p90_ms": percentile(samples, 0.90),
+        "p99_ms": percentile(samples, 0.99),
+        "max_ms": round(max(samples), 2) if samples else None,
+    }
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """RSS (bytes) of pid and all its descendants - covers gunicorn master + workers"""
+    def rss(p):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    def children(p):
+        kids = []
+        try:
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    kids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+        return kids
+
+    if not os.path.exists(f"/proc/{pid}"):
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        total += rss(p)
+        stack.extend(children(p))
+    return total
+
+
+class Collector:
+    """Per-transport delivery bookkeeping"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {"ws": [], "sse": []}
+        self.received: Dict[str, int] = {"ws": 0, "sse": 0}
+        self.connected: Dict[str, int] = {"ws": 0, "sse": 0}
+        self.failed: Dict[str, int] = {"ws": 0, "sse": 0}
+        self.connect_ms: Dict[str, List[float]] = {"ws": [], "sse": []}
+
+    def record(self, transport: str, event: dict) -> None:
+        sent = event.get("bench_ts")
+        if sent is None:
+            return
+        self.received[transport] += 1
+        self.latencies[transport].append((time.time() - sent) * 1000)
+
+
+async def ws_client(url: str, collector: Collector, ready: asyncio.Event, gate: asyncio.Semaphore):
+    started = time.perf_counter()
+    try:
+        async with gate:
+            ws = await websockets.connect(url, ping_interval=None, open_timeout=30, max_queue=None)
+    except Exception:
+        collector.failed["ws"] += 1
+        return
+    collector.connect_ms["ws"].append((time.perf_counter() - started) * 1000)
+    collector.connected["ws"] += 1
+    try:
+        await ready.wait()
+        while True:  # Runs until cancelled
+            message = json.loads(await ws.recv())
+            if message.get("type") in ("MENU_UPDATE", "SHOP_STATUS"):
+                collector.record("ws", message.get("payload") or {})
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        await ws.close()
+
+
+async def _read_chunk(reader: asyncio.StreamReader) -> bytes:
+    """One HTTP/1.1 chunked transfer-encoding chunk"""
+    size_line = await reader.readline()
+    size = int(size_line.split(b";")[0].strip() or b"0", 16)
+    if size == 0:
+        raise ConnectionError("stream ended")
+    data = await reader.readexactly(size)
+    await reader.readexactly(2)  # CRLF
+    return data
+
+
+async def sse_client(base_url: str, path: str, token: Optional[str], collector: Collector,
+                     ready: asyncio.Event, gate: asyncio.Semaphore):
+    """Minimal SSE client on raw asyncio streams (thousands of them stay cheap)"""
+    parts = urlsplit(base_url)
+    started = time.perf_counter()
+    try:
+        async with gate:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parts.hostname, parts.port or 80), timeout=30
+            )
+            auth = f"Authorization: Bearer {token}\r\n" if token else ""
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: text/event-stream\r\n{auth}\r\n".encode()
+            )
+            status_line = await asyncio.wait_for(reader.readline(), timeout=30)
+            if b" 200 " not in status_line:
+                raise ConnectionError(status_line.decode(errors="replace").strip())
+            chunked = False
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                if line.lower().startswith(b"transfer-encoding:") and b"chunked" in line.lower():
+                    chunked = True
+    except Exception:
+        collector.failed["sse"] += 1
+        return
+    collector.connect_ms["sse"].append((time.perf_counter() - started) * 1000)
+    collector.connected["sse"] += 1
+
+    buffer = ""
+    try:
+        await ready.wait()
+        while True:  # Runs until cancelled
+            chunk = await (_read_chunk(reader) if chunked else reader.read(65536))
+            if not chunk:
+                break
+            buffer += chunk.decode()
+            while "\n\n" in buffer:
+                frame, buffer = buffer.split("\n\n", 1)
+                for line in frame.split("\n"):
+                    if line.startswith("data:"):
+                        try:
+                            collector.record("sse", json.loads(line[5:].strip()))
+                        except json.JSONDecodeError:
+                            pass
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def redis_client_count(redis) -> Optional[int]:
+    try:
+        info = await redis.info("clients")
+        return info["connected_clients"]
+    except Exception:
+        return None  # INFO disabled (managed Redis) or not supported
+
+
+async def publish_events(redis, count: int, interval: float, user_id: Optional[int]) -> int:
+    """Same channels/payload shapes as services.pubsub, plus a send timestamp"""
+    published = 0
+    for seq in range(count):
+        now = time.time()
+        kind = seq % 3
+        if kind == 0:
+            await redis.publish("menu_updates", json.dumps(
+                {"action": "updated", "item_id": BENCH_ITEM_ID, "bench_seq": seq, "bench_ts": now}))
+        elif kind == 1:
+            await redis.publish("shop_status", json.dumps(
+                {"status": "open", "bench_seq": seq, "bench_ts": now}))
+        elif user_id is not None:
+            await redis.publish(f"order_updates:user:{user_id}", json.dumps(
+                {"order_id": 0, "status": "Preparing", "bench_seq": seq, "bench_ts": now}))
+        published += 1
+        await asyncio.sleep(interval)
+    return published
+
+
+def expected_deliveries(args, ws_connected: int, sse_menu: int, sse_orders: int) -> Dict[str, int]:
+    """Messages each transport should receive given the published mix"""
+    menu = len(range(0, args.events, 3))
+    shop = len(range(1, args.events, 3))
+    orders = len(range(2, args.events, 3)) if args.user_id is not None else 0
+    return {
+        "ws": ws_connected * (menu + shop),
+        "sse": sse_menu * menu + sse_orders * orders,
+    }
+
+
+async def run(args) -> dict:
+    # Thousands of sockets need a raised descriptor limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    redis = aioredis.Redis(host=args.redis_host, port=args.redis_port, decode_responses=True)
+    redis_before = await redis_client_count(redis)
+    rss_before = process_tree_rss(args.server_pid) if args.server_pid else None
+
+    collector = Collector()
+    ready = asyncio.Event()
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    ws_url = args.base_url.replace("http", "ws", 1) + "/events/ws"
+
+    sse_orders = args.sse_clients // 2 if args.user_id is not None and args.token else 0
+    sse_menu = args.sse_clients - sse_orders
+    tasks = [asyncio.create_task(ws_client(ws_url, collector, ready, gate)) for _ in range(args.ws_clients)]
+    tasks += [
+        asyncio.create_task(sse_client(args.base_url, "/events/menu", None, collector, ready, gate))
+        for _ in range(sse_menu)
+    ]
+    tasks += [
+        asyncio.create_task(sse_client(
+            args.base_url, f"/events/orders/{args.user_id}", args.token, collector, ready, gate
+        ))
+        for _ in range(sse_orders)
+    ]
+
+    connect_started = time.perf_counter()
+    target = args.ws_clients + args.sse_clients
+    while sum(collector.connected.values()) + sum(collector.failed.values()) < target:
+        await asyncio.sleep(0.1)
+    connect_seconds = time.perf_counter() - connect_started
+    print(f"🔌 Connected {collector.connected} (failed {collector.failed}) in {connect_seconds:.1f}s")
+
+    await asyncio.sleep(args.settle)  # Let subscriptions register before publishing
+    rss_connected = process_tree_rss(args.server_pid) if args.server_pid else None
+    redis_connected = await redis_client_count(redis)
+
+    ready.set()
+    published = await publish_events(redis, args.events, args.interval, args.user_id)
+    await asyncio.sleep(args.drain)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await redis.aclose()
+
+    connections = collector.connected["ws"] + collector.connected["sse"]
+    expected = expected_deliveries(
+        args, collector.connected["ws"],
+        max(0, collector.connected["sse"] - sse_orders), min(sse_orders, collector.connected["sse"])
+    )
+    transports = {}
+    for transport in ("ws", "sse"):
+        transports[transport] = {
+            "clients": collector.connected[transport],
+            "failed": collector.failed[transport],
+            "connect_p50_ms": percentile(collector.connect_ms[transport], 0.50),
+            "connect_p99_ms": percentile(collector.connect_ms[transport], 0.99),
+            "expected": expected[transport],
+            "received": collector.received[transport],
+            "loss_pct": round(100 * (1 - collector.received[transport] / expected[transport]), 3)
+            if expected[transport] else None,
+            "latency": latency_summary(collector.latencies[transport]),
+        }
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "config": {
+            "base_url": args.base_url,
+            "ws_clients": args.ws_clients,
+            "sse_clients": args.sse_clients,
+            "events": args.events,
+            "interval": args.interval,
+        },
+        "published": published,
+        "connect_seconds": round(connect_seconds, 2),
+        "delivery": transports,
+        "latency_all": latency_summary(collector.latencies["ws"] + collector.latencies["sse"]),
+        "memory": {
+            "server_rss_before_mb": round(rss_before / 2**20, 1) if rss_before else None,
+            "server_rss_connected_mb": round(rss_connected / 2**20, 1) if rss_connected else None,
+            "per_connection_kb": round((rss_connected - rss_before) / connections / 1024, 2)
+            if rss_before and rss_connected and connections else None,
+        },
+        "redis_connections": {
+            "before": redis_before,
+            "connected": redis_connected,
+            "added": redis_connected - redis_before if None not in (redis_before, redis_connected) else None,
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+COMPARED_METRICS = (
+    ("latency_all", "p50_ms"),
+    ("latency_all", "p99_ms"),
+    ("memory", "per_connection_kb"),
+    ("redis_connections", "added"),
+    ("delivery", "ws", "loss_pct"),
+    ("delivery", "sse", "loss_pct"),
+)
+
+
+def compare(baseline: dict, current: dict) -> None:
+    print(f"\n📊 vs baseline {baseline.get('git_commit')} ({baseline.get('timestamp')})")
+    for path in COMPARED_METRICS:
+        old, new = baseline, current
+        for key in path:
+            old = (old or {}).get(key)
+            new = (new or {}).get(key)
+        delta = f"{new - old:+.2f}" if isinstance(old, (int, float)) and isinstance(new, (int, float)) else "n/a"
+        print(f"   {'.'.join(path):<28} {old!s:>10} -> {new!s:>10}  ({delta})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark realtime fan-out (/events/ws + SSE)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--ws-clients", type=int, default=1000)
+    parser.add_argument("--sse-clients", type=int, default=500)
+    parser.add_argument("--user-id", type=int, help="Also stream /events/orders/{user_id} (needs --token)")
+    parser.add_argument("--token", help="Bearer token for the order SSE stream")
+    parser.add_argument("--events", type=int, default=60, help="Events to publish (menu/shop/order round robin)")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between published events")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="Parallel handshakes")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait after connecting")
+    parser.add_argument("--drain", type=float, default=3.0, help="Seconds to wait for late deliveries")
+    parser.add_argument("--server-pid", type=int, help="Server (master) PID for memory measurement")
+    parser.add_argument("--redis-host", default=os.getenv("REDIS_HOST", "localhost"))
+    parser.add_argument("--redis-port", type=int, default=int(os.getenv("REDIS_PORT", 6379)))
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 """
 Admin Tests for Campus Eats Backend
-Tests: Order management, settings, OTP verification
+Tests: Order management, settings, OTP verification, live profiling
 """
+import threading
+
 import pytest
 from fastapi import status
 
+from services.profiler import sampling_profiler
+
 
 class TestAdminOrderManagement:
     """Tests for admin order management"""
@@ -205,3 +209,49 @@ class TestAdminStats:
         """Test student cannot access admin stats"""
         response = client.get("/admin/stats", headers=auth_headers_student)
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def busy_loop_for_profiler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestWorkerProfiling:
+    """Tests for the on-demand sampling profiler"""
+
+    def test_student_cannot_profile(self, client, auth_headers_student):
+        """Test profiling is admin-only"""
+        response = client.post("/admin/profile?seconds=0.1", headers=auth_headers_student)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_profile_captures_busy_threads(self, client, auth_headers_admin):
+        """Test stacks of a busy background thread show up in the collapsed output and summary"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop_for_profiler, args=(stop,), name="Busy-7")
+        worker.start()
+        try:
+            response = client.post("/admin/profile?seconds=0.3&interval_ms=2", headers=auth_headers_admin)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert result["samples"] > 0
+        busy = [line for line in result["collapsed"].splitlines() if line.startswith("Busy;")]
+        assert busy and "busy_loop_for_profiler (tests/test_admin.py:" in busy[0]
+        assert any(row["function"].startswith("busy_loop_for_profiler") for row in result["top"])
+
+    def test_collapsed_format(self, client, auth_headers_admin):
+        """Test format=collapsed returns flame graph input as text"""
+        response = client.post("/admin/profile?seconds=0.1&format=collapsed&include_idle=true", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.headers["x-profile-pid"].isdigit()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+    def test_one_profile_at_a_time(self, client, auth_headers_admin):
+        """Test a second concurrent profile is rejected"""
+        with sampling_profiler._lock:
+            response = client.post("/admin/profile?seconds=0.1", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_409_CONFLICT
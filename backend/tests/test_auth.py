@@ -172,3 +172,139 @@ class TestProtectedRoutes:
         """Test admin can access admin-only routes"""
         response = client.get("/admin/orders", headers=auth_headers_admin)
         assert response.status_code == status.HTTP_200_OK
+
+
+class TestPasswordHashingPool:
+    """Tests for the dedicated password hashing executor"""
+    
+    def test_login_uses_hashing_pool(self, client, test_student):
+        """Test login verification runs on the hashing pool"""
+        from services.password_hasher import password_hasher
+        completed = password_hasher.completed
+        response = client.post(
+            "/token",
+            data={"username": "teststudent", "password": "password123"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert password_hasher.completed == completed + 1
+    
+    def test_login_returns_503_when_queue_full(self, client, test_student, monkeypatch):
+        """Test full hashing queue fails fast with 503 + Retry-After"""
+        from services.password_hasher import password_hasher
+        monkeypatch.setattr(password_hasher, "max_queue_depth", 0)
+        response = client.post(
+            "/token",
+            data={"username": "teststudent", "password": "password123"}
+        )
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert int(response.headers["Retry-After"]) >= 1
+    
+    def test_broken_pool_is_shut_down_and_replaced(self, monkeypatch):
+        """Test a pool whose worker died is shut down before a fresh one replaces it"""
+        import os
+        import signal
+        from concurrent.futures.process import BrokenProcessPool
+        from services.password_hasher import PasswordHasher
+        hasher = PasswordHasher(workers=1, max_queue_depth=4)
+        try:
+            hasher.hash_blocking("password123")
+            broken = hasher._executor
+            shutdowns = []
+            monkeypatch.setattr(broken, "shutdown", lambda **kwargs: shutdowns.append(kwargs))
+            for process in broken._processes.values():
+                os.kill(process.pid, signal.SIGKILL)
+            
+            with pytest.raises(BrokenProcessPool):
+                hasher.hash_blocking("password123")
+            
+            assert shutdowns == [{"wait": False, "cancel_futures": True}]
+            assert hasher._executor is not broken
+            assert hasher.verify_blocking("password123", hasher.hash_blocking("password123"))
+        finally:
+            hasher.shutdown()
+
+
+class TestRefreshTokens:
+    """Tests for rotating refresh tokens"""
+    
+    def _login(self, client):
+        return client.post(
+            "/token",
+            data={"username": "teststudent", "password": "password123"}
+        ).json()
+    
+    def test_login_returns_refresh_token(self, client, test_student):
+        """Test login returns an access token with its lifetime and a refresh token"""
+        from core import auth
+        data = self._login(client)
+        assert data["refresh_token"]
+        assert data["expires_in"] == auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    
+    def test_refresh_token_issued_off_the_event_loop(self, client, test_student, monkeypatch):
+        """Test the async login route issues the refresh token (Redis/DB) in the threadpool"""
+        import asyncio
+        from routers import auth as auth_router
+        issued_on_loop = []
+        issue = auth_router.issue_refresh_token
+        
+        def record(*args):
+            try:
+                asyncio.get_running_loop()
+                issued_on_loop.append(True)
+            except RuntimeError:
+                issued_on_loop.append(False)
+            return issue(*args)
+        monkeypatch.setattr(auth_router, "issue_refresh_token", record)
+        
+        assert self._login(client)["refresh_token"]
+        assert issued_on_loop == [False]
+    
+    def test_refresh_rotates_token(self, client, test_student):
+        """Test refresh returns a working access token and a new refresh token"""
+        login = self._login(client)
+        response = client.post("/token/refresh", json={"refresh_token": login["refresh_token"]})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["refresh_token"] != login["refresh_token"]
+        
+        orders = client.get("/orders/", headers={"Authorization": f"Bearer {data['access_token']}"})
+        assert orders.status_code == status.HTTP_200_OK
+    
+    def test_refresh_token_reuse_revokes_session(self, client, test_student):
+        """Test presenting a rotated token revokes the whole token family"""
+        login = self._login(client)
+        rotated = client.post("/token/refresh", json={"refresh_token": login["refresh_token"]}).json()
+        
+        reuse = client.post("/token/refresh", json={"refresh_token": login["refresh_token"]})
+        assert reuse.status_code == status.HTTP_401_UNAUTHORIZED
+        
+        # The legitimate successor is revoked too
+        successor = client.post("/token/refresh", json={"refresh_token": rotated["refresh_token"]})
+        assert successor.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_revoked_token_cannot_refresh(self, client, test_student):
+        """Test logout revokes the refresh token"""
+        login = self._login(client)
+        client.post("/token/revoke", json={"refresh_token": login["refresh_token"]})
+        response = client.post("/token/refresh", json={"refresh_token": login["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_refresh_rereads_the_user(self, client, db, test_student):
+        """Test rotation issues the current role and refuses a deactivated user"""
+        login = self._login(client)
+        test_student.role = "admin"
+        db.commit()
+        promoted = client.post("/token/refresh", json={"refresh_token": login["refresh_token"]})
+        assert promoted.status_code == status.HTTP_200_OK
+        stats = client.get("/admin/stats", headers={"Authorization": f"Bearer {promoted.json()['access_token']}"})
+        assert stats.status_code == status.HTTP_200_OK
+        
+        test_student.is_active = False
+        db.commit()
+        response = client.post("/token/refresh", json={"refresh_token": promoted.json()["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_invalid_refresh_token(self, client):
+        """Test unknown refresh token is rejected"""
+        response = client.post("/token/refresh", json={"refresh_token": "not-a-real-token"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,38 @@
+"""
+Benchmark Suite Tests for Campus Eats Backend
+Tests: every hot path runs in-process, regression gate
+"""
+import pytest
+
+from tests.benchmarks import hot_paths
+
+
+class TestHotPathBenchmarks:
+    """Tests for tests/benchmarks/hot_paths.py"""
+
+    def test_every_hot_path_runs(self, monkeypatch):
+        """Test the suite runs end to end against SQLite + fakeredis and restores the Redis client"""
+        pytest.importorskip("fakeredis")
+        from services.redis import redis_client
+        monkeypatch.setattr(hot_paths, "WARMUP_CALLS", 1)
+        monkeypatch.setattr(hot_paths, "MIN_CALLS", 2)
+        original = redis_client.client
+
+        results = hot_paths.run(seconds=0)
+
+        assert set(results["benchmarks"]) == {
+            "get_menu_hit", "get_menu_miss",
+            "create_order_1_items", "create_order_5_items", "create_order_20_items",
+            "check_rate_limit", "get_current_user_jwt",
+            "serialize_100_orders", "serialize_1000_orders", "publish_order_update",
+        }
+        assert all(r["calls"] >= 2 and r["median_us"] > 0 for r in results["benchmarks"].values())
+        assert redis_client.client is original
+
+    def test_compare_flags_regressions_past_threshold(self):
+        """Test only medians slower than baseline by more than the threshold fail the gate"""
+        baseline = {"benchmarks": {"a": {"median_us": 100.0}, "b": {"median_us": 100.0}}}
+        current = {"benchmarks": {
+            "a": {"median_us": 120.0}, "b": {"median_us": 140.0}, "new": {"median_us": 5.0},
+        }}
+        assert hot_paths.compare(baseline, current, threshold=0.25) == ["b"]
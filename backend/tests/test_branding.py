@@ -0,0 +1,115 @@
+"""
+Branding & Static Asset Tests for Campus Eats Backend
+Tests: Content-versioned logo URL, ETag revalidation, precompressed static variants
+"""
+import asyncio
+import gzip
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from routers import branding
+from services import static_assets
+from services.static_assets import (
+    CachedStaticFiles, IMMUTABLE_CACHE_CONTROL, asset_version, precompress_directory, warm_hash_cache
+)
+
+
+class TestBranding:
+    """Tests for the versioned branding config"""
+
+    def test_logo_url_stable_across_calls(self, client):
+        """Test logoUrl only depends on logo content, not on time"""
+        first = client.get("/campus/branding").json()
+        second = client.get("/campus/branding").json()
+        assert first == second
+        assert first["logoUrl"] == f"/static/logo.png?v={asset_version('static/logo.png')}"
+
+    def test_logo_url_changes_when_logo_changes(self, client, tmp_path, monkeypatch):
+        """Test a new logo produces a new URL and version"""
+        (tmp_path / "logo.png").write_bytes(b"logo-v1")
+        monkeypatch.setattr(branding, "STATIC_DIR", str(tmp_path))
+        before = client.get("/campus/branding").json()
+
+        (tmp_path / "logo.png").write_bytes(b"logo-version-2")
+        after = client.get("/campus/branding").json()
+        assert before["logoUrl"] != after["logoUrl"]
+        assert before["version"] != after["version"]
+
+    def test_missing_logo_falls_back_to_unversioned_url(self, client, monkeypatch):
+        """Test a missing or misnamed CAMPUS_LOGO still returns branding, without ?v="""
+        monkeypatch.setitem(branding.BRANDING, "logo", "missing.png")
+        response = client.get("/campus/branding")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["logoUrl"] == "/static/missing.png"
+
+    def test_static_dir_is_not_cwd_relative(self, client, tmp_path, monkeypatch):
+        """Test the logo is found when the app runs from another directory"""
+        monkeypatch.chdir(tmp_path)
+        assert "?v=" in client.get("/campus/branding").json()["logoUrl"]
+
+    def test_branding_etag_revalidation(self, client):
+        """Test If-None-Match with the current ETag returns 304"""
+        etag = client.get("/campus/branding").headers["etag"]
+        response = client.get("/campus/branding", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+class TestStaticAssets:
+    """Tests for versioned, precompressed static serving"""
+
+    def _client(self, directory):
+        return TestClient(Starlette(routes=[Mount("/static", CachedStaticFiles(directory=str(directory)))]))
+
+    def test_versioned_url_is_immutable(self, client):
+        """Test ?v=<current hash> is immutable, stale or missing versions are not"""
+        version = asset_version("static/logo.png")
+        fresh = client.get(f"/static/logo.png?v={version}")
+        assert fresh.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert "immutable" not in client.get("/static/logo.png?v=stale").headers["cache-control"]
+
+        not_modified = client.get("/static/logo.png", headers={"If-None-Match": fresh.headers["etag"]})
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_precompressed_variant_by_accept_encoding(self, tmp_path):
+        """Test .gz sibling is served only to clients that accept gzip"""
+        body = "svg{}" * 200
+        (tmp_path / "icon.svg").write_text(body)
+        assert precompress_directory(str(tmp_path)) == 1
+        assert precompress_directory(str(tmp_path)) == 0  # Up to date
+
+        with self._client(tmp_path) as static_client:
+            gz = static_client.get("/static/icon.svg", headers={"Accept-Encoding": "gzip"})
+            assert gz.headers["content-encoding"] == "gzip"
+            assert gz.headers["content-type"].startswith("image/svg+xml")
+            assert gz.text == body  # Transparently decoded by the client
+
+            identity = static_client.get("/static/icon.svg", headers={"Accept-Encoding": "identity"})
+            assert "content-encoding" not in identity.headers
+            assert identity.headers["etag"] != gz.headers["etag"]
+        assert gzip.decompress((tmp_path / "icon.svg.gz").read_bytes()).decode() == body
+
+    def test_files_hashed_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Test content hashes are built at startup or in the lookup thread, never on the event loop"""
+        (tmp_path / "app.css").write_text("body{}")
+        assert warm_hash_cache(str(tmp_path)) == 1
+
+        (tmp_path / "new.css").write_text("p{}")  # Added after startup
+        hashed_on_loop = []
+        file_hash = static_assets.file_hash
+
+        def record(path, *args):
+            try:
+                asyncio.get_running_loop()
+                if path not in static_assets._hash_cache:  # Would read the whole file
+                    hashed_on_loop.append(path)
+            except RuntimeError:
+                pass
+            return file_hash(path, *args)
+        monkeypatch.setattr(static_assets, "file_hash", record)
+
+        with self._client(tmp_path) as static_client:
+            for name in ("app.css", "new.css"):
+                assert static_client.get(f"/static/{name}").headers["etag"]
+        assert hashed_on_loop == []
@@ -0,0 +1,383 @@
+"""
+Realtime Event Tests for Campus Eats Backend
+Tests: Per-worker event hub fan-out, bounded/coalescing subscriber queues, SSE replay, durable event log
+"""
+import asyncio
+import time
+
+import pytest
+
+from services import event_hub as event_hub_module
+from services.event_hub import HEARTBEAT, EventHub, SlowConsumer
+
+
+class TestEventHub:
+    """Tests for the in-process fan-out hub (no Redis needed - dispatch is driven directly)"""
+    
+    async def test_dispatch_reaches_only_matching_subscribers(self):
+        """Test each message is delivered to every subscriber of its channel"""
+        hub = EventHub()
+        try:
+            async with hub.subscription({"menu_updates"}) as menu_a, \
+                       hub.subscription({"menu_updates", "shop_status"}) as menu_b, \
+                       hub.subscription({"order_updates:user:1"}) as orders:
+                assert hub.dispatch("menu_updates", '{"item_id": 1}') == 2
+                assert await asyncio.wait_for(menu_a.get(), 1) == ("menu_updates", '{"item_id": 1}')
+                assert await asyncio.wait_for(menu_b.get(), 1) == ("menu_updates", '{"item_id": 1}')
+                assert orders.empty()
+                assert hub.stats()["subscribers"] == 3
+            
+            # Unsubscribed on exit
+            assert hub.dispatch("menu_updates", "{}") == 0
+            assert hub.stats()["subscribers"] == 0
+        finally:
+            await hub.stop()
+    
+    async def test_slow_subscriber_queue_is_bounded(self):
+        """Test a full queue drops the oldest uncoalescable message instead of growing"""
+        hub = EventHub()
+        try:
+            async with hub.subscription({"order_updates:user:1"}, maxsize=2) as sub:
+                for i in range(5):
+                    hub.dispatch("order_updates:user:1", str(i))
+                assert sub.qsize() == 2
+                assert sub.dropped == 3
+                assert await sub.get() == ("order_updates:user:1", "3")
+                assert hub.stats()["dropped"] == 3
+        finally:
+            await hub.stop()
+    
+    async def test_superseded_updates_are_coalesced(self):
+        """Test shop status keeps only the latest value and menu updates coalesce per item"""
+        hub = EventHub()
+        try:
+            async with hub.subscription({"shop_status", "menu_updates"}) as sub:
+                hub.dispatch("shop_status", '{"status": "closed"}')
+                hub.dispatch("menu_updates", '{"action": "updated", "item_id": 1}')
+                hub.dispatch("menu_updates", '{"action": "updated", "item_id": 2}')
+                hub.dispatch("shop_status", '{"status": "open"}')
+                hub.dispatch("menu_updates", '{"action": "deleted", "item_id": 1}')
+                
+                assert [(await sub.get())[1] for _ in range(3)] == [
+                    '{"action": "updated", "item_id": 2}',
+                    '{"status": "open"}',
+                    '{"action": "deleted", "item_id": 1}',
+                ]
+                assert sub.empty()
+                assert hub.stats()["coalesced"] == 2
+        finally:
+            await hub.stop()
+    
+    async def test_persistently_slow_consumer_is_evicted(self, monkeypatch):
+        """Test a consumer that never drains is unsubscribed and told so"""
+        monkeypatch.setattr(event_hub_module, "SLOW_CONSUMER_DROP_LIMIT", 3)
+        hub = EventHub()
+        try:
+            async with hub.subscription({"order_updates:user:1"}, maxsize=2) as sub:
+                for i in range(6):
+                    hub.dispatch("order_updates:user:1", str(i))
+                assert sub.evicted
+                with pytest.raises(SlowConsumer):
+                    await sub.get()
+                assert hub.dispatch("order_updates:user:1", "late") == 0
+                assert hub.stats()["slow_consumers_evicted"] == 1
+        finally:
+            await hub.stop()
+
+    async def test_heartbeat_ticks_only_opted_in_idle_subscribers(self, monkeypatch):
+        """Test the shared heartbeat reaches idle heartbeat subscribers only"""
+        monkeypatch.setattr(event_hub_module, "HEARTBEAT_INTERVAL", 0.01)
+        hub = EventHub()
+        try:
+            async with hub.subscription({"menu_updates"}, heartbeat=True) as socket_sub, \
+                       hub.subscription({"menu_updates"}) as plain_sub:
+                channel, _ = await asyncio.wait_for(socket_sub.get(), 1)
+                assert channel == HEARTBEAT
+                assert plain_sub.empty()
+        finally:
+            await hub.stop()
+
+    async def test_last_event_id_replays_missed_messages(self):
+        """Test a reconnect with Last-Event-ID gets exactly the messages it missed on its channels"""
+        hub = EventHub()
+        try:
+            async with hub.subscription({"menu_updates"}) as sub:
+                hub.dispatch("menu_updates", "1")
+                _, _, seen_id = await sub.get_event()
+            hub.dispatch("menu_updates", "2")
+            hub.dispatch("shop_status", "closed")
+            hub.dispatch("menu_updates", "3")
+            
+            async with hub.subscription({"menu_updates"}, last_event_id=seen_id) as sub:
+                assert sub.replay_complete
+                assert [(await sub.get())[1] for _ in range(2)] == ["2", "3"]
+                assert sub.empty()
+            
+            # IDs from another worker (or a restarted one) cannot be replayed
+            async with hub.subscription({"menu_updates"}, last_event_id="deadbeef-1") as sub:
+                assert not sub.replay_complete
+                assert sub.empty()
+        finally:
+            await hub.stop()
+
+
+class TestServerSentEvents:
+    """Tests for the async SSE generators"""
+    
+    async def test_stream_has_ids_heartbeats_and_resync(self, monkeypatch):
+        """Test events carry ids, idle streams get comment heartbeats, stale ids ask for a resync"""
+        from routers import events
+        monkeypatch.setattr(event_hub_module, "HEARTBEAT_INTERVAL", 0.01)
+        hub = EventHub()
+        monkeypatch.setattr(events, "event_hub", hub)
+        try:
+            stream = events._sse_events({"menu_updates"}, "unknown-5", "test", topic="menu")
+            assert (await anext(stream)).startswith("retry:")
+            assert (await anext(stream)).startswith("event: resync")
+            assert (await asyncio.wait_for(anext(stream), 1)).startswith(": keepalive")
+            
+            hub.dispatch("menu_updates", '{"item_id": 7}')
+            assert await anext(stream) == f'id: {hub.epoch}-1\ndata: {{"item_id": 7}}\n\n'
+            await stream.aclose()
+            assert hub.stats()["subscribers"] == 0
+        finally:
+            await hub.stop()
+
+    async def test_stream_id_reconnect_replays_from_event_log(self, stream_redis, monkeypatch):
+        """Test a reconnect to a worker that never saw the events replays them from the log, ids are stream IDs"""
+        from routers import events
+        from services import event_log
+        seen = event_log.append_event("menu", {"action": "updated", "item_id": 1})
+        second = event_log.append_event("menu", {"action": "updated", "item_id": 2})
+        third = event_log.append_event("menu", {"action": "deleted", "item_id": 3})
+
+        hub = EventHub()  # A fresh worker: nothing in its replay buffer
+        monkeypatch.setattr(events, "event_hub", hub)
+        try:
+            stream = events._sse_events({"menu_updates"}, seen, "test", topic="menu")
+            assert (await anext(stream)).startswith("retry:")
+            assert (await anext(stream)).startswith(f"id: {second}\ndata: ")
+            frame = await anext(stream)
+            assert frame.startswith(f"id: {third}\ndata: ")
+            assert f'"event_id": "{third}"' in frame
+
+            # Live copies of replayed events are skipped; live frames use the payload's stream ID
+            hub.dispatch("menu_updates", f'{{"item_id": 3,"event_id":"{third}"}}')
+            fourth = event_log.append_event("menu", {"action": "updated", "item_id": 4})
+            hub.dispatch("menu_updates", f'{{"item_id": 4,"event_id":"{fourth}"}}')
+            assert (await anext(stream)).startswith(f"id: {fourth}\n")
+            await stream.aclose()
+        finally:
+            await hub.stop()
+
+    async def test_trimmed_stream_id_asks_for_resync(self, stream_redis, monkeypatch):
+        """Test resync is sent only when the log no longer reaches back to the client's cursor"""
+        from routers import events
+        from services import event_log
+        first = event_log.append_event("menu", {"item_id": 1})
+        for item_id in (2, 3, 4):
+            stream_redis.xadd("events:menu", {"data": f'{{"item_id": {item_id}}}'}, maxlen=2, approximate=False)
+
+        hub = EventHub()
+        monkeypatch.setattr(events, "event_hub", hub)
+        try:
+            stream = events._sse_events({"menu_updates"}, first, "test", topic="menu")
+            assert (await anext(stream)).startswith("retry:")
+            assert (await anext(stream)).startswith("event: resync")
+            await stream.aclose()
+        finally:
+            await hub.stop()
+
+
+class TestWebSocketEvents:
+    """Tests for the event-driven /events/ws socket"""
+    
+    def test_ping_pong_and_unsubscribe_on_disconnect(self, client, monkeypatch):
+        """Test client PING gets a PONG and closing the socket releases its hub subscription"""
+        from services.redis import redis_client
+        from services.event_hub import event_hub
+        monkeypatch.setattr(redis_client, "is_available", lambda: True)
+        
+        with client.websocket_connect("/events/ws") as ws:
+            ws.send_json({"type": "PING"})
+            assert ws.receive_json()["type"] == "PONG"
+            assert event_hub.stats()["subscribers"] == 1
+        
+        # Disconnect is noticed without any further message (cleanup runs on the portal's loop)
+        deadline = time.monotonic() + 2
+        while event_hub.stats()["subscribers"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert event_hub.stats()["subscribers"] == 0
+
+
+@pytest.fixture
+def stream_redis(monkeypatch):
+    """Isolated in-memory Redis behind the global client"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.redis import redis_client
+    monkeypatch.setattr(redis_client, "client", fakeredis.FakeRedis(decode_responses=True))
+    return redis_client.client
+
+
+class TestEventLog:
+    """Tests for the Redis Streams event log"""
+    
+    def test_published_events_resync_from_cursor(self, stream_redis):
+        """Test published events carry stream ids and a cursor read returns only later events"""
+        from services import event_log
+        from services.pubsub import publish_menu_update
+        
+        publish_menu_update("updated", 1)
+        cursor = event_log.read_events("menu")["cursor"]
+        publish_menu_update("updated", 2)
+        publish_menu_update("deleted", 3)
+        
+        result = event_log.read_events("menu", after=cursor)
+        assert [e["data"]["item_id"] for e in result["events"]] == [2, 3]
+        assert not result["truncated"]
+        assert event_log.read_events("menu", after=result["cursor"])["events"] == []
+    
+    def test_trimmed_cursor_is_reported_truncated(self, stream_redis, monkeypatch):
+        """Test a cursor older than the retained log tells the client to refetch"""
+        from services import event_log
+        monkeypatch.setitem(event_log.TOPICS, "shop", 2)
+        
+        first = event_log.append_event("shop", {"status": "open"})
+        for status in ("closed", "open", "closed"):
+            stream_redis.xadd("events:shop", {"data": f'{{"status": "{status}"}}'}, maxlen=2, approximate=False)
+        
+        assert event_log.read_events("shop", after=first)["truncated"]
+    
+    def test_consumer_group_delivers_once_until_acked(self, stream_redis):
+        """Test group members get each event once and unacked events stay pending"""
+        from services import event_log
+        assert event_log.ensure_group("orders", "notifier")
+        assert event_log.ensure_group("orders", "notifier")  # Idempotent
+        event_log.append_event("orders", {"order_id": 5, "status": "Ready"}, user_id=9)
+        
+        events = event_log.read_group("orders", "notifier", "worker-1")
+        assert [(e["data"]["order_id"], e["user_id"]) for e in events] == [(5, 9)]
+        assert event_log.read_group("orders", "notifier", "worker-1") == []
+        
+        assert len(event_log.read_group("orders", "notifier", "worker-1", pending=True)) == 1
+        assert event_log.ack("orders", "notifier", events[0]["id"]) == 1
+        assert event_log.read_group("orders", "notifier", "worker-1", pending=True) == []
+    
+    def test_students_only_see_own_order_events(self, client, stream_redis, auth_headers_student, test_student):
+        """Test the resync endpoint filters the orders topic by user"""
+        from services.pubsub import publish_order_update
+        publish_order_update(1, test_student.id, "Preparing")
+        publish_order_update(2, test_student.id + 100, "Preparing")
+        
+        response = client.get("/events/log/orders", headers=auth_headers_student)
+        assert response.status_code == 200
+        assert [e["data"]["order_id"] for e in response.json()["events"]] == [1]
+        
+        assert client.get("/events/log/orders?after=bogus", headers=auth_headers_student).status_code == 400
+        assert client.get("/events/log/payments", headers=auth_headers_student).status_code == 404
+
+
+class TestPublisher:
+    """Tests for the pipelined event publisher"""
+    
+    def test_order_update_serialized_once_in_one_round_trip(self, stream_redis, monkeypatch):
+        """Test both order channels and the stream get the same payload from one pipeline"""
+        import json
+        from types import SimpleNamespace
+        from services import pubsub
+        from services.redis import redis_client
+        
+        dumps_calls, pipelines = [], []
+        monkeypatch.setattr(pubsub, "json", SimpleNamespace(dumps=lambda o: dumps_calls.append(o) or json.dumps(o)))
+        real_pipeline = redis_client.safe_pipeline
+        monkeypatch.setattr(redis_client, "safe_pipeline", lambda build, **kw: pipelines.append(1) or real_pipeline(build, **kw))
+        
+        listener = stream_redis.pubsub(ignore_subscribe_messages=True)
+        listener.subscribe("order_updates:7", "order_updates:user:3")
+        pubsub.publish_order_update(7, 3, "Ready")
+        
+        messages, deadline = [], time.monotonic() + 2
+        while len(messages) < 2 and time.monotonic() < deadline:
+            message = listener.get_message(timeout=0.1)  # None for the skipped subscribe confirmations
+            if message:
+                messages.append(message)
+        assert {m["channel"] for m in messages} == {"order_updates:7", "order_updates:user:3"}
+        assert messages[0]["data"] == messages[1]["data"]
+        assert json.loads(messages[0]["data"])["status"] == "Ready"
+        assert len(dumps_calls) == 1
+        assert len(pipelines) == 1
+        assert stream_redis.xlen("events:orders") == 1
+    
+    def test_batch_sends_burst_in_one_round_trip_in_order(self, stream_redis):
+        """Test a batch of menu updates is one pipeline and keeps publish order"""
+        from services import event_log
+        from services.pubsub import Publisher
+        publisher = Publisher(batch_ms=0)
+        
+        with publisher.batch():
+            for item_id in (3, 1, 2):
+                publisher.publish("menu", ("menu_updates",), {"action": "updated", "item_id": item_id})
+        
+        assert publisher.round_trips == 1
+        assert [e["data"]["item_id"] for e in event_log.read_events("menu")["events"]] == [3, 1, 2]
+    
+    def test_background_batching_flushes_bursts(self, stream_redis):
+        """Test with batch_ms events from the request path are flushed together by the flusher thread"""
+        from services.pubsub import Publisher
+        publisher = Publisher(batch_ms=50)
+        for status in ("open", "closed", "open"):
+            publisher.publish("shop", ("shop_status",), {"status": status})
+        
+        deadline = time.monotonic() + 2
+        while publisher.events_sent < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert publisher.events_sent == 3
+        assert publisher.round_trips == 1
+
+
+class TestUserWebSocket:
+    """Tests for the authenticated multiplexed /events/ws/user socket"""
+    
+    def _token(self, user):
+        from core.auth import create_access_token
+        return create_access_token({"sub": user.username, "role": user.role, "id": user.id})
+    
+    def test_requires_authentication(self, client, monkeypatch):
+        """Test a socket without a valid token is closed"""
+        from starlette.websockets import WebSocketDisconnect
+        from services.redis import redis_client
+        monkeypatch.setattr(redis_client, "is_available", lambda: True)
+        
+        with client.websocket_connect("/events/ws/user") as ws:
+            ws.send_json({"type": "AUTH", "token": "not-a-jwt"})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == 1008
+    
+    def test_topics_and_registry(self, client, test_student, monkeypatch):
+        """Test the socket starts on all entitled topics, can narrow them and is registered per user"""
+        from services.redis import redis_client
+        from services.event_hub import event_hub
+        from services.user_sockets import user_sockets
+        monkeypatch.setattr(redis_client, "is_available", lambda: True)
+        
+        headers = {"Authorization": f"Bearer {self._token(test_student)}"}
+        with client.websocket_connect("/events/ws/user", headers=headers) as ws:
+            assert ws.receive_json() == {"type": "SUBSCRIBED", "topics": ["menu", "orders", "shop"]}
+            (sub,) = user_sockets.sockets(test_student.id)
+            assert f"order_updates:user:{test_student.id}" in sub.channels
+            
+            client.portal.call(event_hub.dispatch, f"order_updates:user:{test_student.id}", '{"order_id": 1, "status": "Ready"}')
+            assert ws.receive_json() == {"type": "ORDER_UPDATE", "payload": {"order_id": 1, "status": "Ready"}}
+            
+            ws.send_json({"type": "UNSUBSCRIBE", "topics": ["menu", "shop"]})
+            assert ws.receive_json() == {"type": "SUBSCRIBED", "topics": ["orders"]}
+            assert sub.channels == {f"order_updates:user:{test_student.id}"}
+            
+            ws.send_json({"type": "SUBSCRIBE", "topics": ["payments"]})
+            assert ws.receive_json()["type"] == "ERROR"
+        
+        deadline = time.monotonic() + 2
+        while user_sockets.sockets(test_student.id) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert user_sockets.sockets(test_student.id) == []
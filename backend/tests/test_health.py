@@ -0,0 +1,94 @@
+"""
+Health Tests for Campus Eats Backend
+Tests: detailed per-worker health, load balancer readiness, Redis circuit, rolling windows
+"""
+import time
+
+from db.session import InstrumentedQueuePool
+from routers import health
+from services.redis import RedisClient, TimedRedis
+from services.rolling_window import RollingWindow
+
+
+class TestDetailedHealth:
+    """Tests for /health/detailed"""
+
+    def test_reports_saturation_inputs(self, client):
+        """Test pool limits, threadpool, loop lag, Redis and realtime sections are reported"""
+        data = client.get("/health/detailed").json()
+
+        assert data["database"]["max_connections"] == 50  # pool_size 20 + max_overflow 30
+        assert set(data["database"]["checkout_wait_ms"]) == {"count", "p50", "p95", "p99", "max"}
+        assert data["threadpool"]["size"] > 0
+        assert 0 <= data["threadpool"]["utilization"] <= 1
+        assert data["event_loop"]["running"] is True
+        assert data["redis"]["circuit"] in ("closed", "open")
+        assert "subscribers" in data["realtime"]
+        assert data["status"] == "healthy"
+
+
+class TestReadiness:
+    """Tests for the /health/ready load balancer check"""
+
+    def test_ready_when_unsaturated(self, client):
+        """Test an idle worker answers 200 (GET and HEAD)"""
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert client.head("/health/ready").status_code == 200
+
+    def test_slow_pool_checkouts_take_worker_out(self, client, monkeypatch):
+        """Test recent pool waits over HEALTH_MAX_POOL_WAIT_MS answer 503"""
+        window = RollingWindow()
+        monkeypatch.setattr(InstrumentedQueuePool, "checkout_wait", window)
+        for _ in range(10):
+            window.observe(1.0)
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "saturated", "reasons": ["db_pool"], "pid": response.json()["pid"]}
+
+    def test_threadpool_and_loop_lag_reasons(self, client, monkeypatch):
+        """Test threadpool utilization and loop lag thresholds are reported as reasons"""
+        monkeypatch.setattr(health, "HEALTH_MAX_THREADPOOL_UTILIZATION", 0)
+        monkeypatch.setattr(health, "HEALTH_MAX_LOOP_LAG_MS", -1)
+        time.sleep(0.1)  # Let the watchdog tick at least once
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["reasons"] == ["threadpool", "event_loop"]
+
+
+class TestRedisCircuit:
+    """Tests for Redis circuit state"""
+
+    def test_failed_command_opens_circuit(self):
+        """Test the first failed command opens the circuit and is reported"""
+        redis = RedisClient()
+        redis.client = TimedRedis(port=1, socket_connect_timeout=0.1)  # Nothing listens here
+        trips = redis.circuit_trips
+        assert redis.stats()["circuit"] == "closed"
+
+        assert redis.safe_get("key") is None
+        stats = redis.stats()
+        assert stats["circuit"] == "open"
+        assert stats["circuit_trips"] == trips + 1
+        assert stats["circuit_opened_at"] is not None
+
+
+class TestRollingWindow:
+    """Tests for the rolling percentile window"""
+
+    def test_percentiles_and_expiry(self):
+        """Test percentiles cover recent observations only"""
+        window = RollingWindow(seconds=0.05)
+        for ms in range(1, 101):
+            window.observe(ms / 1000)
+
+        stats = window.percentiles()
+        assert stats["count"] == 100
+        assert stats["p50"] == 51
+        assert stats["max"] == 100
+
+        time.sleep(0.06)
+        assert window.percentiles()["count"] == 0
@@ -0,0 +1,70 @@
+"""
+Load Scenario Tests for Campus Eats Backend
+Tests: campus-day arrival curve, SLO evaluation and report
+"""
+import random
+
+from tests.load_tests import campus_day
+
+
+class TestArrivalCurve:
+    """Tests for campus_day.ArrivalCurve"""
+
+    def test_lunch_is_the_peak(self):
+        """Test the rate peaks at lunch at --peak-rate and is far lower early morning and evening"""
+        curve = campus_day.ArrivalCurve(duration=120, peak_rate=5.0)
+        lunch = curve.at(12.75)
+        assert abs(curve.rate(lunch) - 5.0) < 1e-9
+        assert curve.rate(curve.at(8.75)) < curve.rate(lunch) / 2
+        assert curve.rate(curve.at(10.75)) < curve.rate(curve.at(12.5))
+        assert curve.rate(0) < 0.2 * curve.rate(lunch)
+
+    def test_arrivals_follow_the_curve(self):
+        """Test sampled sessions stay inside the day and cluster around lunch"""
+        curve = campus_day.ArrivalCurve(duration=600, peak_rate=4.0)
+        arrivals = curve.arrivals(random.Random(1))
+        lunch = [t for t in arrivals if curve.at(12) <= t <= curve.at(13.5)]
+        evening = [t for t in arrivals if curve.at(18) <= t <= curve.at(19.5)]
+
+        assert all(0 <= t < 600 for t in arrivals)
+        assert arrivals == sorted(arrivals)
+        assert len(lunch) > 3 * len(evening)
+
+
+class TestSloEvaluation:
+    """Tests for campus_day.evaluate / build_report"""
+
+    def _recorder(self):
+        recorder = campus_day.Recorder()
+        for n in range(100):
+            recorder.record("GET /menu/", (5 + n) / 1000, "200", True)
+        for n in range(98):
+            recorder.record("POST /orders/", 0.05, "200", True)
+        recorder.record("POST /orders/", 2.5, "500", False)
+        recorder.record("POST /orders/", 0.05, "429", False)
+        return recorder
+
+    def test_verdicts_per_endpoint(self):
+        """Test latency and error-rate targets are checked per endpoint"""
+        slos = {
+            "GET /menu/": {"p95_ms": 200, "p99_ms": 500, "error_rate": 0.01},
+            "POST /orders/": {"p95_ms": 800, "error_rate": 0.01},
+        }
+        endpoints, violations = campus_day.evaluate(self._recorder(), slos)
+
+        assert endpoints["GET /menu/"]["passed"] is True
+        assert endpoints["GET /menu/"]["p95_ms"] == 100.0
+        assert endpoints["POST /orders/"]["passed"] is False
+        assert endpoints["POST /orders/"]["status_codes"] == {"200": 98, "500": 1, "429": 1}
+        assert violations == ["POST /orders/: error_rate 0.02 > 0.01"]
+
+    def test_report_fails_on_violation_and_lists_unexercised_endpoints(self):
+        """Test the report is machine-readable: passed flag, violations and SLOs nobody exercised"""
+        slos = {"POST /orders/": {"error_rate": 0.01}, "WS /events/ws/user": {"p95_ms": 500}}
+        report = campus_day.build_report(self._recorder(), slos, {"duration": 60})
+
+        assert report["passed"] is False
+        assert report["config"] == {"duration": 60}
+        assert report["endpoints"]["GET /menu/"]["count"] == 100
+        assert "slo" not in report["endpoints"]["GET /menu/"]
+        assert report["endpoints"]["WS /events/ws/user"] == {"count": 0, "slo": {"p95_ms": 500}, "passed": None}
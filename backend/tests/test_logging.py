@@ -0,0 +1,99 @@
+"""
+Logging Tests for Campus Eats Backend
+Tests: JSON formatting, non-blocking queue handler, sampled request log
+"""
+import json
+import logging
+import threading
+
+from core import logging_config
+from core.logging_config import AsyncQueueHandler, JsonFormatter
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.records = []
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(2)
+        self.records.append(record)
+
+
+class TestStructuredLogging:
+    """Tests for the JSON formatter and queue handler"""
+
+    def test_json_line_with_extra_fields(self):
+        """Test records become one JSON object with extra= fields at the top level"""
+        record = logging.makeLogRecord({
+            "name": "access", "levelname": "INFO", "msg": "GET %s", "args": ("/menu/",), "status": 200,
+        })
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["message"] == "GET /menu/"
+        assert entry["logger"] == "access"
+        assert entry["status"] == 200
+        assert "args" not in entry
+
+    def test_records_written_by_listener_thread(self):
+        """Test emitting only enqueues; the listener delivers in order and stop() flushes"""
+        target = CollectingHandler()
+        handler = AsyncQueueHandler(target)
+        logger = logging.getLogger("test_async_logging")
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                logger.exception("failed %d", 1)
+            logger.warning("second")
+        finally:
+            handler.stop()
+            logger.removeHandler(handler)
+
+        assert [r.getMessage() for r in target.records] == ["failed 1", "second"]
+        assert "ValueError: boom" in target.records[0].exc_text
+        assert handler._listener._thread is None
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test a stalled writer costs dropped records, not blocked requests"""
+        gate = threading.Event()
+        target = CollectingHandler(gate)
+        handler = AsyncQueueHandler(target, maxsize=1)
+        logger = logging.getLogger("test_async_logging_full")
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            for i in range(20):
+                logger.warning("record %d", i)
+            assert handler.stats()["dropped"] >= 18
+        finally:
+            gate.set()
+            handler.stop()
+            logger.removeHandler(handler)
+
+
+class TestRequestLog:
+    """Tests for the sampled request log"""
+
+    def test_successes_sampled_errors_always_logged(self, client, monkeypatch, caplog):
+        """Test 2xx responses follow the sample rate while errors are always logged"""
+        monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 0)
+        with caplog.at_level(logging.INFO, logger="access"):
+            client.get("/menu/")
+            client.get("/orders/99999")
+
+        records = [r for r in caplog.records if r.name == "access"]
+        assert [(r.path, r.status) for r in records] == [("/orders/99999", 401)]
+        assert records[0].route == "/orders/{order_id}"
+        assert records[0].sample_rate == 1.0
+
+    def test_slow_requests_always_logged(self, client, monkeypatch, caplog):
+        """Test successes over ACCESS_LOG_SLOW_MS bypass sampling"""
+        monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 0)
+        monkeypatch.setattr(logging_config, "ACCESS_LOG_SLOW_MS", 0)
+        with caplog.at_level(logging.INFO, logger="access"):
+            client.get("/menu/")
+        assert [r.status for r in caplog.records if r.name == "access"] == [200]
@@ -0,0 +1,62 @@
+"""
+Loop Watchdog Tests for Campus Eats Backend
+Tests: loop lag measurement, blocking stack + route capture
+"""
+import asyncio
+import logging
+import time
+
+from services.loop_watchdog import LoopWatchdog
+
+
+class FakeRoute:
+    path = "/payments/upload-proof"
+
+
+def blocking_upload(seconds):
+    scope = {"type": "http", "path": "/payments/upload-proof", "route": FakeRoute()}  # noqa: F841
+    time.sleep(seconds)
+
+
+async def run_watchdog(block):
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        block()
+        await asyncio.sleep(0.05)  # Let the tick report the stall
+    finally:
+        await watchdog.stop()
+    return watchdog
+
+
+class TestLoopWatchdog:
+    """Tests for the event-loop lag watchdog"""
+
+    async def test_blocking_call_captured_with_route(self, caplog):
+        """Test a stall reports the blocking function's stack and the route it served"""
+        with caplog.at_level(logging.WARNING, logger="loop_watchdog"):
+            watchdog = await run_watchdog(lambda: blocking_upload(0.3))
+
+        stats = watchdog.stats()
+        assert stats["stalls"] == 1
+        assert stats["lag_ms"]["max"] >= 250
+        assert stats["recent_stalls"][0]["route"] == "/payments/upload-proof"
+
+        record = next(r for r in caplog.records if r.name == "loop_watchdog")
+        assert record.route == "/payments/upload-proof"
+        assert "blocking_upload" in record.stack
+        assert "time.sleep(seconds)" in record.stack
+
+    async def test_stall_outside_request(self):
+        """Test blocking code that is not serving a request is still reported"""
+        watchdog = await run_watchdog(lambda: time.sleep(0.3))
+        assert watchdog.stats()["recent_stalls"][0]["route"] is None
+
+    async def test_short_lag_not_reported(self):
+        """Test lag under the threshold is measured but not treated as a stall"""
+        watchdog = await run_watchdog(lambda: time.sleep(0.01))
+        stats = watchdog.stats()
+        assert stats["stalls"] == 0
+        assert stats["lag_ms"]["p50"] is not None
+        assert not stats["running"]
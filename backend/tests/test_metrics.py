@@ -0,0 +1,162 @@
+"""
+Metrics Tests for Campus Eats Backend
+Tests: /metrics exposition, route-template latency labels, cache/pool/Redis/rate-limit instrumentation
+"""
+import os
+import runpy
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import status
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc
+
+from db.session import InstrumentedQueuePool
+from middleware import rate_limit
+from services.cache import menu_cache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics and the HTTP middleware"""
+
+    def test_exposition_format(self, client):
+        """Test /metrics serves the Prometheus text format"""
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "campuseats_http_requests_in_progress" in response.text
+
+    def test_latency_labelled_by_route_template(self, client, auth_headers_admin):
+        """Test requests are labelled with the route template, not the raw path"""
+        labels = {"method": "DELETE", "route": "/menu/{menu_item_id}", "status": "404"}
+        before = sample("campuseats_http_request_duration_seconds_count", **labels)
+
+        client.delete("/menu/12345", headers=auth_headers_admin)
+        client.delete("/menu/67890", headers=auth_headers_admin)
+
+        assert sample("campuseats_http_request_duration_seconds_count", **labels) == before + 2
+        assert 'route="/menu/12345"' not in client.get("/metrics").text
+
+    def test_unhandled_error_counted_as_500(self):
+        """Test a request that raises is still recorded and leaves the in-flight gauge balanced"""
+        from fastapi.testclient import TestClient
+        from main import app
+        labels = {"method": "GET", "route": "/test-sentry", "status": "500"}
+        before = sample("campuseats_http_request_duration_seconds_count", **labels)
+        in_progress = sample("campuseats_http_requests_in_progress")
+
+        raw_client = TestClient(app, raise_server_exceptions=False)
+        assert raw_client.get("/test-sentry").status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        assert sample("campuseats_http_request_duration_seconds_count", **labels) == before + 1
+        assert sample("campuseats_http_requests_in_progress") == in_progress
+
+    def test_rate_limit_rejections_counted(self, client, monkeypatch):
+        """Test rejected requests increment the per-group counter"""
+        monkeypatch.setattr(rate_limit, "TESTING", False)
+        monkeypatch.setattr(rate_limit, "check_global_rate_limit", lambda: True)
+        monkeypatch.setattr(rate_limit, "check_rate_limit", lambda *args: False)
+        before = sample("campuseats_rate_limit_rejections_total", group="menu_read")
+
+        assert client.get("/menu/").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert sample("campuseats_rate_limit_rejections_total", group="menu_read") == before + 1
+
+
+class TestHotPathMetrics:
+    """Tests for cache, pool and Redis instrumentation"""
+
+    def test_menu_cache_hits_and_misses(self, client, sample_menu_item):
+        """Test the in-memory menu cache records a miss then a hit"""
+        menu_cache.invalidate()
+        misses = sample("campuseats_cache_requests_total", cache="menu", result="miss")
+        hits = sample("campuseats_cache_requests_total", cache="menu", result="hit")
+
+        client.get("/menu/")
+        client.get("/menu/")
+
+        assert sample("campuseats_cache_requests_total", cache="menu", result="miss") == misses + 1
+        assert sample("campuseats_cache_requests_total", cache="menu", result="hit") == hits + 1
+        menu_cache.invalidate()
+
+    def test_pool_checkout_wait_and_timeouts(self, tmp_path):
+        """Test pool checkouts are timed and exhausted-pool timeouts counted"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+        )
+        checkouts = sample("campuseats_db_pool_checkout_wait_seconds_count")
+        timeouts = sample("campuseats_db_pool_checkout_timeouts_total")
+
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        # The timed-out wait is observed too
+        assert sample("campuseats_db_pool_checkout_wait_seconds_count") == checkouts + 2
+        assert sample("campuseats_db_pool_checkout_timeouts_total") == timeouts + 1
+        engine.dispose()
+
+    def test_password_hashing_timed(self, client, test_student):
+        """Test bcrypt time and pool queue wait are exported per operation"""
+        hashed = sample("campuseats_password_hash_duration_seconds_count", operation="verify")
+        waited = sample("campuseats_password_hash_queue_wait_seconds_count", operation="verify")
+
+        client.post("/token", data={"username": "teststudent", "password": "password123"})
+
+        assert sample("campuseats_password_hash_duration_seconds_count", operation="verify") == hashed + 1
+        assert sample("campuseats_password_hash_queue_wait_seconds_count", operation="verify") == waited + 1
+
+    def test_redis_round_trips_timed(self):
+        """Test single commands and pipelines record their round-trip time"""
+        fakeredis = pytest.importorskip("fakeredis")
+        from services.redis import TimedRedis, redis_client
+
+        client = TimedRedis(connection_pool=fakeredis.FakeRedis().connection_pool)
+        before = sample("campuseats_redis_command_duration_seconds_count", command="INCRBY")
+        client.incr("metrics:test")
+        assert sample("campuseats_redis_command_duration_seconds_count", command="INCRBY") == before + 1
+
+        original = redis_client.client
+        redis_client.client = client
+        try:
+            before = sample("campuseats_redis_command_duration_seconds_count", command="PIPELINE")
+            redis_client.safe_pipeline(lambda pipe: (pipe.get("a"), pipe.get("b")))
+            assert sample("campuseats_redis_command_duration_seconds_count", command="PIPELINE") == before + 1
+        finally:
+            redis_client.client = original
+
+
+class TestMultiprocessSetup:
+    """Tests for the gunicorn PROMETHEUS_MULTIPROC_DIR handling"""
+
+    def test_metrics_import_creates_missing_directory(self, tmp_path):
+        """Test importing the metrics module (as preload_app does) works before the directory exists"""
+        metrics_dir = tmp_path / "new" / "metrics"
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir)}
+        result = subprocess.run(
+            [sys.executable, "-c", "import services.metrics"],
+            cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert list(metrics_dir.glob("gauge_livesum_*.db"))
+
+    def test_gunicorn_config_clears_stale_samples_before_app_import(self, tmp_path, monkeypatch):
+        """Test loading the config creates the directory and removes a previous run's samples"""
+        metrics_dir = tmp_path / "metrics"
+        metrics_dir.mkdir()
+        (metrics_dir / "counter_123.db").write_bytes(b"stale")
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(metrics_dir))
+
+        runpy.run_path(str(Path(__file__).resolve().parents[1] / "gunicorn.conf.py"))
+        assert metrics_dir.is_dir()
+        assert list(metrics_dir.iterdir()) == []
+
+        metrics_dir.rmdir()
+        runpy.run_path(str(Path(__file__).resolve().parents[1] / "gunicorn.conf.py"))
+        assert metrics_dir.is_dir()
@@ -1,7 +1,10 @@
 """
 Order Tests for Campus Eats Backend
-Tests: Order creation, viewing, authorization (Fix #4)
+Tests: Order creation, viewing, authorization (Fix #4), long-polling
 """
+import threading
+import time
+
 import pytest
 from fastapi import status
 
@@ -228,3 +231,125 @@ class TestOrderViewing:
         """Test getting non-existent order returns 404"""
         response = client.get("/orders/99999", headers=auth_headers_student)
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestOrderLongPoll:
+    """Tests for GET /orders/{id}?wait=&known_status= long-polling"""
+    
+    def _order(self, db, user, status_value="Preparing"):
+        from db import models
+        order = models.Order(total_amount=40, status=status_value, user_id=user.id)
+        db.add(order)
+        db.commit()
+        db.refresh(order)
+        return order
+    
+    def test_returns_immediately_when_status_already_differs(self, client, db, auth_headers_student, test_student):
+        """Test a stale known_status is answered without waiting"""
+        order = self._order(db, test_student, "Ready")
+        started = time.monotonic()
+        response = client.get(f"/orders/{order.id}?wait=30&known_status=Preparing", headers=auth_headers_student)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "Ready"
+        assert time.monotonic() - started < 2
+    
+    def test_status_event_releases_parked_request(self, client, db, auth_headers_student, test_student):
+        """Test a published status change wakes the waiting request before the timeout"""
+        from services.event_hub import event_hub
+        order = self._order(db, test_student)
+        
+        result = {}
+        def long_poll():
+            result["response"] = client.get(
+                f"/orders/{order.id}?wait=30&known_status=Preparing", headers=auth_headers_student
+            )
+        started = time.monotonic()
+        waiter = threading.Thread(target=long_poll)
+        waiter.start()
+        
+        # An event repeating the known status is consumed without a DB read: once it is
+        # delivered and drained, the request is past its initial read and parked
+        channel = f"order_updates:{order.id}"
+        while not client.portal.call(event_hub.dispatch, channel, '{"status": "Preparing"}'):
+            assert time.monotonic() - started < 5
+            time.sleep(0.01)
+        sub = next(iter(event_hub._subscribers[channel]))
+        while sub.qsize():
+            assert time.monotonic() - started < 5
+            time.sleep(0.01)
+        
+        order.status = "Ready"
+        db.commit()
+        client.portal.call(event_hub.dispatch, channel, '{"status": "Ready"}')
+        waiter.join(10)
+        
+        assert result["response"].json()["status"] == "Ready"
+        assert time.monotonic() - started < 5
+    
+    def test_read_does_not_hold_a_connection_while_parked(self, db, test_student):
+        """Test the order read ends its transaction, returning the pooled connection before the wait"""
+        from routers.orders import _load_order
+        order = self._order(db, test_student)
+        loaded = _load_order(db, order.id, {"id": test_student.id, "role": "student"})
+        assert loaded.status == "Preparing"
+        assert not db.in_transaction()
+
+    def test_parked_request_holds_no_pooled_connection(self, client, auth_headers_student, test_student, tmp_path):
+        """Test no connection stays checked out of a real pool while the long-poll waits"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from db import models
+        from db.session import Base, get_db
+        from main import app
+        from services.event_hub import event_hub
+        engine = create_engine(f"sqlite:///{tmp_path}/pool.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with Session() as setup:
+            setup.add(models.User(id=test_student.id, username="pooled", hashed_password="x", role="student"))
+            order = models.Order(total_amount=40, status="Preparing", user_id=test_student.id)
+            setup.add(order)
+            setup.commit()
+            order_id = order.id
+
+        def pooled_db():
+            session = Session()
+            try:
+                yield session
+            finally:
+                session.close()
+        app.dependency_overrides[get_db] = pooled_db
+
+        result = {}
+        def long_poll():
+            result["response"] = client.get(
+                f"/orders/{order_id}?wait=30&known_status=Preparing", headers=auth_headers_student
+            )
+        started = time.monotonic()
+        waiter = threading.Thread(target=long_poll)
+        waiter.start()
+
+        # Same parked-request detection as above: a repeated known status is drained without a read
+        channel = f"order_updates:{order_id}"
+        while not client.portal.call(event_hub.dispatch, channel, '{"status": "Preparing"}'):
+            assert time.monotonic() - started < 5
+            time.sleep(0.01)
+        sub = next(iter(event_hub._subscribers[channel]))
+        while sub.qsize():
+            assert time.monotonic() - started < 5
+            time.sleep(0.01)
+
+        assert engine.pool.checkedout() == 0
+
+        with Session() as update:
+            update.query(models.Order).filter(models.Order.id == order_id).update({"status": "Ready"})
+            update.commit()
+        client.portal.call(event_hub.dispatch, channel, '{"status": "Ready"}')
+        waiter.join(10)
+        assert result["response"].json()["status"] == "Ready"
+        engine.dispose()
+
+    def test_wait_is_bounded(self, client, auth_headers_student):
+        """Test the wait parameter is capped"""
+        response = client.get("/orders/1?wait=3600&known_status=Pending", headers=auth_headers_student)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -206,3 +206,166 @@ class TestPaymentVerification:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["status"] == "Payment_Rejected"
+
+    def test_admin_review_not_limited_as_payment_submission(self, client, auth_headers_admin, monkeypatch):
+        """Test verify/reject use the admin_write budget, not the student 3/min payment_submit"""
+        from middleware import rate_limit
+        groups = []
+        monkeypatch.setattr(rate_limit, "TESTING", False)
+        monkeypatch.setattr(rate_limit, "check_global_rate_limit", lambda: True)
+        monkeypatch.setattr(rate_limit, "check_rate_limit", lambda user_id, ip, group: groups.append(group) or True)
+
+        for path in ("/payments/verify", "/payments/reject", "/payments/submit"):
+            client.post(path, headers=auth_headers_admin, json={})
+
+        assert groups == ["admin_write", "admin_write", "payment_submit"]
+
+
+class TestPaymentReconciliation:
+    """Tests for bank statement reconciliation"""
+    
+    @pytest.fixture
+    def submitted_orders(self, client, auth_headers_student, sample_menu_item, shop_open):
+        """Create two orders pending verification (₹20 each)"""
+        orders = []
+        for utr in ["UTR_RECON_1", "UTR_RECON_2"]:
+            order = client.post(
+                "/orders/",
+                headers=auth_headers_student,
+                json={"items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]}
+            ).json()
+            client.post(
+                "/payments/submit",
+                headers=auth_headers_student,
+                json={"order_id": order["id"], "utr": utr}
+            )
+            orders.append(order)
+        return orders
+    
+    def _statement(self, *rows):
+        lines = ["Date,Narration,UTR Number,Amount"] + [f"2024-01-01,UPI CREDIT,{utr},{amount}" for utr, amount in rows]
+        return {"file": ("statement.csv", "\n".join(lines).encode(), "text/csv")}
+    
+    def test_reconcile_verifies_exact_matches(self, client, auth_headers_admin, submitted_orders):
+        """Test exact UTR + amount matches are verified and mismatches reported"""
+        response = client.post(
+            "/payments/reconcile",
+            headers=auth_headers_admin,
+            files=self._statement(("utr_recon_1", "20.00"), ("UTR_RECON_2", "25.00"), ("UTR_UNKNOWN", "99"))
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["rows_processed"] == 3
+        assert data["verified_count"] == 1
+        assert data["verified"][0]["order_id"] == submitted_orders[0]["id"]
+        assert len(data["verified"][0]["otp"]) == 6
+        assert data["amount_mismatches"][0]["order_id"] == submitted_orders[1]["id"]
+        assert data["unmatched_row_count"] == 1
+        
+        order = client.get(f"/orders/{submitted_orders[0]['id']}", headers=auth_headers_admin).json()
+        assert order["status"] == "Paid"
+        assert order["verified_by"] == "testadmin"
+    
+    def test_reconcile_dry_run_does_not_verify(self, client, auth_headers_admin, submitted_orders):
+        """Test dry run reports matches without changing order status"""
+        response = client.post(
+            "/payments/reconcile?dry_run=true",
+            headers=auth_headers_admin,
+            files=self._statement(("UTR_RECON_1", "20"))
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["verified_count"] == 1
+        
+        order = client.get(f"/orders/{submitted_orders[0]['id']}", headers=auth_headers_admin).json()
+        assert order["status"] == "Pending_Verification"
+    
+    def test_reconcile_missing_columns(self, client, auth_headers_admin):
+        """Test statement without a UTR column is rejected"""
+        response = client.post(
+            "/payments/reconcile",
+            headers=auth_headers_admin,
+            files={"file": ("statement.csv", b"Date,Amount\n2024-01-01,20", "text/csv")}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_student_cannot_reconcile(self, client, auth_headers_student):
+        """Test reconciliation is admin only"""
+        response = client.post(
+            "/payments/reconcile",
+            headers=auth_headers_student,
+            files=self._statement(("UTR_RECON_1", "20"))
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_reconcile_uses_admin_write_budget(self, client, auth_headers_admin, monkeypatch):
+        """Test bulk reconciliation is not limited by the student 3/min payment_submit budget"""
+        from middleware import rate_limit
+        groups = []
+        monkeypatch.setattr(rate_limit, "TESTING", False)
+        monkeypatch.setattr(rate_limit, "check_global_rate_limit", lambda: True)
+        monkeypatch.setattr(rate_limit, "check_rate_limit", lambda user_id, ip, group: groups.append(group) or True)
+        
+        for _ in range(4):
+            response = client.post("/payments/reconcile", headers=auth_headers_admin, files=self._statement())
+            assert response.status_code == status.HTTP_200_OK
+        
+        assert groups == ["admin_write"] * 4
+    
+    def test_colliding_utrs_reported_as_ambiguous(self, client, auth_headers_admin, db, submitted_orders):
+        """Test pending orders whose UTRs collide after normalization are left for manual review"""
+        from db import models
+        db.query(models.Order).filter(models.Order.id == submitted_orders[1]["id"]).update(
+            {"verification_proof": " utr_recon_1"}
+        )
+        db.commit()
+        
+        response = client.post(
+            "/payments/reconcile",
+            headers=auth_headers_admin,
+            files=self._statement(("UTR_RECON_1", "20"))
+        )
+        data = response.json()
+        assert data["verified_count"] == 0
+        assert data["ambiguous_row_count"] == 1
+        assert data["ambiguous_rows"][0]["order_ids"] == [o["id"] for o in submitted_orders]
+        assert data["orders_not_in_statement_count"] == 0
+    
+    def test_report_lists_are_capped(self):
+        """Test every report list is capped while its count stays exact"""
+        from types import SimpleNamespace
+        from services.reconciliation import MAX_REPORTED_ROWS, reconcile
+        orders = [SimpleNamespace(id=i, verification_proof=f"UTR{i}", total_amount=20) for i in range(MAX_REPORTED_ROWS + 5)]
+        rows = [(i, f"UTR{i}", 99) for i in range(MAX_REPORTED_ROWS + 5)]
+        report = reconcile(rows + rows, orders)
+        assert len(report["amount_mismatches"]) == len(report["duplicate_rows"]) == MAX_REPORTED_ROWS
+        assert report["amount_mismatch_count"] == report["duplicate_row_count"] == MAX_REPORTED_ROWS + 5
+        
+        report = reconcile([], orders)
+        assert len(report["orders_not_in_statement"]) == MAX_REPORTED_ROWS
+        assert report["orders_not_in_statement_count"] == MAX_REPORTED_ROWS + 5
+    
+    def test_order_rejected_during_reconciliation_is_not_verified(
+        self, client, auth_headers_admin, db, submitted_orders, monkeypatch
+    ):
+        """Test a decision made while the statement was parsed is not overwritten"""
+        from sqlalchemy import text
+        from routers import payments
+        rejected_id = submitted_orders[0]["id"]
+        
+        def reject_meanwhile(rows, pending_orders):
+            report = reconcile(rows, pending_orders)
+            db.execute(text("UPDATE orders SET status = 'Payment_Rejected' WHERE id = :id"), {"id": rejected_id})
+            return report
+        reconcile = payments.reconcile
+        monkeypatch.setattr(payments, "reconcile", reject_meanwhile)
+        
+        response = client.post(
+            "/payments/reconcile",
+            headers=auth_headers_admin,
+            files=self._statement(("UTR_RECON_1", "20"), ("UTR_RECON_2", "20"))
+        )
+        data = response.json()
+        assert [v["order_id"] for v in data["verified"]] == [submitted_orders[1]["id"]]
+        assert data["changed_during_reconciliation"] == [rejected_id]
+        order = client.get(f"/orders/{rejected_id}", headers=auth_headers_admin).json()
+        assert order["status"] == "Payment_Rejected"
@@ -0,0 +1,116 @@
+"""
+Provisioning Tests for Campus Eats Backend
+Tests: Roster parsing, bulk insert, re-runs over existing users, credentials file
+"""
+import os
+import stat
+
+import pytest
+from sqlalchemy import create_engine
+
+from core.auth import verify_password
+from db import models
+from scripts import provision_students
+
+
+def write_roster(tmp_path, *lines):
+    path = tmp_path / "roster.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/provision.db")
+    models.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def usernames(engine):
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(models.User.__table__.select().with_only_columns(models.User.username))}
+
+
+class TestRoster:
+    """Tests for roster parsing and validation"""
+
+    def test_duplicates_are_reported(self, tmp_path):
+        """Test rows repeating a username or email are skipped and reported with their line"""
+        path = write_roster(
+            tmp_path,
+            "Username,Email,Password",
+            "alice,alice@campus.edu,password123",
+            "alice,other@campus.edu,password123",
+            "bob,alice@campus.edu,password123",
+            "carol,,password123",
+        )
+        students, skipped = provision_students.read_roster(path)
+        assert [s["username"] for s in students] == ["alice", "carol"]
+        assert skipped == [
+            {"line": 3, "username": "alice", "reason": "duplicate username"},
+            {"line": 4, "username": "bob", "reason": "duplicate email alice@campus.edu"},
+        ]
+
+    def test_passwords(self, tmp_path):
+        """Test default/generated passwords fill gaps and short passwords are rejected"""
+        path = write_roster(tmp_path, "username,password", "alice,", "bob,password123")
+        students, _ = provision_students.read_roster(path, default_password="Welcome@123")
+        assert [s["password"] for s in students] == ["Welcome@123", "password123"]
+
+        students, _ = provision_students.read_roster(path, generate_passwords=True)
+        assert len(students[0]["password"]) >= 8
+
+        with pytest.raises(ValueError):
+            provision_students.read_roster(path)
+        with pytest.raises(ValueError):
+            provision_students.read_roster(write_roster(tmp_path, "username,password", "alice,short"))
+
+    def test_username_column_required(self, tmp_path):
+        """Test a roster without a username column is rejected"""
+        with pytest.raises(ValueError):
+            provision_students.read_roster(write_roster(tmp_path, "email", "a@campus.edu"))
+
+
+class TestProvisioning:
+    """Tests for the hash + bulk insert path"""
+
+    def test_inserts_students(self, engine, tmp_path):
+        """Test roster rows become active students with working password hashes"""
+        path = write_roster(tmp_path, "username,email", "alice,alice@campus.edu", "bob,")
+        students, _ = provision_students.read_roster(path, default_password="password123")
+        report = provision_students.provision(engine, students, workers=1)
+
+        assert report["inserted"] == 2
+        assert sorted(report["provisioned"]) == ["alice", "bob"]
+        with engine.connect() as conn:
+            users = conn.execute(models.User.__table__.select()).mappings().all()
+        assert {u["role"] for u in users} == {"student"}
+        assert all(verify_password("password123", u["hashed_password"]) for u in users)
+
+    def test_rerun_reports_only_new_accounts(self, engine, tmp_path):
+        """Test existing usernames and taken emails are not reported as provisioned"""
+        first, _ = provision_students.read_roster(
+            write_roster(tmp_path, "username,email", "alice,alice@campus.edu"), default_password="password123"
+        )
+        provision_students.provision(engine, first, workers=1)
+
+        path = write_roster(tmp_path, "username,email", "alice,", "dave,alice@campus.edu", "erin,")
+        students, _ = provision_students.read_roster(path, generate_passwords=True)
+        report = provision_students.provision(engine, students, workers=1)
+
+        assert report["provisioned"] == ["erin"]
+        assert report["inserted"] == 1
+        assert report["skipped_existing"] == 1  # alice
+        assert report["conflicts"] == ["dave"]  # alice@campus.edu is taken
+        assert usernames(engine) == {"alice", "erin"}
+
+    def test_credentials_file_is_private_and_new(self, tmp_path):
+        """Test the credentials file is created owner-only and never overwrites an existing one"""
+        path = str(tmp_path / "credentials.csv")
+        with provision_students.open_credentials_file(path) as f:
+            f.write("username,password\n")
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+        with pytest.raises(FileExistsError):
+            provision_students.open_credentials_file(path)
@@ -0,0 +1,91 @@
+"""
+SQL Query Profiler Tests for Campus Eats Backend
+Tests: statement shapes, per-request counts, N+1 detection, slow statement logging
+"""
+import copy
+import logging
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from db import models
+from services import query_profiler as profiler_module
+from services.query_profiler import query_profiler, statement_shape
+
+
+def create_orders(db, user, menu_item, count):
+    for _ in range(count):
+        order = models.Order(total_amount=40, status="Pending", user_id=user.id)
+        order.items = [models.OrderItem(menu_item_id=menu_item.id, quantity=1, price=40)]
+        db.add(order)
+    db.commit()
+
+
+class TestStatementShape:
+    """Tests for statement normalization"""
+
+    def test_parameters_do_not_change_shape(self):
+        """Test literal values and IN-list lengths are normalized away"""
+        a = "SELECT * FROM orders WHERE id IN (?, ?, ?) LIMIT 10"
+        b = "SELECT *  FROM orders\n WHERE id IN (?, ?) LIMIT 20"
+        assert statement_shape(a) == statement_shape(b) == "SELECT * FROM orders WHERE id IN (?) LIMIT ?"
+
+    def test_identifiers_kept(self):
+        """Test numbered aliases are not mistaken for literals"""
+        assert "anon_1" in statement_shape("SELECT anon_1.id FROM (SELECT 1) AS anon_1")
+
+
+class TestQueryProfiler:
+    """Tests for per-request statement counting"""
+
+    def test_header_counts_statements(self, client, auth_headers_student, test_student, sample_menu_item, db, monkeypatch):
+        """Test the dev header reports statement count and DB time"""
+        monkeypatch.setattr(query_profiler, "response_header", True)
+        create_orders(db, test_student, sample_menu_item, 1)
+
+        response = client.get("/orders/", headers=auth_headers_student)
+        header = dict(part.split("=") for part in response.headers["x-db-queries"].split("; "))
+        assert int(header["count"]) >= 2  # orders + lazy-loaded items
+        assert float(header["time_ms"]) >= 0
+        assert header["repeated"] == "0"
+
+    def test_header_off_by_default(self, client):
+        """Test production responses carry no profiling header"""
+        assert "x-db-queries" not in client.get("/menu/").headers
+
+    def test_lazy_loads_flagged_as_n_plus_one(self, client, auth_headers_student, test_student, sample_menu_item, db, caplog):
+        """Test one lazy load per listed order is reported as a probable N+1"""
+        query_profiler.reset()
+        create_orders(db, test_student, sample_menu_item, profiler_module.N_PLUS_ONE_THRESHOLD)
+
+        with caplog.at_level(logging.WARNING, logger="query_profiler"):
+            assert client.get("/orders/", headers=auth_headers_student).status_code == 200
+
+        stats = query_profiler.stats()["/orders/"]
+        assert stats["n_plus_one_requests"] == 1
+        assert "order_items" in stats["last_repeated_statement"]
+        assert any("Probable N+1 on /orders/" in r.message for r in caplog.records)
+
+    def test_slow_statements_logged_with_route(self, client, monkeypatch, caplog):
+        """Test statements over SLOW_QUERY_MS are logged with the route"""
+        monkeypatch.setattr(profiler_module, "SLOW_QUERY_MS", 0)
+        with caplog.at_level(logging.WARNING, logger="query_profiler"):
+            client.get("/menu/status")
+        assert any("Slow query" in r.message and "/menu/status" in r.message for r in caplog.records)
+
+    def test_failing_statement_leaves_no_state_on_connection(self):
+        """Test a statement that raises leaves nothing on the pooled connection and isn't counted"""
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            info_before = copy.deepcopy(dict(conn.info))
+            with query_profiler.profile_request() as queries:
+                for _ in range(3):
+                    with pytest.raises(exc.OperationalError):
+                        conn.execute(text("SELECT * FROM no_such_table"))
+                assert dict(conn.info) == info_before
+                assert queries.count == 0
+
+                conn.execute(text("SELECT 1"))
+                assert queries.count == 1
+        engine.dispose()
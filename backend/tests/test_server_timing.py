@@ -0,0 +1,45 @@
+"""
+Server-Timing Tests for Campus Eats Backend
+Tests: per-phase breakdown header, slow request logging
+"""
+import logging
+
+from services import server_timing
+from services.cache import menu_cache
+
+
+def phases(response):
+    entries = [part.split(";dur=") for part in response.headers["server-timing"].split(", ")]
+    return {name: float(duration) for name, duration in entries}
+
+
+class TestServerTiming:
+    """Tests for the Server-Timing header"""
+
+    def test_breakdown_for_db_route(self, client, sample_menu_item):
+        """Test a DB-backed route reports endpoint, SQL, serialization and total time"""
+        menu_cache.invalidate()
+        timing = phases(client.get("/menu/"))
+        menu_cache.invalidate()
+
+        assert {"db", "endpoint", "serialize", "total"} <= set(timing)
+        assert list(timing)[-1] == "total"
+        assert timing["total"] >= timing["endpoint"] >= timing["db"]
+
+    def test_jwt_decode_timed(self, client, auth_headers_student):
+        """Test authenticated requests include the token decode phase"""
+        assert "jwt" in phases(client.get("/orders/", headers=auth_headers_student))
+
+    def test_header_can_be_disabled(self, client, monkeypatch):
+        """Test SERVER_TIMING=false drops the header"""
+        monkeypatch.setattr(server_timing, "SERVER_TIMING_ENABLED", False)
+        assert "server-timing" not in client.get("/menu/").headers
+
+    def test_slow_requests_log_breakdown(self, client, monkeypatch, caplog):
+        """Test requests over SERVER_TIMING_LOG_MS log their phases"""
+        monkeypatch.setattr(server_timing, "SERVER_TIMING_LOG_MS", 0.001)
+        with caplog.at_level(logging.WARNING, logger="server_timing"):
+            client.get("/menu/status")
+        record = next(r for r in caplog.records if r.name == "server_timing")
+        assert record.route == "/menu/status"
+        assert "total" in record.timing_ms
@@ -0,0 +1,144 @@
+"""
+Tracing Tests for Campus Eats Backend
+Tests: request/SQL spans, trace propagation through pub/sub payloads, delivery spans
+"""
+import json
+import time
+
+import pytest
+
+from services import tracing
+from services.cache import menu_cache
+from services.event_hub import EventHub
+
+TRACE_ID = "a" * 32
+PARENT_ID = "b" * 16
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Finished spans, captured instead of written to TRACE_FILE"""
+    finished = []
+    monkeypatch.setattr(tracing, "_export", finished.append)
+    return finished
+
+
+def wait_for_span(spans, name, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for span in spans:
+            if span.name == name:
+                return span
+        time.sleep(0.01)
+    raise AssertionError(f"no {name} span")
+
+
+class TestRequestTracing:
+    """Tests for request and SQL spans"""
+
+    def test_traceparent_parsing(self):
+        """Test W3C traceparent headers are parsed and malformed ones ignored"""
+        assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+        assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+        assert tracing.parse_traceparent("00-xyz-123-01") is None
+        assert tracing.parse_traceparent(None) is None
+
+    def test_unsampled_requests_not_traced(self, client, spans):
+        """Test tracing is off by default and unsampled traceparents are not continued"""
+        client.get("/menu/")
+        client.get("/menu/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        assert spans == []
+
+    def test_sampled_traceparent_ignored_while_tracing_off(self, client, spans):
+        """Test a client's sampled flag cannot switch tracing on when TRACE_SAMPLE_RATE is 0"""
+        client.get("/menu/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        assert spans == []
+
+    def test_incoming_trace_continued_with_sql_spans(self, client, spans, sample_menu_item, monkeypatch):
+        """Test a sampled traceparent is continued and SQL statements become child spans"""
+        monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1e-9)  # On, but nothing sampled locally
+        menu_cache.invalidate()
+        client.get("/menu/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        menu_cache.invalidate()
+
+        root = wait_for_span(spans, "HTTP GET /menu/")
+        assert (root.trace_id, root.parent_id) == (TRACE_ID, PARENT_ID)
+        assert root.attributes["status"] == 200
+        queries = [s for s in spans if s.name == "db.query"]
+        assert queries
+        assert all(q.trace_id == TRACE_ID and q.parent_id == root.span_id for q in queries)
+        assert "SELECT" in queries[0].attributes["statement"]
+
+
+class TestDeliveryTracing:
+    """Tests for trace propagation from an order transition to the client's socket"""
+
+    def test_order_transition_traced_to_websocket_frame(
+        self, client, spans, monkeypatch, test_student, auth_headers_student, auth_headers_admin,
+        sample_menu_item, shop_open,
+    ):
+        """Test the published event carries the trace and the socket write closes it"""
+        fakeredis = pytest.importorskip("fakeredis")
+        from core.auth import create_access_token
+        from services.event_hub import event_hub
+        from services.redis import redis_client
+
+        monkeypatch.setattr(redis_client, "client", fakeredis.FakeRedis(decode_responses=True))
+        listener = redis_client.client.pubsub(ignore_subscribe_messages=True)
+        listener.subscribe(f"order_updates:user:{test_student.id}")
+
+        order = client.post(
+            "/orders/", headers=auth_headers_student,
+            json={"items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]},
+        ).json()
+        client.post("/payments/submit", headers=auth_headers_student, json={"order_id": order["id"], "utr": "UTR_TRACE"})
+        client.post("/payments/verify", headers=auth_headers_admin, json={"order_id": order["id"], "verified_by": "admin"})
+
+        monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+        client.patch(f"/admin/orders/{order['id']}/status", headers=auth_headers_admin, json={"status": "Preparing"})
+        monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0)
+
+        published = wait_for_span(spans, "pubsub.publish")
+        root = wait_for_span(spans, "HTTP PATCH /admin/orders/{order_id}/status")
+        assert published.parent_id == root.span_id
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:  # Skip earlier transitions and subscribe confirmations
+            message = listener.get_message(timeout=0.1)
+            if message and json.loads(message["data"])["status"] == "Preparing":
+                break
+        payload = json.loads(message["data"])
+        assert payload["traceparent"] == published.traceparent
+        assert payload["trace_start"] == root.start
+
+        token = create_access_token({"sub": test_student.username, "role": test_student.role, "id": test_student.id})
+        with client.websocket_connect("/events/ws/user", headers={"Authorization": f"Bearer {token}"}) as ws:
+            ws.receive_json()  # SUBSCRIBED
+            client.portal.call(event_hub.dispatch, message["channel"], message["data"])
+            assert ws.receive_json()["payload"]["status"] == "Preparing"
+            delivered = wait_for_span(spans, "realtime.deliver")
+
+        assert (delivered.trace_id, delivered.parent_id) == (root.trace_id, published.span_id)
+        assert delivered.attributes["transport"] == "user_websocket"
+        assert delivered.attributes["notification_latency_ms"] == pytest.approx((delivered.end - root.start) * 1000, abs=0.1)
+
+    async def test_sse_frame_closes_trace(self, spans, monkeypatch):
+        """Test an SSE frame closes its event's trace once it has been sent"""
+        from routers import events
+        hub = EventHub()
+        monkeypatch.setattr(events, "event_hub", hub)
+        traced = json.dumps({"item_id": 7, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01", "trace_start": time.time()})
+        try:
+            stream = events._sse_events({"menu_updates"}, None, "test", topic="menu")
+            await anext(stream)  # retry:
+            hub.dispatch("menu_updates", traced)
+            hub.dispatch("menu_updates", '{"item_id": 8}')
+            await anext(stream)
+            assert spans == []  # Not sent yet
+            await anext(stream)
+            await stream.aclose()
+        finally:
+            await hub.stop()
+
+        (delivered,) = spans
+        assert (delivered.name, delivered.parent_id) == ("realtime.deliver", PARENT_ID)
+        assert delivered.attributes["transport"] == "sse"
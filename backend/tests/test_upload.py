@@ -0,0 +1,85 @@
+"""
+Upload Tests for Campus Eats Backend
+Tests: Content-addressed storage, deduplication, size limit, WebP variants, cache headers
+"""
+import hashlib
+import io
+import os
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from routers import upload
+from services.static_assets import CachedStaticFiles, IMMUTABLE_CACHE_CONTROL
+
+
+def _png_bytes(color=(255, 0, 0)):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (600, 400), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Redirect uploads to a temp directory"""
+    monkeypatch.setattr(upload, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestImageUpload:
+    """Tests for streaming image uploads"""
+
+    def test_upload_stored_under_sha256(self, client, upload_dir):
+        """Test upload is stored under its content hash with WebP variants"""
+        content = _png_bytes()
+        response = client.post("/upload/image", files={"file": ("menu.png", content, "image/png")})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+
+        digest = hashlib.sha256(content).hexdigest()
+        assert data["filename"] == f"{digest}.png"
+        assert data["url"] == f"/static/uploads/{digest}.png"
+        assert data["deduplicated"] is False
+        assert (upload_dir / f"{digest}.png").read_bytes() == content
+        assert set(data["variants"]) == {"display", "thumb"}
+        assert (upload_dir / f"{digest}_thumb.webp").exists()
+
+    def test_identical_uploads_share_one_file(self, client, upload_dir):
+        """Test uploading the same content twice is deduplicated"""
+        content = _png_bytes((0, 255, 0))
+        first = client.post("/upload/image", files={"file": ("a.png", content, "image/png")}).json()
+        second = client.post("/upload/image", files={"file": ("b.png", content, "image/png")}).json()
+
+        assert first["filename"] == second["filename"]
+        assert second["deduplicated"] is True
+        assert len([f for f in os.listdir(upload_dir) if f.endswith(".png")]) == 1
+
+    def test_upload_too_large(self, client, upload_dir, monkeypatch):
+        """Test oversized upload is rejected and leaves no partial file"""
+        monkeypatch.setattr(upload, "MAX_FILE_SIZE", 1024)
+        response = client.post("/upload/image", files={"file": ("big.png", b"x" * 4096, "image/png")})
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert os.listdir(upload_dir) == []
+
+    def test_upload_invalid_extension(self, client, upload_dir):
+        """Test non-image extension is rejected"""
+        response = client.post("/upload/image", files={"file": ("script.exe", b"MZ", "application/octet-stream")})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestStaticCacheHeaders:
+    """Tests for immutable cache headers on content-addressed files"""
+
+    def test_content_addressed_files_are_immutable(self, tmp_path):
+        """Test sha256-named files are immutable, others are not"""
+        hashed = f"{'a' * 64}.png"
+        (tmp_path / hashed).write_bytes(b"img")
+        (tmp_path / "legacy.png").write_bytes(b"img")
+        static_app = Starlette(routes=[Mount("/static", CachedStaticFiles(directory=str(tmp_path)))])
+
+        with TestClient(static_app) as static_client:
+            assert static_client.get(f"/static/{hashed}").headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+            assert "immutable" not in static_client.get("/static/legacy.png").headers["cache-control"]
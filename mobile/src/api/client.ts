@@ -1,4 +1,4 @@
-import axios, { AxiosError } from 'axios';
+import axios, { AxiosError, InternalAxiosRequestConfig } from 'axios';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { API_BASE_URL, BRANDING_ENDPOINT } from '../config';
 
@@ -11,11 +11,15 @@ export const apiClient = axios.create({
   },
 });
 
+// AsyncStorage keys
+export const TOKEN_KEY = 'token';
+export const REFRESH_TOKEN_KEY = 'refreshToken';
+
 // Day 14: Request Interceptor (Inject Token)
 apiClient.interceptors.request.use(
   async (config) => {
     try {
-      const token = await AsyncStorage.getItem('token');
+      const token = await AsyncStorage.getItem(TOKEN_KEY);
       if (token && config.headers) {
         config.headers.Authorization = `Bearer ${token}`;
       }
@@ -27,6 +31,54 @@ apiClient.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Access tokens are short-lived (ACCESS_TOKEN_EXPIRE_MINUTES, 15 by default): a 401 is
+// answered by one POST /token/refresh (rotating the refresh token) and a retry.
+// Only when the refresh itself fails is the session cleared.
+type SessionListener = (accessToken: string | null) => void;
+let sessionListener: SessionListener | null = null;
+
+// AuthContext subscribes so a refreshed token (or a dead session) reaches the UI
+export const setSessionListener = (listener: SessionListener | null) => {
+  sessionListener = listener;
+};
+
+export const saveSession = async (accessToken: string, refreshToken?: string) => {
+  await AsyncStorage.setItem(TOKEN_KEY, accessToken);
+  if (refreshToken) {
+    await AsyncStorage.setItem(REFRESH_TOKEN_KEY, refreshToken);
+  }
+};
+
+export const clearSession = async () => {
+  await AsyncStorage.multiRemove([TOKEN_KEY, REFRESH_TOKEN_KEY]);
+};
+
+const NO_REFRESH_URLS = ['/token', '/token/refresh', '/token/revoke'];
+
+// Concurrent 401s share one refresh: the server rejects a rotated refresh token's reuse
+let refreshInFlight: Promise<string | null> | null = null;
+
+const refreshAccessToken = (): Promise<string | null> => {
+  if (!refreshInFlight) {
+    refreshInFlight = (async () => {
+      const refreshToken = await AsyncStorage.getItem(REFRESH_TOKEN_KEY);
+      if (!refreshToken) { return null; }
+      try {
+        const response = await apiClient.post('/token/refresh', { refresh_token: refreshToken });
+        await saveSession(response.data.access_token, response.data.refresh_token);
+        return response.data.access_token as string;
+      } catch (error) {
+        // Offline/timeout: keep the session, the next request tries again
+        if (axios.isAxiosError(error) && !error.response) { throw error; }
+        return null;
+      }
+    })().finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+};
+
 // Day 10 & 14: Response Interceptor for error logging and 401 handling
 apiClient.interceptors.response.use(
   (response) => response,
@@ -35,17 +87,29 @@ apiClient.interceptors.response.use(
       // Server responded with error status
       const { status, data } = error.response;
 
-      // Day 14: Auto-logout on 401
       if (status === 401) {
+        const original = error.config as (InternalAxiosRequestConfig & { _retried?: boolean }) | undefined;
+        if (original && !original._retried && !NO_REFRESH_URLS.includes(original.url || '')) {
+          original._retried = true;
+          let accessToken: string | null;
+          try {
+            accessToken = await refreshAccessToken();
+          } catch (refreshError) {
+            return Promise.reject(error);
+          }
+          if (accessToken) {
+            sessionListener?.(accessToken);
+            original.headers.Authorization = `Bearer ${accessToken}`;
+            return apiClient(original);
+          }
+        }
+        // Day 14: No session left (or a login attempt failed) -> back to the login screen
         // Note: 401s are expected for unauthenticated requests, use log not warn
-        console.log('[API] 401 Unauthorized - Clearing token');
-        await AsyncStorage.removeItem('token');
-        // Note: UI update happens reactively via AuthContext checking AsyncStorage or re-render
-        // Ideally, we'd trigger a global event here if immediate UI refresh is needed
-        // But for now, next simple action will fail or app reload works.
-        // Actually, for immediate logout, Context syncing is better, but as per plan:
-        // "Let UI re-render -> Login screen" (might need a force update mechanism if Context doesn't know)
-        // Since AuthContext handles restoration, we rely on standard flow.
+        console.log('[API] 401 Unauthorized - Clearing session');
+        if (original?.url !== '/token') {
+          await clearSession();
+          sessionListener?.(null);
+        }
       } else if (status === 422) {
         console.warn('[API] Validation Error (422):', data);
       } else if (status >= 500) {
@@ -133,7 +197,18 @@ export const login = async (username: string, password: string) => {
   const response = await apiClient.post('/token', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   });
-  return response.data; // { access_token, token_type }
+  return response.data; // { access_token, token_type, expires_in, refresh_token }
+};
+
+// Logout: revoke the refresh token's session server-side (best effort)
+export const revokeSession = async () => {
+  const refreshToken = await AsyncStorage.getItem(REFRESH_TOKEN_KEY);
+  if (!refreshToken) { return; }
+  try {
+    await apiClient.post('/token/revoke', { refresh_token: refreshToken });
+  } catch (error) {
+    console.log('[API] Refresh token revoke failed (session expires on its own)');
+  }
 };
 
 export const register = async (userData: any) => {
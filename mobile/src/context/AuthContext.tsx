@@ -5,11 +5,12 @@ interface AuthContextType {
     token: string | null;
     userRole: string | null;
     isLoading: boolean;
-    signIn: (token: string) => Promise<void>;
+    signIn: (token: string, refreshToken?: string) => Promise<void>;
     signOut: () => Promise<void>;
 }
 
 import { parseJwt } from '../utils/jwt';
+import { TOKEN_KEY, clearSession, revokeSession, saveSession, setSessionListener } from '../api/client';
 
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
@@ -20,17 +21,26 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     const [isLoading, setIsLoading] = useState(true);
 
 
+    const applyToken = (newToken: string | null) => {
+        setToken(newToken);
+        const decoded = newToken ? parseJwt(newToken) : null;
+        setUserRole(decoded?.role ?? null);
+    };
+
+    // The API client refreshes expired access tokens; a failed refresh signs out
+    useEffect(() => {
+        setSessionListener(applyToken);
+        return () => setSessionListener(null);
+    }, []);
+
     // Restore token on app launch
     useEffect(() => {
         const restoreToken = async () => {
             try {
-                const storedToken = await AsyncStorage.getItem('token');
+                const storedToken = await AsyncStorage.getItem(TOKEN_KEY);
                 if (storedToken) {
-                    setToken(storedToken);
-                    const decoded = parseJwt(storedToken);
-                    if (decoded?.role) {
-                        setUserRole(decoded.role);
-                    }
+                    // May already be expired: the first request refreshes it
+                    applyToken(storedToken);
                 }
 
             } catch (e) {
@@ -42,14 +52,10 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
         restoreToken();
     }, []);
 
-    const signIn = async (newToken: string) => {
+    const signIn = async (newToken: string, refreshToken?: string) => {
         try {
-            await AsyncStorage.setItem('token', newToken);
-            setToken(newToken);
-            const decoded = parseJwt(newToken);
-            if (decoded?.role) {
-                setUserRole(decoded.role);
-            }
+            await saveSession(newToken, refreshToken);
+            applyToken(newToken);
 
         } catch (e) {
             console.error('Failed to save token', e);
@@ -58,9 +64,9 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
 
     const signOut = async () => {
         try {
-            await AsyncStorage.removeItem('token');
-            setToken(null);
-            setUserRole(null);
+            await revokeSession();
+            await clearSession();
+            applyToken(null);
 
         } catch (e) {
             console.error('Failed to remove token', e);
@@ -25,7 +25,7 @@ export default function LoginScreen({ onSwitchToRegister }: LoginScreenProps) {
         setLoading(true);
         try {
             const data = await login(username, password);
-            await signIn(data.access_token);
+            await signIn(data.access_token, data.refresh_token);
         } catch (err: any) {
             const msg = getUserFriendlyError(err);
             Alert.alert('Login Failed', msg);
@@ -74,6 +74,11 @@ const MenuScreen = ({ onGoToCart, onGoToProfile, onGoToHistory }: MenuScreenProp
                 ws.onmessage = (e) => {
                     try {
                         const message = JSON.parse(e.data);
+                        if (message.type === 'PING') {
+                            // Keepalive: answering lets the server drop dead sockets promptly
+                            ws?.send(JSON.stringify({type: 'PONG'}));
+                            return;
+                        }
                         if (message.type === 'SHOP_STATUS') {
                             const isOpen = message.payload.status === 'open';
                             setIsShopOpen(isOpen);
@@ -4,7 +4,8 @@ import { apiClient, getUserFriendlyError } from '../api/client';
 import { PrimaryButton } from '../components/PrimaryButton';
 import { AppHeader } from '../components/AppHeader';
 
-const POLL_INTERVAL = 5000; // 5 seconds
+const POLL_INTERVAL = 5000; // 5 seconds (retry / fallback)
+const LONG_POLL_WAIT = 25; // seconds the server may hold GET /orders/{id}
 
 type OrderStatusScreenProps = {
     orderId: number;
@@ -28,31 +29,43 @@ const OrderStatusScreen = ({ orderId, onHome }: OrderStatusScreenProps) => {
 
     useEffect(() => {
         let isMounted = true;
-
-        const fetchStatus = async () => {
-            try {
-                const response = await apiClient.get(`/orders/${orderId}`);
-                if (isMounted) {
+        const sleep = (ms: number) => new Promise<void>(resolve => setTimeout(resolve, ms));
+
+        // Long-poll: the server holds the request until the status changes (or LONG_POLL_WAIT expires)
+        const pollStatus = async () => {
+            let knownStatus: string | null = null;
+            while (isMounted) {
+                const startedAt = Date.now();
+                try {
+                    const response = await apiClient.get(`/orders/${orderId}`, {
+                        params: knownStatus ? { wait: LONG_POLL_WAIT, known_status: knownStatus } : undefined,
+                        timeout: (LONG_POLL_WAIT + 10) * 1000,
+                    });
+                    if (!isMounted) { return; }
+                    const unchanged = response.data.status === knownStatus;
+                    knownStatus = response.data.status;
                     setOrder(response.data);
                     setLastUpdated(new Date());
                     setError(null);
                     setLoading(false);
-                }
-            } catch (err) {
-                console.log('Polling error:', err);
-                if (isMounted) {
+                    // Server without long-poll support answers instantly - fall back to interval polling
+                    if (unchanged && Date.now() - startedAt < 1000) {
+                        await sleep(POLL_INTERVAL);
+                    }
+                } catch (err) {
+                    console.log('Polling error:', err);
+                    if (!isMounted) { return; }
                     setError(getUserFriendlyError(err));
                     setLoading(false);
+                    await sleep(POLL_INTERVAL);
                 }
             }
         };
 
-        fetchStatus();
-        const interval = setInterval(fetchStatus, POLL_INTERVAL);
+        pollStatus();
 
         return () => {
             isMounted = false;
-            clearInterval(interval);
         };
     }, [orderId]);
 
@@ -30,7 +30,7 @@ export default function RegisterScreen({ onSwitchToLogin }: RegisterScreenProps)
 
             // 2. Auto Login
             const loginData = await login(username, password);
-            await signIn(loginData.access_token);
+            await signIn(loginData.access_token, loginData.refresh_token);
 
         } catch (err: any) {
             const msg = getUserFriendlyError(err);